@@ -0,0 +1,184 @@
+# app/cache.py
+import asyncio
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+from .scoring import encode_masks
+
+# How many writes go to the SQLite tier between pruning passes
+PRUNE_INTERVAL = 1000
+
+
+def analysis_key(survey_responses: dict, project_type: str, scoring_version: str) -> str:
+    """Canonical hash of everything an analysis result depends on.
+
+    Surveys are keyed by their bitmasks, so responses that score the same
+    (e.g. 'B' and 'C' answers, or key order) share one entry.
+    """
+    answered, yes = encode_masks(survey_responses)
+    canonical = json.dumps([answered, yes, project_type, scoring_version], separators=(",", ":"))
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+class AnalysisCache:
+    """In-process LRU cache with TTL, optionally backed by a SQLite file.
+
+    Entries are JSON-serializable analysis results keyed by ``analysis_key``.
+    Hits in the SQLite tier are promoted back into memory. Call
+    ``ensure_version`` with the current scoring version before using the
+    cache, so results computed with other weights are never returned.
+
+    The SQLite tier runs in a worker thread so file I/O and busy waits on
+    other workers never block the event loop.
+    """
+
+    def __init__(self, max_size: int, ttl: float, path: Optional[str] = None, disk_max_size: int = 100000):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.disk_max_size = disk_max_size
+        self.version = None
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        # Serializes the shared SQLite connection across worker threads
+        self._disk_lock = threading.Lock()
+        self._writes = 0
+        self._path = path
+        self._db = None
+        if path:
+            self._connect()
+
+    def _connect(self) -> None:
+        self._db = sqlite3.connect(self._path, check_same_thread=False, isolation_level=None)
+        # Several worker processes may share the file
+        self._db.execute("PRAGMA busy_timeout=5000")
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS analysis_cache ("
+            "key TEXT PRIMARY KEY, version TEXT NOT NULL, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+        )
+
+    def reopen(self) -> None:
+        """Open a fresh SQLite connection in a forked worker.
+
+        A connection must not be used on both sides of a fork, so the
+        inherited one is dropped without being closed.
+        """
+        if self._path:
+            self._lock = threading.Lock()
+            self._disk_lock = threading.Lock()
+            self._connect()
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_size > 0
+
+    def ensure_version(self, version: str) -> None:
+        """Drop in-memory entries cached under a different scoring version.
+
+        SQLite rows are only ever read back under their own version, and
+        are left to expire: while a config edit spreads, workers briefly
+        run different versions and must not delete each other's rows.
+        """
+        if version == self.version:
+            return
+        with self._lock:
+            if version != self.version:
+                self._entries.clear()
+                self.version = version
+
+    async def get(self, key: str) -> Optional[dict]:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at > now:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+
+        value = await asyncio.to_thread(self._disk_get, key) if self._db is not None else None
+        with self._lock:
+            if value is not None:
+                self.disk_hits += 1
+                self._store(key, value, time.monotonic())
+                return value
+            self.misses += 1
+            return None
+
+    async def set(self, key: str, value: dict) -> None:
+        if not self.enabled:
+            return
+        with self._lock:
+            self._store(key, value, time.monotonic())
+        if self._db is not None:
+            await asyncio.to_thread(self._disk_set, key, value)
+
+    async def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+        if self._db is not None:
+            await asyncio.to_thread(self._disk_execute, "DELETE FROM analysis_cache")
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.disk_hits + self.misses
+        return {
+            "version": self.version,
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": (self.hits + self.disk_hits) / lookups if lookups else 0.0,
+        }
+
+    def _store(self, key: str, value: dict, now: float) -> None:
+        self._entries[key] = (now + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    # The SQLite tier uses wall-clock expiry so entries stay meaningful across restarts
+
+    def _disk_execute(self, sql: str, parameters=()) -> None:
+        with self._disk_lock:
+            self._db.execute(sql, parameters)
+
+    def _disk_get(self, key: str) -> Optional[dict]:
+        with self._disk_lock:
+            row = self._db.execute(
+                "SELECT value FROM analysis_cache WHERE key = ? AND version = ? AND expires_at > ?",
+                (key, self.version, time.time()),
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def _disk_set(self, key: str, value: dict) -> None:
+        data = json.dumps(value)
+        with self._disk_lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO analysis_cache (key, version, value, expires_at) VALUES (?, ?, ?, ?)",
+                (key, self.version or "", data, time.time() + self.ttl),
+            )
+            self._writes += 1
+            if self._writes % PRUNE_INTERVAL == 0:
+                self._db.execute("DELETE FROM analysis_cache WHERE expires_at <= ?", (time.time(),))
+                self._db.execute(
+                    "DELETE FROM analysis_cache WHERE key IN ("
+                    "SELECT key FROM analysis_cache ORDER BY expires_at "
+                    "LIMIT max((SELECT count(*) FROM analysis_cache) - ?, 0))",
+                    (self.disk_max_size,),
+                )
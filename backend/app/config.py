@@ -1,11 +1,59 @@
-from pydantic import BaseModel
+from typing import Optional
+
+from pydantic_settings import BaseSettings, SettingsConfigDict
+
+class Settings(BaseSettings):
+    """Read from environment variables of the same name, then .env"""
+    model_config = SettingsConfigDict(env_file=".env")
 
-class Settings(BaseModel):
     DATABASE_URL: str = "sqlite:///./esg_projects.db"
+    # Defaults to DATABASE_URL on its async driver (aiosqlite / asyncpg)
+    ASYNC_DATABASE_URL: Optional[str] = None
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30
+    # Applied to every SQLite connection; see database.set_sqlite_pragmas
+    SQLITE_WAL: bool = True
+    SQLITE_BUSY_TIMEOUT_MS: int = 5000
+    # Create missing tables at startup; turn off when alembic manages the schema
+    AUTO_CREATE_TABLES: bool = True
     API_VERSION: str = "v1"
     PROJECT_NAME: str = "ESG Scoring API"
-    
-    class Config:
-        env_file = ".env"
+    BULK_CHUNK_SIZE: int = 500
+    LOG_LEVEL: str = "INFO"
+    LOG_FORMAT: str = "json"  # or "text"
+    # Add a Server-Timing header with per-phase durations to every response
+    ENABLE_SERVER_TIMING: bool = False
+    # JSON file with scoring weights; defaults to scoring_config.ESG_WEIGHTS
+    SCORING_CONFIG_PATH: Optional[str] = None
+    # JSON file with recommendation rules; defaults to scoring_config.RECOMMENDATION_RULES
+    RECOMMENDATION_RULES_PATH: Optional[str] = None
+    # Seconds between checks of the two files above for edits; every worker reloads them itself
+    CONFIG_CHECK_INTERVAL: float = 5
+    # Value of the X-Admin-Token header that /admin endpoints require; they are disabled when unset
+    ADMIN_TOKEN: Optional[str] = None
+    ANALYSIS_CACHE_SIZE: int = 10000
+    ANALYSIS_CACHE_TTL: float = 3600
+    ANALYSIS_CACHE_PATH: Optional[str] = None
+    ANALYSIS_CACHE_DISK_SIZE: int = 100000
+    # Directory written by ``python -m app.epa build``; EPA data is omitted when unset
+    EPA_DATA_DIR: Optional[str] = None
+    EPA_SEARCH_RADIUS_KM: float = 10
+    EPA_MAX_FACILITIES: int = 25
+    # Facilities within the search radius that give a facility_density of 50
+    EPA_DENSITY_HALF_COUNT: float = 10
+    # Directory written by ``python -m app.location_risk build``
+    RISK_DATA_DIR: Optional[str] = None
+    # Name in geocoding.GEOCODERS
+    GEOCODER: str = "gazetteer"
+    # name,region,latitude,longitude CSV; defaults to the bundled US city list
+    GAZETTEER_PATH: Optional[str] = None
+    GEOCODE_MEMORY_SIZE: int = 10000
+    GEOCODE_CACHE_SIZE: int = 100000
+    # Rank analyses against stored projects of the same projectType and location
+    PEER_RANKINGS: bool = True
+    PEER_NEIGHBORS: int = 2
+    # Seconds between checks for projects stored by other processes
+    PEER_REFRESH_INTERVAL: float = 5
 
 settings = Settings()
\ No newline at end of file
@@ -0,0 +1,292 @@
+# app/crud.py
+import base64
+import json
+from collections import defaultdict
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+from sqlalchemy import Integer, Select, and_, case, cast, func, insert, or_
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from . import models, schemas
+from .location_risk import RISK_LAYERS
+from .scoring import NUM_QUESTIONS, decode_masks, encode_masks
+
+# Score keys from ESGScorer and the Project columns they are stored in
+SCORE_COLUMNS = {
+    "standard_esg": "standard_esg_score",
+    "european_esg": "european_esg_score",
+    "us_esg": "us_esg_score",
+    "community_engagement": "community_engagement_score",
+    "total": "total_esg_score",
+}
+
+# Score rollups: dimensions they are kept for ("all" is the whole portfolio)
+# and the 10-point histogram buckets scores are counted in
+DIMENSIONS = ("all", "projectType", "location")
+BUCKET_WIDTH = 10
+NUM_BUCKETS = 10
+
+_UPSERT_DIALECTS = {"sqlite": sqlite, "postgresql": postgresql}
+
+# Columns that may be requested through ``fields=`` on the project list
+PROJECT_FIELDS = {
+    name: getattr(models.Project, name)
+    for name in (
+        "id", "projectName", "location", "projectType", "revision", "latitude", "longitude",
+        "air_quality_risk", "water_quality_risk", "facility_density", "environmental_justice_risk",
+        "standard_esg_score", "european_esg_score", "us_esg_score",
+        "community_engagement_score", "total_esg_score", "scoring_version",
+        "created_at", "updated_at",
+    )
+}
+# Fields computed from several columns, with the function that combines them
+DERIVED_FIELDS = {
+    "surveyResponses": ((models.Project.survey_answered, models.Project.survey_yes), decode_masks),
+}
+
+SORT_COLUMNS = {
+    "created_at": models.Project.created_at,
+    "total_esg_score": models.Project.total_esg_score,
+}
+
+
+def identity_key(project_name: str, location: str) -> str:
+    """Key resubmissions of a project are matched on: case- and whitespace-insensitive name and location"""
+    return "\n".join(" ".join(value.split()).casefold() for value in (project_name, location))
+
+
+def project_row(
+    project: schemas.ProjectCreate,
+    scores: dict,
+    scoring_version: str,
+    coordinates: Optional[Tuple[float, float]] = None,
+    risks: Optional[dict] = None
+) -> dict:
+    """Column values for a scored project.
+
+    ``coordinates`` are the resolved site location and ``risks`` its
+    LocationRiskMetrics fields.
+    """
+    latitude, longitude = coordinates or (None, None)
+    risks = risks or {}
+    survey_answered, survey_yes = encode_masks(project.surveyResponses)
+    return {
+        "projectName": project.projectName,
+        "location": project.location,
+        "projectType": project.projectType,
+        "identity_key": identity_key(project.projectName, project.location),
+        "survey_answered": survey_answered,
+        "survey_yes": survey_yes,
+        "latitude": latitude,
+        "longitude": longitude,
+        **{name: risks.get(name) for name in RISK_LAYERS},
+        **{column: scores.get(key, 0) for key, column in SCORE_COLUMNS.items()},
+        "scoring_version": scoring_version,
+    }
+
+
+async def bulk_insert_projects(db: AsyncSession, rows: List[dict], chunk_size: int) -> List[int]:
+    """Insert project rows with one executemany and one commit per chunk.
+
+    Score rollups are updated in the same transaction as each chunk.
+
+    Returns the new ids in input order. Chunks committed before a failure
+    stay committed.
+    """
+    statement = insert(models.Project).returning(models.Project.id, sort_by_parameter_order=True)
+    ids = []
+    for start in range(0, len(rows), chunk_size):
+        chunk = rows[start:start + chunk_size]
+        result = await db.execute(statement, chunk)
+        ids.extend(result.scalars().all())
+        await add_to_rollups(db, chunk)
+        await db.commit()
+    return ids
+
+
+def bucket_of(score: float) -> int:
+    """Histogram bucket of a 0-100 score; 100 falls into the top bucket"""
+    return min(max(int(score // BUCKET_WIDTH), 0), NUM_BUCKETS - 1)
+
+
+def bucket_expression(score, dialect_name: str):
+    """SQL counterpart of bucket_of, shared by app.stats and the rollup migration.
+
+    CAST rounds on Postgres, so other databases floor first. SQLite may be
+    built without floor(); its CAST truncates, which is the same for the
+    non-negative scores that reach it.
+    """
+    scaled = score / BUCKET_WIDTH
+    return case(
+        (score >= BUCKET_WIDTH * NUM_BUCKETS, NUM_BUCKETS - 1),
+        (score < 0, 0),
+        else_=cast(scaled if dialect_name == "sqlite" else func.floor(scaled), Integer),
+    )
+
+
+def rollup_deltas(rows: List[dict], removed: List[dict] = ()) -> List[dict]:
+    """Aggregate inserted project rows, less ``removed`` ones, into score_rollups increments"""
+    deltas = defaultdict(lambda: [0, 0.0, 0.0])
+    for sign, group in ((1, rows), (-1, removed)):
+        for row in group:
+            for dimension in DIMENSIONS:
+                group_value = "" if dimension == "all" else row.get(dimension) or ""
+                for category, column in SCORE_COLUMNS.items():
+                    score = row.get(column)
+                    if score is None:
+                        continue
+                    delta = deltas[(dimension, group_value, category, bucket_of(score))]
+                    delta[0] += sign
+                    delta[1] += sign * score
+                    delta[2] += sign * score * score
+    return [
+        {
+            "dimension": dimension,
+            "group_value": group_value,
+            "category": category,
+            "bucket": bucket,
+            "count": count,
+            "score_sum": score_sum,
+            "score_sq_sum": score_sq_sum,
+        }
+        for (dimension, group_value, category, bucket), (count, score_sum, score_sq_sum) in deltas.items()
+    ]
+
+
+def rollup_upsert(dialect_name: str):
+    """INSERT ... ON CONFLICT DO UPDATE that adds increments to existing rollup rows"""
+    dialect = _UPSERT_DIALECTS.get(dialect_name)
+    if dialect is None:
+        raise NotImplementedError(f"Score rollups need an upsert-capable database, not {dialect_name}")
+    table = models.ScoreRollup.__table__
+    statement = dialect.insert(table)
+    return statement.on_conflict_do_update(
+        index_elements=[table.c.dimension, table.c.group_value, table.c.category, table.c.bucket],
+        set_={
+            "count": table.c.count + statement.excluded.count,
+            "score_sum": table.c.score_sum + statement.excluded.score_sum,
+            "score_sq_sum": table.c.score_sq_sum + statement.excluded.score_sq_sum,
+        },
+    )
+
+
+async def add_to_rollups(db: AsyncSession, rows: List[dict], removed: List[dict] = ()) -> None:
+    """Fold newly inserted project rows into the rollups, and take out the
+    ``removed`` versions they replace; the caller commits"""
+    deltas = rollup_deltas(rows, removed)
+    if deltas:
+        await db.execute(rollup_upsert(db.bind.dialect.name), deltas)
+
+
+def field_columns(names: List[str]) -> list:
+    """Columns to select for the named project fields"""
+    columns = []
+    for name in names:
+        columns.extend(DERIVED_FIELDS[name][0] if name in DERIVED_FIELDS else (PROJECT_FIELDS[name],))
+    return columns
+
+
+def field_values(row, names: List[str]) -> dict:
+    """Named field values from a row selected with field_columns()"""
+    values = {}
+    for name in names:
+        if name in DERIVED_FIELDS:
+            columns, combine = DERIVED_FIELDS[name]
+            values[name] = combine(*(getattr(row, column.key) for column in columns))
+        else:
+            values[name] = getattr(row, name)
+    return values
+
+
+def parse_answers(answers: List[str]) -> List[Tuple[int, bool]]:
+    """Parse ``16:B`` style answer filters into (question, answered yes) pairs"""
+    parsed = []
+    for answer in answers:
+        question, _, value = answer.partition(":")
+        value = value.strip().upper()
+        if not question.strip().isdigit() or not 1 <= int(question) <= NUM_QUESTIONS or value not in ("A", "B"):
+            raise ValueError(f"Invalid answer filter {answer!r}, expected e.g. 16:B")
+        parsed.append((int(question), value == "A"))
+    return parsed
+
+
+def filter_projects(
+    statement: Select,
+    project_type: Optional[str] = None,
+    location: Optional[str] = None,
+    min_score: Optional[float] = None,
+    max_score: Optional[float] = None,
+    answers: Optional[List[Tuple[int, bool]]] = None
+) -> Select:
+    """Apply the project list filters to a select statement.
+
+    ``answers`` keeps projects that gave each (question, yes) answer; the
+    bitmask tests run in SQL.
+    """
+    if project_type is not None:
+        statement = statement.where(models.Project.projectType == project_type)
+    if location is not None:
+        statement = statement.where(models.Project.location == location)
+    if min_score is not None:
+        statement = statement.where(models.Project.total_esg_score >= min_score)
+    if max_score is not None:
+        statement = statement.where(models.Project.total_esg_score <= max_score)
+    for question, yes in answers or ():
+        bit = 1 << (question - 1)
+        statement = statement.where(models.Project.survey_answered.bitwise_and(bit) != 0)
+        statement = statement.where((models.Project.survey_yes.bitwise_and(bit) != 0) == yes)
+    return statement
+
+
+def parse_sort(sort: str) -> Tuple[str, bool]:
+    """Split ``-total_esg_score`` style sort keys into (column name, descending)"""
+    descending = sort.startswith("-")
+    name = sort.lstrip("-")
+    if name not in SORT_COLUMNS:
+        raise ValueError(f"Cannot sort by '{name}'; choose from {', '.join(SORT_COLUMNS)}")
+    return name, descending
+
+
+def keyset_page(statement: Select, sort: str, cursor: Optional[str], limit: int) -> Select:
+    """Order by (sort column, id) and continue after ``cursor`` if one is given"""
+    name, descending = parse_sort(sort)
+    column = SORT_COLUMNS[name]
+    if name == "total_esg_score":
+        # NULL scores have no place in the ordering and would break the cursor
+        statement = statement.where(column.is_not(None))
+
+    if cursor is not None:
+        value, last_id = decode_cursor(cursor, name)
+        if descending:
+            statement = statement.where(or_(column < value, and_(column == value, models.Project.id < last_id)))
+        else:
+            statement = statement.where(or_(column > value, and_(column == value, models.Project.id > last_id)))
+
+    if descending:
+        statement = statement.order_by(column.desc(), models.Project.id.desc())
+    else:
+        statement = statement.order_by(column, models.Project.id)
+    return statement.limit(limit)
+
+
+def encode_cursor(sort_value, project_id: int) -> str:
+    """Opaque cursor pointing just after a row"""
+    if isinstance(sort_value, datetime):
+        sort_value = sort_value.isoformat()
+    payload = json.dumps([sort_value, project_id]).encode()
+    return base64.urlsafe_b64encode(payload).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, sort_name: str) -> Tuple[object, int]:
+    try:
+        payload = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        sort_value, project_id = json.loads(payload)
+        if sort_name == "created_at":
+            sort_value = datetime.fromisoformat(sort_value)
+        else:
+            sort_value = float(sort_value)
+        return sort_value, int(project_id)
+    except (ValueError, TypeError) as e:
+        raise ValueError("Invalid cursor") from e
@@ -1,11 +1,108 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, NullPool
 from .config import settings
 
 SQLALCHEMY_DATABASE_URL = settings.DATABASE_URL
 
-engine = create_engine(SQLALCHEMY_DATABASE_URL)
+# Async drivers for the sync URLs we accept in DATABASE_URL
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+    "postgres": "postgresql+asyncpg",
+}
+
+
+def async_database_url(url: str) -> str:
+    """Swap a plain sqlite:// or postgresql:// URL onto its async driver"""
+    scheme, sep, rest = url.partition("://")
+    if "+" in scheme or scheme not in ASYNC_DRIVERS:
+        return url
+    return ASYNC_DRIVERS[scheme] + sep + rest
+
+
+def async_pool_options(url: str) -> dict:
+    """Pool settings for the async engine.
+
+    aiosqlite defaults to NullPool for file databases, which opens a new
+    connection per session; use a real queue pool there as well as for
+    Postgres. In-memory SQLite keeps its default single shared connection.
+    """
+    if url.startswith("sqlite") and (":memory:" in url or url.rstrip("/").endswith(":")):
+        return {}
+    return {
+        "poolclass": AsyncAdaptedQueuePool,
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_pre_ping": True,
+    }
+
+
+def set_sqlite_pragmas(dbapi_connection, connection_record) -> None:
+    """Connect hook: WAL lets readers run alongside the single writer, and the
+    busy timeout makes writers from other processes wait instead of failing
+    with "database is locked"."""
+    cursor = dbapi_connection.cursor()
+    cursor.execute(f"PRAGMA busy_timeout = {int(settings.SQLITE_BUSY_TIMEOUT_MS)}")
+    if settings.SQLITE_WAL:
+        cursor.execute("PRAGMA journal_mode = WAL")
+        cursor.execute("PRAGMA synchronous = NORMAL")
+    cursor.close()
+
+
+def _with_pragmas(sync_engine):
+    if sync_engine.dialect.name == "sqlite":
+        event.listen(sync_engine, "connect", set_sqlite_pragmas)
+    return sync_engine
+
+
+# Sync engine for scripts, migrations and batch jobs
+engine = _with_pragmas(create_engine(SQLALCHEMY_DATABASE_URL))
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
-Base = declarative_base()
\ No newline at end of file
+# Async engine used by the API handlers so database I/O does not block the event loop.
+# ASYNC_DATABASE_URL, DB_POOL_SIZE, DB_MAX_OVERFLOW and DB_POOL_TIMEOUT come from the environment.
+ASYNC_SQLALCHEMY_DATABASE_URL = settings.ASYNC_DATABASE_URL or async_database_url(SQLALCHEMY_DATABASE_URL)
+
+async_engine = create_async_engine(
+    ASYNC_SQLALCHEMY_DATABASE_URL,
+    **async_pool_options(ASYNC_SQLALCHEMY_DATABASE_URL)
+)
+_with_pragmas(async_engine.sync_engine)
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+Base = declarative_base()
+
+
+def bootstrap_engine() -> AsyncEngine:
+    """Unpooled async engine for one-off work outside the server's event loop.
+
+    An async engine must only be used from one event loop, so code that
+    runs its own (e.g. a preloading server master) uses this instead of
+    async_engine and disposes it afterwards.
+    """
+    bootstrap = create_async_engine(ASYNC_SQLALCHEMY_DATABASE_URL, poolclass=NullPool)
+    _with_pragmas(bootstrap.sync_engine)
+    return bootstrap
+
+
+async def init_db(bind: AsyncEngine = async_engine) -> None:
+    """Create missing tables; deployments managed with alembic skip this"""
+    from . import models
+    async with bind.begin() as connection:
+        await connection.run_sync(models.Base.metadata.create_all)
+
+
+def dispose_inherited_pools() -> None:
+    """Drop pooled connections inherited from a parent process, without closing
+    them under the parent; call in every forked worker."""
+    engine.dispose(close=False)
+    # Recreating an async pool that never connected is needless, and on
+    # SQLAlchemy < 2.0.24 leaves it with a thread lock that deadlocks
+    # concurrent first connections
+    pool = async_engine.sync_engine.pool
+    if pool.checkedin() or pool.checkedout():
+        async_engine.sync_engine.dispose(close=False)
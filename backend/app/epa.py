@@ -0,0 +1,316 @@
+# app/epa.py
+"""Local EPA facility dataset with a grid spatial index.
+
+A bulk facility export (e.g. the FRS national CSV, or a Parquet copy of
+it) is ingested offline into a directory of memory-mapped columns:
+
+    python -m app.epa build NATIONAL_SINGLE.CSV --out data/epa
+
+Facilities are sorted by the grid cell that contains them, so the
+facilities of one grid row form contiguous runs of the ``cell`` column.
+A radius query looks up a handful of runs with ``searchsorted`` and
+filters them by great-circle distance. No external service is called on
+the request path.
+"""
+import argparse
+import csv
+import json
+import math
+import mmap
+import os
+import threading
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from .config import settings
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180
+
+DEFAULT_CELL_SIZE = 0.1  # degrees, ~11 km north-south
+
+# schemas.EPAFacility text fields, stored in this order
+TEXT_FIELDS = (
+    "facility_name", "registry_id", "facility_type", "location_address",
+    "city_name", "state_code", "postal_code",
+)
+
+# Accepted source column names (case-insensitive) for each stored field
+COLUMN_ALIASES = {
+    "facility_name": ("facility_name", "primary_name", "fac_name"),
+    "registry_id": ("registry_id",),
+    "facility_type": ("facility_type", "site_type_name", "fac_type"),
+    "location_address": ("location_address", "fac_street"),
+    "city_name": ("city_name", "fac_city"),
+    "state_code": ("state_code", "fac_state"),
+    "postal_code": ("postal_code", "fac_zip"),
+    "latitude83": ("latitude83", "latitude", "fac_lat"),
+    "longitude83": ("longitude83", "longitude", "fac_long"),
+}
+
+
+class FacilityStore:
+    """Read-only, memory-mapped facility columns plus their grid index.
+
+    ``lat``/``lon`` are float32 degrees, ``cell`` the sorted grid cell of
+    each facility and ``offsets`` the (n, fields + 1) byte offsets of its
+    text fields in ``text.bin``.
+    """
+
+    def __init__(self, directory: str):
+        with open(os.path.join(directory, "meta.json")) as f:
+            meta = json.load(f)
+        self.directory = directory
+        self.cell_size = meta["cell_size"]
+        self.fields = tuple(meta["fields"])
+        self.n_rows = int(round(180 / self.cell_size))
+        self.n_cols = int(round(360 / self.cell_size))
+        self.lat = np.load(os.path.join(directory, "lat.npy"), mmap_mode="r")
+        self.lon = np.load(os.path.join(directory, "lon.npy"), mmap_mode="r")
+        self.cell = np.load(os.path.join(directory, "cell.npy"), mmap_mode="r")
+        self.offsets = np.load(os.path.join(directory, "offsets.npy"), mmap_mode="r")
+        with open(os.path.join(directory, "text.bin"), "rb") as f:
+            self._text = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if os.fstat(f.fileno()).st_size else b""
+
+    def __len__(self) -> int:
+        return len(self.lat)
+
+    def nearby(self, latitude: float, longitude: float, radius_km: float) -> Tuple[np.ndarray, np.ndarray]:
+        """Indices and distances (km) of facilities within ``radius_km``, nearest first"""
+        candidates = self._candidates(latitude, longitude, radius_km)
+        if not len(candidates):
+            return candidates, np.empty(0)
+        distances = haversine_km(latitude, longitude, self.lat[candidates], self.lon[candidates])
+        within = distances <= radius_km
+        candidates, distances = candidates[within], distances[within]
+        order = np.argsort(distances, kind="stable")
+        return candidates[order], distances[order]
+
+    def count_within(self, latitudes, longitudes, radius_km: float) -> np.ndarray:
+        """Number of facilities within ``radius_km`` of each of many points"""
+        latitudes = np.asarray(latitudes, dtype=np.float64)
+        longitudes = np.asarray(longitudes, dtype=np.float64)
+        counts = np.zeros(len(latitudes), dtype=np.int64)
+        for i, (latitude, longitude) in enumerate(zip(latitudes, longitudes)):
+            candidates = self._candidates(latitude, longitude, radius_km)
+            if len(candidates):
+                distances = haversine_km(latitude, longitude, self.lat[candidates], self.lon[candidates])
+                counts[i] = np.count_nonzero(distances <= radius_km)
+        return counts
+
+    def facility(self, index: int) -> Dict[str, Optional[str]]:
+        """Text fields and coordinates of one facility, as schemas.EPAFacility fields"""
+        bounds = self.offsets[index]
+        record = {
+            name: self._text[bounds[i]:bounds[i + 1]].decode("utf-8") or None
+            for i, name in enumerate(self.fields)
+        }
+        record["latitude83"] = round(float(self.lat[index]), 6)
+        record["longitude83"] = round(float(self.lon[index]), 6)
+        return record
+
+    def _candidates(self, latitude: float, longitude: float, radius_km: float) -> np.ndarray:
+        # Facilities in every grid cell that overlaps the query's bounding box
+        dlat = radius_km / KM_PER_DEGREE
+        row_lo, row_hi = self._row(latitude - dlat), self._row(latitude + dlat)
+        widest = min(max(abs(latitude - dlat), abs(latitude + dlat)), 90.0)
+        cos_lat = math.cos(math.radians(widest))
+        dlon = dlat / cos_lat if cos_lat > 1e-9 else 360.0
+
+        if 2 * dlon >= 360:
+            col_ranges = [(0, self.n_cols - 1)]
+        else:
+            col_lo = math.floor((longitude - dlon + 180) / self.cell_size) % self.n_cols
+            col_hi = math.floor((longitude + dlon + 180) / self.cell_size) % self.n_cols
+            if col_lo <= col_hi:
+                col_ranges = [(col_lo, col_hi)]
+            else:  # crosses the antimeridian
+                col_ranges = [(col_lo, self.n_cols - 1), (0, col_hi)]
+
+        rows = np.arange(row_lo, row_hi + 1, dtype=np.int64) * self.n_cols
+        lo = np.concatenate([rows + a for a, _ in col_ranges])
+        hi = np.concatenate([rows + b for _, b in col_ranges])
+        starts = np.searchsorted(self.cell, lo, side="left")
+        ends = np.searchsorted(self.cell, hi, side="right")
+        runs = [np.arange(s, e) for s, e in zip(starts, ends) if e > s]
+        return np.concatenate(runs) if runs else np.empty(0, dtype=np.int64)
+
+    def _row(self, latitude: float) -> int:
+        return min(max(math.floor((latitude + 90) / self.cell_size), 0), self.n_rows - 1)
+
+
+def haversine_km(latitude: float, longitude: float, latitudes, longitudes) -> np.ndarray:
+    """Great-circle distance from one point to arrays of points"""
+    lat1 = math.radians(latitude)
+    lat2 = np.radians(np.asarray(latitudes, dtype=np.float64))
+    dlat = lat2 - lat1
+    dlon = np.radians(np.asarray(longitudes, dtype=np.float64) - longitude)
+    a = np.sin(dlat / 2) ** 2 + math.cos(lat1) * np.cos(lat2) * np.sin(dlon / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+def cell_ids(latitudes: np.ndarray, longitudes: np.ndarray, cell_size: float) -> np.ndarray:
+    """Row-major grid cell of each point"""
+    n_rows, n_cols = int(round(180 / cell_size)), int(round(360 / cell_size))
+    rows = np.clip(np.floor((latitudes + 90) / cell_size), 0, n_rows - 1).astype(np.int64)
+    cols = np.floor((longitudes + 180) / cell_size).astype(np.int64) % n_cols
+    return rows * n_cols + cols
+
+
+def build_store(source: str, directory: str, cell_size: float = DEFAULT_CELL_SIZE, batch_size: int = 100000) -> int:
+    """Ingest a facility CSV or Parquet file into ``directory``.
+
+    Text fields are streamed straight to ``text.bin``; only coordinates and
+    offsets are held in memory for the final sort. Rows without valid
+    coordinates are skipped. Returns the number of facilities stored.
+    """
+    os.makedirs(directory, exist_ok=True)
+    lat_parts, lon_parts, offset_parts = [], [], []
+    position = 0
+    with open(os.path.join(directory, "text.bin"), "wb") as text:
+        for batch in _read_batches(source, batch_size):
+            lats, lons, offsets = [], [], []
+            for record in batch:
+                coordinates = _coordinates(record)
+                if coordinates is None:
+                    continue
+                row_offsets = [position]
+                for name in TEXT_FIELDS:
+                    encoded = (record.get(name) or "").strip().encode("utf-8")
+                    text.write(encoded)
+                    position += len(encoded)
+                    row_offsets.append(position)
+                lats.append(coordinates[0])
+                lons.append(coordinates[1])
+                offsets.append(row_offsets)
+            lat_parts.append(np.array(lats, dtype=np.float32))
+            lon_parts.append(np.array(lons, dtype=np.float32))
+            offset_parts.append(np.array(offsets, dtype=np.int64).reshape(-1, len(TEXT_FIELDS) + 1))
+
+    lat = np.concatenate(lat_parts) if lat_parts else np.empty(0, dtype=np.float32)
+    lon = np.concatenate(lon_parts) if lon_parts else np.empty(0, dtype=np.float32)
+    offsets = np.concatenate(offset_parts) if offset_parts else np.empty((0, len(TEXT_FIELDS) + 1), dtype=np.int64)
+    cell = cell_ids(lat.astype(np.float64), lon.astype(np.float64), cell_size)
+    order = np.argsort(cell, kind="stable")
+
+    np.save(os.path.join(directory, "lat.npy"), lat[order])
+    np.save(os.path.join(directory, "lon.npy"), lon[order])
+    np.save(os.path.join(directory, "cell.npy"), cell[order])
+    np.save(os.path.join(directory, "offsets.npy"), offsets[order])
+    with open(os.path.join(directory, "meta.json"), "w") as f:
+        json.dump({
+            "cell_size": cell_size,
+            "count": int(len(lat)),
+            "fields": list(TEXT_FIELDS),
+            "source": os.path.basename(source),
+        }, f)
+    return len(lat)
+
+
+def _read_batches(source: str, batch_size: int) -> Iterator[List[dict]]:
+    # Yield lists of records keyed by our field names
+    if source.endswith((".parquet", ".pq")):
+        import pyarrow.parquet as pq  # optional; only needed for Parquet input
+
+        parquet = pq.ParquetFile(source)
+        mapping = _column_mapping(parquet.schema_arrow.names)
+        for batch in parquet.iter_batches(batch_size=batch_size, columns=list(mapping.values())):
+            columns = {name: batch.column(column).to_pylist() for name, column in mapping.items()}
+            yield [
+                {name: values[i] for name, values in columns.items()}
+                for i in range(batch.num_rows)
+            ]
+        return
+
+    with open(source, newline="", encoding="utf-8", errors="replace") as f:
+        reader = csv.reader(f)
+        header = next(reader, None) or []
+        positions = {name: header.index(column) for name, column in _column_mapping(header).items()}
+        batch = []
+        for values in reader:
+            batch.append({name: values[i] if i < len(values) else None for name, i in positions.items()})
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+
+def _column_mapping(columns: List[str]) -> Dict[str, str]:
+    lowered = {column.strip().lower(): column for column in columns}
+    mapping = {}
+    for name, aliases in COLUMN_ALIASES.items():
+        for alias in aliases:
+            if alias in lowered:
+                mapping[name] = lowered[alias]
+                break
+    missing = {"latitude83", "longitude83"} - set(mapping)
+    if missing:
+        raise ValueError(f"Source has no {', '.join(sorted(missing))} column")
+    return mapping
+
+
+def _coordinates(record: dict) -> Optional[Tuple[float, float]]:
+    try:
+        latitude, longitude = float(record["latitude83"]), float(record["longitude83"])
+    except (KeyError, TypeError, ValueError):
+        return None
+    if not (-90 <= latitude <= 90 and -180 <= longitude <= 180) or (latitude == 0 and longitude == 0):
+        return None
+    return latitude, longitude
+
+
+_store: Optional[FacilityStore] = None
+_store_lock = threading.Lock()
+
+
+def get_store() -> Optional[FacilityStore]:
+    """The store in settings.EPA_DATA_DIR, opened on first use; None when not configured"""
+    global _store
+    if _store is None and settings.EPA_DATA_DIR:
+        with _store_lock:
+            if _store is None:
+                _store = FacilityStore(settings.EPA_DATA_DIR)
+    return _store
+
+
+def facility_density_score(count: int, half_count: float) -> float:
+    """0-100 score that reaches 50 at ``half_count`` nearby facilities"""
+    return round(100 * count / (count + half_count), 2) if count else 0.0
+
+
+def environmental_data(
+    store: FacilityStore,
+    latitude: float,
+    longitude: float,
+    radius_km: float,
+    max_facilities: int,
+) -> dict:
+    """schemas.EPAEnvironmentalData fields for a location, from the local store"""
+    indices, distances = store.nearby(latitude, longitude, radius_km)
+    metrics = {"facilities_within_radius": float(len(indices)), "radius_km": float(radius_km)}
+    if len(distances):
+        metrics["nearest_facility_km"] = round(float(distances[0]), 3)
+    return {
+        "nearby_facilities": [store.facility(int(i)) for i in indices[:max_facilities]],
+        "compliance_metrics": metrics,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the local EPA facility store")
+    subcommands = parser.add_subparsers(dest="command", required=True)
+    build = subcommands.add_parser("build", help="Ingest a facility CSV or Parquet export")
+    build.add_argument("source")
+    build.add_argument("--out", required=True, help="Directory to write the store to (EPA_DATA_DIR)")
+    build.add_argument("--cell-size", type=float, default=DEFAULT_CELL_SIZE, help="Grid cell size in degrees")
+    build.add_argument("--batch-size", type=int, default=100000)
+    args = parser.parse_args()
+
+    count = build_store(args.source, args.out, args.cell_size, args.batch_size)
+    print(f"stored {count:,} facilities in {args.out}", flush=True)
+
+
+if __name__ == "__main__":
+    main()
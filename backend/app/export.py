@@ -0,0 +1,249 @@
+# app/export.py
+"""Stream the projects table out as CSV, Parquet or Arrow.
+
+Rows are read with a server-side cursor (``yield_per``) and encoded one
+batch at a time, so memory stays bounded by the batch size whatever the
+table size. Survey answers are flattened into ``q1`` ... ``q35`` columns
+holding 'A', 'B' or null.
+
+From the command line (run from the backend directory):
+
+    python -m app.export --format parquet --out projects.parquet --project-type solar_utility
+
+Parquet and Arrow output use pyarrow (in requirements.txt).
+"""
+import argparse
+import csv
+import io
+import sys
+from typing import AsyncIterator, BinaryIO, Iterable, List, Optional
+
+import numpy as np
+from sqlalchemy import Select, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from . import crud, models
+from .scoring import NUM_QUESTIONS, arrays_from_masks
+
+ANSWER_COLUMNS = tuple(f"q{q}" for q in range(1, NUM_QUESTIONS + 1))
+# "answers" in a column selection expands to ANSWER_COLUMNS
+EXPORT_FIELDS = tuple(crud.PROJECT_FIELDS) + ("answers",)
+DEFAULT_BATCH_SIZE = 5000
+
+# Arrow type of each non-float column; everything else is float64
+_ARROW_TYPES = {
+    "id": "int64",
+    "revision": "int64",
+    "created_at": "timestamp",
+    "updated_at": "timestamp",
+    "projectName": "string",
+    "location": "string",
+    "projectType": "string",
+    "scoring_version": "string",
+    **dict.fromkeys(ANSWER_COLUMNS, "string"),
+}
+
+
+def parse_columns(columns: Optional[str]) -> List[str]:
+    """Export field names from a comma-separated list; all fields when empty"""
+    names = [name.strip() for name in (columns or "").split(",") if name.strip()]
+    if not names:
+        return list(EXPORT_FIELDS)
+    unknown = [name for name in names if name not in EXPORT_FIELDS]
+    if unknown:
+        raise ValueError(f"Unknown columns: {', '.join(unknown)}")
+    return list(dict.fromkeys(names))
+
+
+def output_columns(fields: List[str]) -> List[str]:
+    """Column headers of an export of ``fields``"""
+    return [column for name in fields for column in (ANSWER_COLUMNS if name == "answers" else (name,))]
+
+
+def export_statement(fields: List[str], **filters) -> Select:
+    """Select the columns behind ``fields`` in id order; ``filters`` go to crud.filter_projects"""
+    columns = []
+    for name in fields:
+        if name == "answers":
+            columns += [models.Project.survey_answered, models.Project.survey_yes]
+        else:
+            columns.append(crud.PROJECT_FIELDS[name])
+    statement = select(*columns, models.Project.id.label("_id"))
+    return crud.filter_projects(statement, **filters).order_by(models.Project.id)
+
+
+def batch_columns(rows: list, fields: List[str]) -> List[list]:
+    """Column-major values of a batch of rows, with answers flattened"""
+    columns = []
+    for name in fields:
+        if name == "answers":
+            yes, answered = arrays_from_masks(
+                [row.survey_answered for row in rows], [row.survey_yes for row in rows]
+            )
+            answers = np.where(yes, "A", np.where(answered, "B", None))
+            columns.extend(answers.T.tolist())
+        else:
+            columns.append([getattr(row, name) for row in rows])
+    return columns
+
+
+class CSVEncoder:
+    media_type = "text/csv"
+    extension = "csv"
+
+    def __init__(self, columns: List[str]):
+        self.columns = columns
+
+    def begin(self) -> bytes:
+        return self._encode([self.columns])
+
+    def encode(self, columns: List[list]) -> bytes:
+        return self._encode(zip(*columns))
+
+    def end(self) -> bytes:
+        return b""
+
+    @staticmethod
+    def _encode(rows: Iterable) -> bytes:
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(rows)
+        return buffer.getvalue().encode("utf-8")
+
+
+class _ChunkSink:
+    # File-like object pyarrow writes into; drained after every batch
+    closed = False
+
+    def __init__(self):
+        self.chunks = []
+
+    def write(self, data) -> int:
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        self.closed = True
+
+    def drain(self) -> bytes:
+        data, self.chunks = b"".join(self.chunks), []
+        return data
+
+
+class ArrowEncoder:
+    """Arrow IPC stream, or Parquet with one row group per batch"""
+
+    def __init__(self, columns: List[str], parquet: bool = False):
+        try:
+            import pyarrow as pa
+        except ImportError:
+            raise ValueError("Parquet and Arrow export need pyarrow installed")
+        self.pa = pa
+        self.parquet = parquet
+        self.media_type = "application/vnd.apache.parquet" if parquet else "application/vnd.apache.arrow.stream"
+        self.extension = "parquet" if parquet else "arrows"
+        types = {"string": pa.string(), "int64": pa.int64(), "timestamp": pa.timestamp("us"), "float64": pa.float64()}
+        self.schema = pa.schema([(column, types[_ARROW_TYPES.get(column, "float64")]) for column in columns])
+        self._sink = _ChunkSink()
+        self._writer = None
+
+    def begin(self) -> bytes:
+        if self.parquet:
+            import pyarrow.parquet as pq
+            self._writer = pq.ParquetWriter(self._sink, self.schema, compression="zstd")
+        else:
+            self._writer = self.pa.ipc.new_stream(self._sink, self.schema)
+        return self._sink.drain()
+
+    def encode(self, columns: List[list]) -> bytes:
+        batch = self.pa.record_batch(
+            [self.pa.array(values, type=field.type) for values, field in zip(columns, self.schema)],
+            schema=self.schema,
+        )
+        if self.parquet:
+            self._writer.write_table(self.pa.Table.from_batches([batch]))
+        else:
+            self._writer.write_batch(batch)
+        return self._sink.drain()
+
+    def end(self) -> bytes:
+        self._writer.close()
+        return self._sink.drain()
+
+
+def make_encoder(export_format: str, columns: List[str]):
+    if export_format == "csv":
+        return CSVEncoder(columns)
+    if export_format in ("parquet", "arrow"):
+        return ArrowEncoder(columns, parquet=export_format == "parquet")
+    raise ValueError("format must be one of csv, parquet, arrow")
+
+
+async def stream_export(
+    db: AsyncSession, statement: Select, fields: List[str], encoder, batch_size: int = DEFAULT_BATCH_SIZE
+) -> AsyncIterator[bytes]:
+    """Encoded export chunks, read through a server-side cursor"""
+    yield encoder.begin()
+    result = await db.stream(statement.execution_options(yield_per=batch_size))
+    async for rows in result.partitions():
+        yield encoder.encode(batch_columns(rows, fields))
+    yield encoder.end()
+
+
+def write_export(
+    db: Session, statement: Select, fields: List[str], encoder, out: BinaryIO, batch_size: int = DEFAULT_BATCH_SIZE
+) -> int:
+    """Write an export to a binary file; returns the number of rows"""
+    count = 0
+    out.write(encoder.begin())
+    for rows in db.execute(statement.execution_options(yield_per=batch_size)).partitions():
+        out.write(encoder.encode(batch_columns(rows, fields)))
+        count += len(rows)
+    out.write(encoder.end())
+    return count
+
+
+def main():
+    from .database import SessionLocal
+
+    parser = argparse.ArgumentParser(description="Export projects to CSV, Parquet or Arrow")
+    parser.add_argument("--format", choices=("csv", "parquet", "arrow"), default="csv")
+    parser.add_argument("--out", help="Output file (default: stdout)")
+    parser.add_argument("--columns", help=f"Comma-separated subset of: {', '.join(EXPORT_FIELDS)}")
+    parser.add_argument("--project-type")
+    parser.add_argument("--location")
+    parser.add_argument("--min-score", type=float)
+    parser.add_argument("--max-score", type=float)
+    parser.add_argument("--answer", action="append", default=[], help="Answer filter such as 16:B; repeatable")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    args = parser.parse_args()
+
+    try:
+        fields = parse_columns(args.columns)
+        statement = export_statement(
+            fields,
+            project_type=args.project_type,
+            location=args.location,
+            min_score=args.min_score,
+            max_score=args.max_score,
+            answers=crud.parse_answers(args.answer),
+        )
+        encoder = make_encoder(args.format, output_columns(fields))
+    except ValueError as e:
+        parser.error(str(e))
+
+    out = open(args.out, "wb") if args.out else sys.stdout.buffer
+    try:
+        with SessionLocal() as db:
+            count = write_export(db, statement, fields, encoder, out, args.batch_size)
+    finally:
+        if args.out:
+            out.close()
+    print(f"exported {count:,} projects", file=sys.stderr, flush=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,300 @@
+# app/geocoding.py
+"""Resolve free-text project locations to coordinates.
+
+Geocoders are pluggable (see ``GEOCODERS``); the default looks places up
+in a local gazetteer CSV and needs no network. Results, including misses,
+are cached by normalized location string in an in-process LRU and in the
+``geocode_cache`` table, so each distinct location is geocoded once.
+
+Backfill coordinates for projects stored before geocoding existed with:
+
+    python -m app.geocoding --backfill
+"""
+import argparse
+import asyncio
+import csv
+import os
+import re
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from . import models
+from .config import settings
+
+Coordinates = Tuple[float, float]
+
+DEFAULT_GAZETTEER = os.path.join(os.path.dirname(__file__), "data", "us_cities.csv")
+
+# Cached rows are re-stamped at most this often, so hot locations are not written on every hit
+_TOUCH_INTERVAL = 3600
+# Re-stamps are queued and written in one UPDATE once this many are pending or this many seconds pass
+_TOUCH_BATCH = 500
+_TOUCH_FLUSH_INTERVAL = 60
+_QUERY_CHUNK = 500
+_UPSERT_DIALECTS = {"sqlite": sqlite, "postgresql": postgresql}
+
+US_STATES = {
+    "alabama": "al", "alaska": "ak", "arizona": "az", "arkansas": "ar", "california": "ca",
+    "colorado": "co", "connecticut": "ct", "delaware": "de", "district of columbia": "dc",
+    "florida": "fl", "georgia": "ga", "hawaii": "hi", "idaho": "id", "illinois": "il",
+    "indiana": "in", "iowa": "ia", "kansas": "ks", "kentucky": "ky", "louisiana": "la",
+    "maine": "me", "maryland": "md", "massachusetts": "ma", "michigan": "mi", "minnesota": "mn",
+    "mississippi": "ms", "missouri": "mo", "montana": "mt", "nebraska": "ne", "nevada": "nv",
+    "new hampshire": "nh", "new jersey": "nj", "new mexico": "nm", "new york": "ny",
+    "north carolina": "nc", "north dakota": "nd", "ohio": "oh", "oklahoma": "ok", "oregon": "or",
+    "pennsylvania": "pa", "rhode island": "ri", "south carolina": "sc", "south dakota": "sd",
+    "tennessee": "tn", "texas": "tx", "utah": "ut", "vermont": "vt", "virginia": "va",
+    "washington": "wa", "west virginia": "wv", "wisconsin": "wi", "wyoming": "wy",
+}
+_COUNTRY_SUFFIXES = {"us", "usa", "united states", "united states of america"}
+
+
+def normalize_location(location: str) -> str:
+    """Canonical cache key: lower case, no punctuation, ``city, st`` parts"""
+    parts = []
+    for part in location.casefold().split(","):
+        part = " ".join(re.sub(r"[^\w\s]", " ", part).split())
+        if part:
+            parts.append(part)
+    if len(parts) > 1 and parts[-1] in _COUNTRY_SUFFIXES:
+        parts.pop()
+    if len(parts) > 1:
+        parts[-1] = US_STATES.get(parts[-1], parts[-1])
+    return ", ".join(parts)
+
+
+class Geocoder:
+    """Maps normalized location strings to coordinates.
+
+    Set ``blocking`` for backends that do I/O (e.g. an HTTP service) so
+    the resolver calls them from a worker thread.
+    """
+    blocking = False
+
+    def geocode_many(self, queries: List[str]) -> Dict[str, Optional[Coordinates]]:
+        raise NotImplementedError
+
+
+class GazetteerGeocoder(Geocoder):
+    """In-memory lookup over a ``name,region,latitude,longitude`` CSV.
+
+    A bare place name resolves to the first row with that name, so list
+    larger places first.
+    """
+
+    def __init__(self, path: str = DEFAULT_GAZETTEER):
+        self.places: Dict[str, Coordinates] = {}
+        with open(path, newline="", encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                coordinates = (float(row["latitude"]), float(row["longitude"]))
+                name = normalize_location(row["name"])
+                region = normalize_location(row.get("region") or "")
+                if region:
+                    self.places.setdefault(f"{name}, {US_STATES.get(region, region)}", coordinates)
+                self.places.setdefault(name, coordinates)
+
+    def geocode_many(self, queries: List[str]) -> Dict[str, Optional[Coordinates]]:
+        return {query: self._lookup(query) for query in queries}
+
+    def _lookup(self, query: str) -> Optional[Coordinates]:
+        if query in self.places:
+            return self.places[query]
+        parts = query.split(", ")
+        if len(parts) > 2:
+            # "downtown, austin, tx" -> "austin, tx"
+            return self.places.get(", ".join(parts[-2:]))
+        return None
+
+
+GEOCODERS = {
+    "gazetteer": lambda: GazetteerGeocoder(settings.GAZETTEER_PATH or DEFAULT_GAZETTEER),
+}
+
+
+class LocationResolver:
+    """Geocoder fronted by an in-process LRU and the ``geocode_cache`` table.
+
+    The table is trimmed back to ``max_entries`` in one batch once an
+    approximate row count passes a high-water mark 10% above it, so stores
+    do not count the table each time.
+    """
+
+    def __init__(self, geocoder: Geocoder, memory_size: int = 10000, max_entries: int = 100000):
+        self.geocoder = geocoder
+        self.memory_size = memory_size
+        self.max_entries = max_entries
+        self.high_water = max_entries + max(max_entries // 10, 1)
+        self._memory: "OrderedDict[str, Optional[Coordinates]]" = OrderedDict()
+        # Upper bound on the table size; None until first counted. Other workers' inserts are
+        # only seen at the next recount, which happens on every eviction
+        self._row_count: Optional[int] = None
+        self._touched: Dict[str, float] = {}
+        self._last_touch_flush = time.monotonic()
+
+    async def resolve(self, db: AsyncSession, location: str) -> Optional[Coordinates]:
+        return (await self.resolve_many(db, [location]))[location]
+
+    async def resolve_many(self, db: AsyncSession, locations: Iterable[str]) -> Dict[str, Optional[Coordinates]]:
+        """Coordinates (or None) for each distinct location; commits new cache rows"""
+        keys = {location: normalize_location(location) for location in set(locations)}
+        found: Dict[str, Optional[Coordinates]] = {}
+        for key in set(keys.values()):
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                found[key] = self._memory[key]
+
+        missing = [key for key in set(keys.values()) if key not in found]
+        if missing:
+            cached = await self._load(db, missing)
+            found.update(cached)
+            missing = [key for key in missing if key not in cached]
+        if missing:
+            if self.geocoder.blocking:
+                resolved = await asyncio.to_thread(self.geocoder.geocode_many, missing)
+            else:
+                resolved = self.geocoder.geocode_many(missing)
+            found.update(resolved)
+            await self._store(db, resolved)
+
+        for key, coordinates in found.items():
+            self._remember(key, coordinates)
+        return {location: found[key] for location, key in keys.items()}
+
+    def _remember(self, key: str, coordinates: Optional[Coordinates]) -> None:
+        self._memory[key] = coordinates
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_size:
+            self._memory.popitem(last=False)
+
+    async def _load(self, db: AsyncSession, keys: List[str]) -> Dict[str, Optional[Coordinates]]:
+        table = models.GeocodeCache
+        now = time.time()
+        found = {}
+        for start in range(0, len(keys), _QUERY_CHUNK):
+            rows = await db.execute(
+                select(table.query, table.latitude, table.longitude, table.last_used)
+                .where(table.query.in_(keys[start:start + _QUERY_CHUNK]))
+            )
+            for query, latitude, longitude, last_used in rows:
+                found[query] = None if latitude is None else (latitude, longitude)
+                if last_used < now - _TOUCH_INTERVAL:
+                    self._touched[query] = now
+        if len(self._touched) >= _TOUCH_BATCH or (
+            self._touched and time.monotonic() - self._last_touch_flush >= _TOUCH_FLUSH_INTERVAL
+        ):
+            await self._flush_touched(db)
+            await db.commit()
+        return found
+
+    async def _flush_touched(self, db: AsyncSession) -> None:
+        touched, self._touched = self._touched, {}
+        self._last_touch_flush = time.monotonic()
+        if not touched:
+            return
+        table = models.GeocodeCache
+        queries = list(touched)
+        now = max(touched.values())
+        for start in range(0, len(queries), _QUERY_CHUNK):
+            await db.execute(
+                update(table).where(table.query.in_(queries[start:start + _QUERY_CHUNK])).values(last_used=now)
+            )
+
+    async def _store(self, db: AsyncSession, resolved: Dict[str, Optional[Coordinates]]) -> None:
+        dialect = _UPSERT_DIALECTS.get(db.bind.dialect.name)
+        if dialect is None:
+            raise NotImplementedError(f"The geocode cache needs an upsert-capable database, not {db.bind.dialect.name}")
+        now = time.time()
+        rows = [
+            {
+                "query": query,
+                "latitude": coordinates[0] if coordinates else None,
+                "longitude": coordinates[1] if coordinates else None,
+                "last_used": now,
+            }
+            for query, coordinates in resolved.items()
+        ]
+        # Concurrent requests may geocode the same new location
+        await db.execute(dialect.insert(models.GeocodeCache).on_conflict_do_nothing(), rows)
+        if self._row_count is None:
+            self._row_count = await db.scalar(select(func.count()).select_from(models.GeocodeCache))
+        else:
+            # Conflicting rows were not inserted, so this may overcount
+            self._row_count += len(rows)
+        if self._row_count > self.high_water:
+            # Re-stamp queued hits first so recently used rows survive
+            await self._flush_touched(db)
+            await self._evict(db)
+        await db.commit()
+
+    async def _evict(self, db: AsyncSession) -> None:
+        # Drop the least recently used rows beyond max_entries
+        table = models.GeocodeCache
+        count = await db.scalar(select(func.count()).select_from(table))
+        excess = count - self.max_entries
+        if excess > 0:
+            oldest = select(table.query).order_by(table.last_used, table.query).limit(excess)
+            await db.execute(delete(table).where(table.query.in_(oldest.scalar_subquery())))
+        self._row_count = min(count, self.max_entries)
+
+
+def get_resolver() -> LocationResolver:
+    geocoder = GEOCODERS[settings.GEOCODER]()
+    return LocationResolver(geocoder, settings.GEOCODE_MEMORY_SIZE, settings.GEOCODE_CACHE_SIZE)
+
+
+async def backfill_coordinates(resolver: LocationResolver, batch_size: int = 1000) -> int:
+    """Store resolved coordinates on projects that have none; returns rows updated"""
+    from .database import AsyncSessionLocal
+
+    updated = 0
+    last_id = 0
+    async with AsyncSessionLocal() as db:
+        while True:
+            rows = (await db.execute(
+                select(models.Project.id, models.Project.location)
+                .where(models.Project.latitude.is_(None), models.Project.id > last_id)
+                .order_by(models.Project.id)
+                .limit(batch_size)
+            )).all()
+            if not rows:
+                break
+            last_id = rows[-1].id
+            resolved = await resolver.resolve_many(db, [row.location for row in rows if row.location])
+            changes = [
+                {"id": row.id, "latitude": resolved[row.location][0], "longitude": resolved[row.location][1]}
+                for row in rows if row.location and resolved[row.location]
+            ]
+            if changes:
+                await db.execute(update(models.Project), changes)
+                await db.commit()
+                updated += len(changes)
+    return updated
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Geocode project locations")
+    parser.add_argument("--backfill", action="store_true", help="Resolve coordinates for stored projects without any")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args()
+    if not args.backfill:
+        parser.print_help()
+        return
+
+    async def run():
+        from .database import async_engine
+        try:
+            return await backfill_coordinates(get_resolver(), args.batch_size)
+        finally:
+            await async_engine.dispose()
+
+    updated = asyncio.run(run())
+    print(f"coordinates stored for {updated:,} projects", flush=True)
+
+
+if __name__ == "__main__":
+    main()
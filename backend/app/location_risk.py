@@ -0,0 +1,292 @@
+# app/location_risk.py
+"""Location risk rasters behind schemas.LocationRiskMetrics.
+
+Risk layers are precomputed offline on a regular lat/lon grid from local
+datasets and stored as one memory-mapped float32 array:
+
+    python -m app.location_risk build --out data/risk --epa-dir data/epa \\
+        --air aqi_monitors.csv --water water_samples.csv --ej ejscreen_points.csv
+
+Point datasets are CSVs with ``latitude``, ``longitude`` and ``value``
+(a 0-100 risk) columns. They are averaged per cell. Empty cells take the
+mean of observations within ``--fill-cells`` cells. Facility density
+comes from the EPA facility store. Cells with no data are NaN and read
+back as None.
+
+Scoring a location is then one array index, and scoring many locations
+is a single fancy-indexing operation. After rebuilding the rasters,
+refresh the risks stored on projects with:
+
+    python -m app.location_risk rescore --risk-dir data/risk --epa-dir data/epa
+
+(the directories default to RISK_DATA_DIR and EPA_DATA_DIR).
+"""
+import argparse
+import csv
+import json
+import math
+import os
+import threading
+from typing import Dict, List, Optional
+
+import numpy as np
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session
+
+from . import models
+from .config import settings
+from .epa import KM_PER_DEGREE, FacilityStore, facility_density_score
+
+# Raster layers, in storage order; also the Project columns they are stored in
+RISK_LAYERS = ("air_quality_risk", "water_quality_risk", "facility_density", "environmental_justice_risk")
+
+DEFAULT_CELL_SIZE = 0.25  # degrees
+# lat_min, lat_max, lon_min, lon_max
+WORLD_BOUNDS = (-90.0, 90.0, -180.0, 180.0)
+
+
+class RiskRaster:
+    """Memory-mapped (layers, rows, cols) risk grid"""
+
+    def __init__(self, directory: str):
+        with open(os.path.join(directory, "meta.json")) as f:
+            meta = json.load(f)
+        self.cell_size = meta["cell_size"]
+        self.lat_min = meta["lat_min"]
+        self.lon_min = meta["lon_min"]
+        self.layers = tuple(meta["layers"])
+        self.grid = np.load(os.path.join(directory, "risk.npy"), mmap_mode="r")
+        self.n_rows, self.n_cols = self.grid.shape[1:]
+
+    def lookup(self, latitude: float, longitude: float) -> Optional[Dict[str, Optional[float]]]:
+        """Risk metrics of the cell containing a point; None outside the grid"""
+        row = math.floor((latitude - self.lat_min) / self.cell_size)
+        col = math.floor((longitude - self.lon_min) / self.cell_size)
+        if not (0 <= row < self.n_rows and 0 <= col < self.n_cols):
+            return None
+        return _metrics(self.layers, self.grid[:, row, col])
+
+    def lookup_many(self, latitudes, longitudes) -> np.ndarray:
+        """(n, layers) risks for many points; NaN outside the grid or where unknown"""
+        latitudes = np.asarray(latitudes, dtype=np.float64)
+        longitudes = np.asarray(longitudes, dtype=np.float64)
+        rows = np.floor((latitudes - self.lat_min) / self.cell_size)
+        cols = np.floor((longitudes - self.lon_min) / self.cell_size)
+        inside = (rows >= 0) & (rows < self.n_rows) & (cols >= 0) & (cols < self.n_cols)
+        result = np.full((len(latitudes), len(self.layers)), np.nan, dtype=np.float32)
+        result[inside] = self.grid[:, rows[inside].astype(np.intp), cols[inside].astype(np.intp)].T
+        return result
+
+    def metrics_many(self, coordinates: List[Optional[tuple]]) -> List[Optional[Dict[str, Optional[float]]]]:
+        """lookup() for a list of (lat, lon) pairs, which may contain None"""
+        located = [i for i, point in enumerate(coordinates) if point is not None]
+        results: List[Optional[dict]] = [None] * len(coordinates)
+        if located:
+            points = np.array([coordinates[i] for i in located], dtype=np.float64)
+            for i, values in zip(located, self.lookup_many(points[:, 0], points[:, 1])):
+                results[i] = _metrics(self.layers, values)
+        return results
+
+
+def _metrics(layers, values) -> Optional[Dict[str, Optional[float]]]:
+    # None when the cell has no data at all
+    if np.isnan(values).all():
+        return None
+    return {name: None if np.isnan(value) else round(float(value), 2) for name, value in zip(layers, values)}
+
+
+_raster: Optional[RiskRaster] = None
+_raster_lock = threading.Lock()
+
+
+def get_raster() -> Optional[RiskRaster]:
+    """The raster in settings.RISK_DATA_DIR, mapped on first use; None when not configured"""
+    global _raster
+    if _raster is None and settings.RISK_DATA_DIR:
+        with _raster_lock:
+            if _raster is None:
+                _raster = RiskRaster(settings.RISK_DATA_DIR)
+    return _raster
+
+
+def build_raster(
+    directory: str,
+    point_layers: Dict[str, str],
+    epa_dir: Optional[str] = None,
+    cell_size: float = DEFAULT_CELL_SIZE,
+    bounds=WORLD_BOUNDS,
+    fill_cells: int = 2,
+) -> np.ndarray:
+    """Rasterize the given datasets into ``directory`` and return the grid.
+
+    ``point_layers`` maps layer names to point CSV paths; layers without a
+    source stay NaN.
+    """
+    lat_min, lat_max, lon_min, lon_max = bounds
+    n_rows = int(math.ceil((lat_max - lat_min) / cell_size))
+    n_cols = int(math.ceil((lon_max - lon_min) / cell_size))
+    grid = np.full((len(RISK_LAYERS), n_rows, n_cols), np.nan, dtype=np.float32)
+
+    for name, path in point_layers.items():
+        latitudes, longitudes, values = _read_points(path)
+        sums = _cell_totals(latitudes, longitudes, values, lat_min, lon_min, cell_size, n_rows, n_cols)
+        counts = _cell_totals(latitudes, longitudes, None, lat_min, lon_min, cell_size, n_rows, n_cols)
+        layer = np.full((n_rows, n_cols), np.nan)
+        np.divide(sums, counts, out=layer, where=counts > 0)
+        if fill_cells:
+            near_sums, near_counts = _box_sum(sums, fill_cells), _box_sum(counts, fill_cells)
+            empty = (counts == 0) & (near_counts > 0)
+            layer[empty] = near_sums[empty] / near_counts[empty]
+        grid[RISK_LAYERS.index(name)] = layer
+
+    if epa_dir:
+        grid[RISK_LAYERS.index("facility_density")] = _facility_density_layer(
+            FacilityStore(epa_dir), lat_min, lon_min, cell_size, n_rows, n_cols
+        )
+
+    os.makedirs(directory, exist_ok=True)
+    np.save(os.path.join(directory, "risk.npy"), grid)
+    with open(os.path.join(directory, "meta.json"), "w") as f:
+        json.dump({
+            "cell_size": cell_size,
+            "lat_min": lat_min,
+            "lon_min": lon_min,
+            "layers": list(RISK_LAYERS),
+            "sources": {**point_layers, **({"facility_density": epa_dir} if epa_dir else {})},
+        }, f)
+    return grid
+
+
+def _read_points(path: str):
+    latitudes, longitudes, values = [], [], []
+    with open(path, newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            try:
+                point = float(row["latitude"]), float(row["longitude"]), float(row["value"])
+            except (KeyError, TypeError, ValueError):
+                continue
+            latitudes.append(point[0])
+            longitudes.append(point[1])
+            values.append(point[2])
+    return np.array(latitudes), np.array(longitudes), np.array(values)
+
+
+def _cell_totals(latitudes, longitudes, weights, lat_min, lon_min, cell_size, n_rows, n_cols) -> np.ndarray:
+    # Sum of weights (or number of points) per cell
+    rows = np.floor((latitudes - lat_min) / cell_size)
+    cols = np.floor((longitudes - lon_min) / cell_size)
+    inside = (rows >= 0) & (rows < n_rows) & (cols >= 0) & (cols < n_cols)
+    cells = rows[inside].astype(np.int64) * n_cols + cols[inside].astype(np.int64)
+    totals = np.bincount(cells, weights=None if weights is None else weights[inside], minlength=n_rows * n_cols)
+    return totals.reshape(n_rows, n_cols).astype(np.float64)
+
+
+def _box_sum(grid: np.ndarray, k: int) -> np.ndarray:
+    """Sum over the (2k+1) x (2k+1) window around every cell, via an integral image"""
+    if k == 0:
+        return grid.copy()
+    integral = np.zeros((grid.shape[0] + 2 * k + 1, grid.shape[1] + 2 * k + 1))
+    integral[1:, 1:] = np.pad(grid, k).cumsum(0).cumsum(1)
+    w = 2 * k + 1
+    return integral[w:, w:] - integral[:-w, w:] - integral[w:, :-w] + integral[:-w, :-w]
+
+
+def _facility_density_layer(store: FacilityStore, lat_min, lon_min, cell_size, n_rows, n_cols) -> np.ndarray:
+    # Facilities expected within EPA_SEARCH_RADIUS_KM of a cell, from the facility
+    # count of the surrounding window scaled from window area to search area
+    counts = _cell_totals(
+        np.asarray(store.lat, dtype=np.float64), np.asarray(store.lon, dtype=np.float64), None,
+        lat_min, lon_min, cell_size, n_rows, n_cols,
+    )
+    radius = settings.EPA_SEARCH_RADIUS_KM
+    cell_km = cell_size * KM_PER_DEGREE
+    k = max(int(round(radius / cell_km)), 0)
+    window = _box_sum(counts, k)
+    centers = lat_min + (np.arange(n_rows) + 0.5) * cell_size
+    window_km2 = ((2 * k + 1) * cell_km) ** 2 * np.maximum(np.cos(np.radians(centers)), 1e-6)
+    expected = window * (math.pi * radius ** 2 / window_km2)[:, None]
+    half = settings.EPA_DENSITY_HALF_COUNT
+    return np.where(expected > 0, 100 * expected / (expected + half), 0.0)
+
+
+def rescore_locations(
+    db: Session,
+    raster: Optional[RiskRaster],
+    store: Optional[FacilityStore] = None,
+    chunk_size: int = 5000
+) -> int:
+    """Store raster risks on every project with coordinates; returns rows updated.
+
+    With a facility ``store``, facility_density comes from exact facility
+    counts, as in /projects/analyze, instead of the raster's estimate.
+    Without a raster only facility_density is updated.
+    """
+    updated = 0
+    last_id = 0
+    while True:
+        rows = db.execute(
+            select(models.Project.id, models.Project.latitude, models.Project.longitude)
+            .where(models.Project.latitude.is_not(None), models.Project.id > last_id)
+            .order_by(models.Project.id)
+            .limit(chunk_size)
+        ).all()
+        if not rows:
+            return updated
+        last_id = rows[-1].id
+        latitudes, longitudes = [row.latitude for row in rows], [row.longitude for row in rows]
+        if raster is not None:
+            changes = [
+                {"id": row.id, **(_metrics(raster.layers, values) or dict.fromkeys(raster.layers))}
+                for row, values in zip(rows, raster.lookup_many(latitudes, longitudes))
+            ]
+        else:
+            changes = [{"id": row.id} for row in rows]
+        if store is not None:
+            counts = store.count_within(latitudes, longitudes, settings.EPA_SEARCH_RADIUS_KM)
+            for change, count in zip(changes, counts):
+                change["facility_density"] = facility_density_score(int(count), settings.EPA_DENSITY_HALF_COUNT)
+        db.execute(update(models.Project), changes)
+        db.commit()
+        updated += len(changes)
+
+
+def main():
+    from .database import SessionLocal
+
+    parser = argparse.ArgumentParser(description="Build and apply location risk rasters")
+    subcommands = parser.add_subparsers(dest="command", required=True)
+    build = subcommands.add_parser("build", help="Rasterize local datasets")
+    build.add_argument("--out", required=True, help="Directory to write the raster to (RISK_DATA_DIR)")
+    build.add_argument("--epa-dir", help="EPA facility store for the facility_density layer")
+    build.add_argument("--air", help="Air quality risk points CSV")
+    build.add_argument("--water", help="Water quality risk points CSV")
+    build.add_argument("--ej", help="Environmental justice risk points CSV")
+    build.add_argument("--cell-size", type=float, default=DEFAULT_CELL_SIZE, help="Grid cell size in degrees")
+    build.add_argument("--bounds", type=float, nargs=4, default=WORLD_BOUNDS, metavar=("LAT_MIN", "LAT_MAX", "LON_MIN", "LON_MAX"))
+    build.add_argument("--fill-cells", type=int, default=2, help="Fill empty cells from observations this many cells away")
+    rescore = subcommands.add_parser("rescore", help="Recompute the location risks stored on projects")
+    rescore.add_argument("--risk-dir", help="Risk raster directory (default: RISK_DATA_DIR)")
+    rescore.add_argument("--epa-dir", help="EPA facility store for exact facility_density (default: EPA_DATA_DIR)")
+    args = parser.parse_args()
+
+    if args.command == "build":
+        sources = {"air_quality_risk": args.air, "water_quality_risk": args.water, "environmental_justice_risk": args.ej}
+        grid = build_raster(
+            args.out, {name: path for name, path in sources.items() if path},
+            args.epa_dir, args.cell_size, tuple(args.bounds), args.fill_cells,
+        )
+        print(f"wrote {grid.shape[1]}x{grid.shape[2]} risk raster to {args.out}", flush=True)
+    else:
+        risk_dir = args.risk_dir or settings.RISK_DATA_DIR
+        epa_dir = args.epa_dir or settings.EPA_DATA_DIR
+        if not risk_dir and not epa_dir:
+            parser.error("pass --risk-dir or --epa-dir, or set RISK_DATA_DIR or EPA_DATA_DIR")
+        raster = RiskRaster(risk_dir) if risk_dir else None
+        store = FacilityStore(epa_dir) if epa_dir else None
+        with SessionLocal() as db:
+            updated = rescore_locations(db, raster, store)
+        print(f"location risks stored for {updated:,} projects", flush=True)
+
+
+if __name__ == "__main__":
+    main()
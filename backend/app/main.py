@@ -1,16 +1,69 @@
 # app/main.py
-from fastapi import FastAPI, HTTPException, Depends
+import logging
+import secrets
+import traceback
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException, Depends, Header, Query, Request, Response
+from fastapi.encoders import jsonable_encoder
 from fastapi.middleware.cors import CORSMiddleware
-from sqlalchemy.orm import Session
-from typing import List
-from . import models, schemas
-from .database import SessionLocal, engine
-from .scoring import ESGScorer
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from pydantic import ValidationError
+from sqlalchemy import select
+from sqlalchemy.exc import DBAPIError, IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional, Tuple
+from . import crud, epa, export, location_risk, models, revisions, schemas, stats, whatif
+from .cache import AnalysisCache, analysis_key
+from .config import settings
+from .database import AsyncSessionLocal, async_engine, init_db
+from .geocoding import get_resolver
+from .logging_config import configure_logging, stop_logging
+from .recommendations import get_rules, reload_rules
+from .metrics import TimedRoute, TimingMiddleware, phase, render_metrics
+from .rankings import PeerRankings
+from .scoring import ESGScorer, arrays_from_masks, encode_masks, get_plan, reload_plan
+from .streaming import JSONDocumentError, NDJSONResponse, iter_json_documents
 
-# Create database tables
-models.Base.metadata.create_all(bind=engine)
+configure_logging(settings.LOG_LEVEL, settings.LOG_FORMAT)
+logger = logging.getLogger(__name__)
 
-app = FastAPI(title="ESG Scoring API")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Create tables and warm peer rankings at startup; release the pool at shutdown"""
+    if settings.AUTO_CREATE_TABLES:
+        await init_db()
+    # Already loaded when a preloading server warmed them before forking workers
+    if peer_rankings is not None and not peer_rankings.loaded:
+        async with AsyncSessionLocal() as db:
+            count = await peer_rankings.warm(db)
+        logger.info("Peer rankings loaded", extra={"count": count})
+    yield
+    # Close pooled connections; aiosqlite keeps a worker thread alive per connection
+    await async_engine.dispose()
+    stop_logging()
+
+app = FastAPI(title="ESG Scoring API", lifespan=lifespan)
+# Time validation, handler and serialization phases of every route
+app.router.route_class = TimedRoute
+
+# Compile the scoring plan and rules now so an invalid config file fails startup
+get_plan()
+get_rules()
+scorer = ESGScorer()
+# Map the EPA facility store now rather than on the first request
+epa.get_store()
+location_risk.get_raster()
+resolver = get_resolver()
+
+analysis_cache = AnalysisCache(
+    max_size=settings.ANALYSIS_CACHE_SIZE,
+    ttl=settings.ANALYSIS_CACHE_TTL,
+    path=settings.ANALYSIS_CACHE_PATH,
+    disk_max_size=settings.ANALYSIS_CACHE_DISK_SIZE,
+)
+peer_rankings = (
+    PeerRankings(settings.PEER_NEIGHBORS, settings.PEER_REFRESH_INTERVAL) if settings.PEER_RANKINGS else None
+)
 
 # Configure CORS - Update this with your frontend URL
 origins = [
@@ -26,88 +79,580 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "Server-Timing"],
 )
 
+app.add_middleware(TimingMiddleware, server_timing=settings.ENABLE_SERVER_TIMING)
+
 # Dependency
-def get_db():
-    db = SessionLocal()
-    try:
+async def get_db():
+    async with AsyncSessionLocal() as db:
         yield db
-    finally:
-        db.close()
 
 @app.get("/")
 async def read_root():
     return {"message": "Welcome to the ESG Scoring API"}
 
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Prometheus text-format latency histograms and cache counters for this process"""
+    cache = analysis_cache.stats()
+    counters = "\n".join(
+        f"# TYPE esg_analysis_cache_{name}_total counter\nesg_analysis_cache_{name}_total {cache[name]}"
+        for name in ("hits", "disk_hits", "misses", "evictions")
+    )
+    return render_metrics(counters)
+
 @app.post("/projects/analyze", response_model=schemas.ESGAnalysisResponse)
-async def analyze_project(project: schemas.ProjectCreate):
+async def analyze_project(project: schemas.ProjectCreate, db: AsyncSession = Depends(get_db)):
     try:
-        print("Received project data:", project.dict())  # Debug print
-        
-        # Initialize scorer
-        scorer = ESGScorer()
-        
-        # Calculate scores
-        scores = scorer.calculate_scores(project.surveyResponses)
-        print("Calculated scores:", scores)  # Debug print
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Analyzing project", extra={"project": project.model_dump()})
         
-        # Generate recommendations and risks
-        recommendations = scorer.generate_recommendations(scores)
-        risks = scorer.identify_risks(scores)
+        # Identical surveys for the same project type get identical results
+        plan, rules = scorer.plan, get_rules()
+        version = f"{plan.version}:{rules.version}"
+        analysis_cache.ensure_version(version)
+        key = analysis_key(project.surveyResponses, project.projectType, version)
+        response = await analysis_cache.get(key)
+        if response is not None:
+            return {
+                **response,
+                **await _analysis_peers(db, project, response["scores"]),
+                **await _analysis_location(db, project),
+            }
+
+        with phase("scoring"):
+            # Calculate scores
+            scores = scorer.calculate_scores(project.surveyResponses)
+            metrics = scores
+            if rules.needs_subcategories:
+                metrics = {**scores, **scorer.subcategory_batch([project.surveyResponses])[0]}
+            
+            # Generate recommendations and risks
+            recommendations, risks = rules.evaluate(metrics, project.projectType)
         
         response = {
             "scores": scores,
             "recommendations": recommendations,
             "risks": risks
         }
-        print("Sending response:", response)  # Debug print
+        await analysis_cache.set(key, response)
+        logger.debug("Analysis complete", extra={"scores": scores})
         
-        return response
+        # Rankings and location data depend on more than the survey, so they are not cached
+        return {
+            **response,
+            **await _analysis_peers(db, project, scores),
+            **await _analysis_location(db, project),
+        }
         
     except Exception as e:
-        print(f"Error occurred: {str(e)}")  # Debug print
-        import traceback
-        print(traceback.format_exc())  # Print full traceback
+        logger.exception("Error analyzing project")
         raise HTTPException(
             status_code=500,
             detail=f"An error occurred while analyzing the project: {str(e)}"
         )
 
+async def _resolve_coordinates(db: AsyncSession, projects: List[schemas.ProjectBase]) -> List[Optional[Tuple[float, float]]]:
+    """Given coordinates, or the geocoded location for projects without any"""
+    missing = [project.location for project in projects if project.latitude is None or project.longitude is None]
+    resolved = {}
+    if missing:
+        with phase("geocoding"):
+            resolved = await resolver.resolve_many(db, missing)
+    return [
+        (project.latitude, project.longitude)
+        if project.latitude is not None and project.longitude is not None
+        else resolved[project.location]
+        for project in projects
+    ]
+
+async def _analysis_peers(db: AsyncSession, project: schemas.ProjectBase, scores: dict) -> dict:
+    if peer_rankings is None:
+        return {}
+    await peer_rankings.refresh(db)
+    return _ranking_fields(project, scores)
+
+def _ranking_fields(project: schemas.ProjectBase, scores: dict) -> dict:
+    """rankings of a project's scores among its stored peers"""
+    if peer_rankings is None:
+        return {}
+    with phase("rankings"):
+        rankings = peer_rankings.rank(scores, {"projectType": project.projectType, "location": project.location})
+    return {"rankings": rankings} if rankings else {}
+
+def _has_location_data() -> bool:
+    return epa.get_store() is not None or location_risk.get_raster() is not None
+
+async def _analysis_location(db: AsyncSession, project: schemas.ProjectBase) -> dict:
+    if not _has_location_data():
+        return {}
+    coordinates = (await _resolve_coordinates(db, [project]))[0]
+    return _location_fields(coordinates)
+
+def _location_risks(all_coordinates: list) -> list:
+    """LocationRiskMetrics fields for many sites with one raster lookup.
+
+    With the EPA store loaded, facility_density comes from the exact
+    facility count instead of the raster's gridded estimate, as in
+    location_risk.rescore_locations.
+    """
+    raster = location_risk.get_raster()
+    if raster is None:
+        all_risks = [None] * len(all_coordinates)
+    else:
+        all_risks = raster.metrics_many(all_coordinates)
+    store = epa.get_store()
+    located = [i for i, site in enumerate(all_coordinates) if site is not None]
+    if store is not None and located:
+        with phase("epa"):
+            counts = store.count_within(
+                [all_coordinates[i][0] for i in located],
+                [all_coordinates[i][1] for i in located],
+                settings.EPA_SEARCH_RADIUS_KM,
+            )
+        for i, count in zip(located, counts):
+            all_risks[i] = {
+                **(all_risks[i] or {}),
+                "facility_density": epa.facility_density_score(int(count), settings.EPA_DENSITY_HALF_COUNT),
+            }
+    return all_risks
+
+def _location_fields(coordinates: Optional[Tuple[float, float]], risks: Optional[dict] = None) -> dict:
+    """epa_data and location_risks for a site, from local datasets"""
+    if coordinates is None:
+        return {}
+    fields = {}
+    if risks is None:
+        risks = _location_risks([coordinates])[0]
+    if risks is not None:
+        fields["location_risks"] = dict(risks)
+
+    store = epa.get_store()
+    if store is not None:
+        with phase("epa"):
+            fields["epa_data"] = epa.environmental_data(
+                store, coordinates[0], coordinates[1],
+                settings.EPA_SEARCH_RADIUS_KM, settings.EPA_MAX_FACILITIES,
+            )
+    return fields
+
+def require_admin(x_admin_token: Optional[str] = Header(None)) -> None:
+    """Dependency for /admin endpoints: the X-Admin-Token header must match ADMIN_TOKEN"""
+    if not settings.ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Admin endpoints are disabled; set ADMIN_TOKEN to enable them")
+    if x_admin_token is None or not secrets.compare_digest(x_admin_token, settings.ADMIN_TOKEN):
+        raise HTTPException(status_code=401, detail="Invalid admin token")
+
+@app.post("/admin/scoring/reload", dependencies=[Depends(require_admin)])
+async def reload_scoring_config():
+    """Re-read SCORING_CONFIG_PATH and RECOMMENDATION_RULES_PATH without a restart.
+
+    This reloads the worker serving the request at once. Every other
+    worker notices the edited files by itself within CONFIG_CHECK_INTERVAL
+    seconds.
+    """
+    previous = scorer.plan.version
+    try:
+        plan = reload_plan()
+    except (OSError, ValueError, KeyError) as e:
+        raise HTTPException(status_code=400, detail=f"Scoring config not reloaded: {e}")
+    try:
+        rules = reload_rules()
+    except (OSError, ValueError, KeyError) as e:
+        raise HTTPException(status_code=400, detail=f"Scoring weights reloaded, rules not reloaded: {e}")
+    return {"version": plan.version, "previous_version": previous, "rules_version": rules.version}
+
+@app.get("/cache/stats")
+async def cache_stats():
+    """Hit/miss counters for the /projects/analyze result cache"""
+    return analysis_cache.stats()
+
+@app.post("/projects/analyze/bulk", response_class=NDJSONResponse)
+async def analyze_projects_bulk(
+    request: Request,
+    chunk_size: int = Query(settings.BULK_CHUNK_SIZE, ge=1, le=10000)
+):
+    """Analyze an NDJSON stream (or JSON array) of projects.
+
+    Results are streamed back as NDJSON ``BulkAnalysisRecord`` lines while the
+    body is still being read. Invalid lines are reported inline.
+    """
+    async def results():
+        pending = []
+        # Only opens a connection to geocode locations or refresh peer rankings
+        async with AsyncSessionLocal() as db:
+            async for index, document in iter_json_documents(request.stream()):
+                try:
+                    if isinstance(document, JSONDocumentError):
+                        raise document
+                    project = schemas.ProjectCreate.model_validate(document)
+                except (JSONDocumentError, ValidationError) as e:
+                    name = document.get("projectName") if isinstance(document, dict) else None
+                    record = schemas.BulkAnalysisRecord(index=index, projectName=name, error=str(e))
+                    yield record.model_dump_json(exclude_none=True) + "\n"
+                    continue
+
+                pending.append((index, project))
+                if len(pending) >= chunk_size:
+                    yield await _analyze_located_chunk(db, pending)
+                    pending = []
+
+            if pending:
+                yield await _analyze_located_chunk(db, pending)
+
+    return NDJSONResponse(results())
+
+async def _analyze_located_chunk(db: AsyncSession, chunk: list) -> str:
+    if peer_rankings is not None:
+        await peer_rankings.refresh(db)
+    if not _has_location_data():
+        return _analyze_chunk(chunk)
+    return _analyze_chunk(chunk, await _resolve_coordinates(db, [project for _, project in chunk]))
+
+def _analyze_chunk(chunk: list, coordinates: Optional[list] = None) -> str:
+    """Score a chunk of (index, project) pairs and render them as NDJSON lines"""
+    coordinates = coordinates or [None] * len(chunk)
+    all_risks = _location_risks(coordinates)
+    try:
+        all_scores = scorer.score_batch([project.surveyResponses for _, project in chunk])
+    except ValueError:
+        # A malformed question id fails the whole batch; score one by one to isolate it
+        logger.debug("Bulk chunk failed to score, isolating bad projects", extra={"count": len(chunk)})
+        all_scores = [_try_calculate_scores(project.surveyResponses) for _, project in chunk]
+
+    # Rules for every scored project at once
+    rules = get_rules()
+    scored = [i for i, scores in enumerate(all_scores) if not isinstance(scores, Exception)]
+    metrics = [all_scores[i] for i in scored]
+    if rules.needs_subcategories:
+        subcategories = scorer.subcategory_batch([chunk[i][1].surveyResponses for i in scored])
+        metrics = [{**scores, **extra} for scores, extra in zip(metrics, subcategories)]
+    findings = dict(zip(scored, rules.evaluate_batch(metrics, [chunk[i][1].projectType for i in scored])))
+
+    lines = []
+    for i, ((index, project), scores, site, risks) in enumerate(zip(chunk, all_scores, coordinates, all_risks)):
+        if isinstance(scores, Exception):
+            record = schemas.BulkAnalysisRecord(index=index, projectName=project.projectName, error=str(scores))
+        else:
+            record = schemas.BulkAnalysisRecord(
+                index=index,
+                projectName=project.projectName,
+                result=schemas.ESGAnalysisResponse(
+                    scores=scores,
+                    recommendations=findings[i][0],
+                    risks=findings[i][1],
+                    **_ranking_fields(project, scores),
+                    **_location_fields(site, risks)
+                )
+            )
+        lines.append(record.model_dump_json(exclude_none=True) + "\n")
+    return "".join(lines)
+
+def _try_calculate_scores(survey_responses: dict):
+    # score_batch rather than calculate_scores, which logs a warning per failure;
+    # the error is reported on the project's result line instead
+    try:
+        return scorer.score_batch([survey_responses])[0]
+    except ValueError as e:
+        return e
+
 @app.post("/projects/", response_model=schemas.ProjectResponse)
-async def create_project(project: schemas.ProjectCreate, db: Session = Depends(get_db)):
+async def create_project(project: schemas.ProjectCreate, db: AsyncSession = Depends(get_db)):
+    """Store a project, or a new revision of the stored project with the same name and location.
+
+    Resubmitting an unchanged project stores nothing and returns it as is.
+    """
     try:
-        scorer = ESGScorer()
-        scores = scorer.calculate_scores(project.surveyResponses)
-        
-        db_project = models.Project(
-            projectName=project.projectName,
-            location=project.location,
-            projectType=project.projectType,
-            surveyResponses=project.surveyResponses,
-            standard_esg_score=scores.get("standard_esg", 0),
-            european_esg_score=scores.get("european_esg", 0),
-            us_esg_score=scores.get("us_esg", 0),
-            community_engagement_score=scores.get("community_engagement", 0),
-            total_esg_score=scores.get("total", 0)
-        )
-        
-        db.add(db_project)
-        db.commit()
-        db.refresh(db_project)
-        return db_project
+        project_id = (await _store_projects(db, [project], 1))[0]
+        with phase("db"):
+            return await db.get(models.Project, project_id)
+    except IntegrityError:
+        await db.rollback()
+        raise HTTPException(status_code=409, detail=CONFLICT_DETAIL)
+    except Exception as e:
+        logger.exception("Error creating project")
+        await db.rollback()
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/projects/bulk", response_model=schemas.BulkCreateResponse)
+async def create_projects_bulk(
+    projects: List[schemas.ProjectCreate],
+    chunk_size: int = Query(settings.BULK_CHUNK_SIZE, ge=1, le=10000),
+    db: AsyncSession = Depends(get_db)
+):
+    """Score and store many projects, committing once per chunk.
+
+    Projects already stored under the same name and location are revised,
+    as with ``POST /projects/``.
+    """
+    try:
+        ids = await _store_projects(db, projects, chunk_size)
+        logger.info("Stored project batch", extra={"count": len(ids), "chunk_size": chunk_size})
+        return {"ids": ids, "count": len(ids)}
+    except IntegrityError:
+        await db.rollback()
+        raise HTTPException(status_code=409, detail=CONFLICT_DETAIL)
     except Exception as e:
-        db.rollback()
+        logger.exception("Error storing project batch")
+        await db.rollback()
         raise HTTPException(status_code=500, detail=str(e))
 
+# Concurrent resubmissions of one project each take a turn, so allow a few
+UPSERT_ATTEMPTS = 3
+CONFLICT_DETAIL = "Project was revised by another request at the same time; retry"
+
+async def _store_projects(db: AsyncSession, projects: List[schemas.ProjectCreate], chunk_size: int) -> List[int]:
+    """Create or revise projects (see app.revisions); returns their ids in input order.
+
+    A write that conflicts with another writer of the same project raises
+    IntegrityError. The batch is then retried against the rows stored by
+    then, which turns the chunks already written into no-ops. The last
+    attempt's IntegrityError is raised.
+    """
+    for attempt in range(UPSERT_ATTEMPTS):
+        try:
+            return await _upsert_projects(db, projects, chunk_size)
+        except DBAPIError as error:
+            # aiosqlite leaves the failed statement's cursor open, reachable only
+            # from the traceback. Left to the garbage collector, it would be closed
+            # on the event loop thread while its pooled connection waits on another
+            # writer's lock, blocking every request until the busy timeout.
+            traceback.clear_frames(error.__traceback__)
+            await db.rollback()
+            if not isinstance(error, IntegrityError) or attempt == UPSERT_ATTEMPTS - 1:
+                raise
+            logger.info("Project upsert conflicted with another writer, retrying")
+
+async def _upsert_projects(db: AsyncSession, projects: List[schemas.ProjectCreate], chunk_size: int) -> List[int]:
+    keys = [crud.identity_key(project.projectName, project.location) for project in projects]
+    with phase("db"):
+        current = await revisions.current_rows(db, keys)
+        # Do not hold the read snapshot open until the writes; SQLite cannot upgrade a stale one
+        await db.commit()
+    with phase("scoring"):
+        all_scores = revisions.score_surveys(
+            scorer, [encode_masks(project.surveyResponses) for project in projects], current.values()
+        )
+    all_coordinates = await _resolve_coordinates(db, projects)
+    all_risks = _location_risks(all_coordinates)
+    rows = [
+        crud.project_row(project, scores, scorer.plan.version, coordinates, risks)
+        for project, scores, coordinates, risks in zip(projects, all_scores, all_coordinates, all_risks)
+    ]
+    with phase("db"):
+        result = await revisions.upsert_projects(db, rows, current, chunk_size)
+    if peer_rankings is not None:
+        peer_rankings.add(result.inserted)
+        peer_rankings.revise(result.revised)
+    return result.ids
+
 @app.get("/projects/", response_model=List[schemas.ProjectResponse])
-async def list_projects(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    projects = db.query(models.Project).offset(skip).limit(limit).all()
-    return projects
+async def list_projects(
+    response: Response,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = Query(None, description="Value of X-Next-Cursor from the previous page"),
+    fields: Optional[str] = Query(None, description="Comma-separated columns to return"),
+    projectType: Optional[str] = None,
+    location: Optional[str] = None,
+    min_score: Optional[float] = Query(None, description="Minimum total ESG score"),
+    max_score: Optional[float] = Query(None, description="Maximum total ESG score"),
+    answer: List[str] = Query([], description="Survey answer filters such as 16:B; repeat to combine"),
+    sort: str = Query("created_at", description="created_at or total_esg_score, prefix with - for descending"),
+    db: AsyncSession = Depends(get_db)
+):
+    """List projects page by page.
+
+    Pass the X-Next-Cursor response header back as ``cursor`` to continue
+    from the last row instead of paying for a deep ``skip``. ``fields``
+    loads only the named columns, so list views can skip the survey blob.
+    """
+    try:
+        sort_name, _ = crud.parse_sort(sort)
+        names = _parse_fields(fields) if fields else None
+        columns = crud.field_columns(names) if names else [models.Project]
+        statement = select(*columns, crud.SORT_COLUMNS[sort_name].label("sort_value"))
+        statement = crud.filter_projects(
+            statement, projectType, location, min_score, max_score, crud.parse_answers(answer)
+        )
+        statement = crud.keyset_page(statement, sort, cursor, limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if cursor is None and skip:
+        statement = statement.offset(skip)
+
+    with phase("db"):
+        rows = (await db.execute(statement)).all()
+    if limit > 0 and len(rows) == limit:
+        next_cursor = crud.encode_cursor(rows[-1].sort_value, rows[-1].id if names else rows[-1][0].id)
+        response.headers["X-Next-Cursor"] = next_cursor
+
+    if names is None:
+        return [row[0] for row in rows]
+    items = [crud.field_values(row, names) for row in rows]
+    return JSONResponse(jsonable_encoder(items), headers=dict(response.headers))
+
+def _parse_fields(fields: str) -> list:
+    names = [name.strip() for name in fields.split(",") if name.strip()]
+    unknown = [name for name in names if name not in crud.PROJECT_FIELDS and name not in crud.DERIVED_FIELDS]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+    # The id is always returned so rows can be fetched in full later
+    return ["id"] + [name for name in names if name != "id"]
+
+@app.get("/projects/stats", response_model=schemas.PortfolioStats)
+async def project_stats(
+    group_by: str = Query("all", description="all, projectType or location"),
+    percentiles: str = Query("25,50,75,90", description="Comma-separated percentiles"),
+    db: AsyncSession = Depends(get_db)
+):
+    """Score statistics per group from the incrementally maintained rollups.
+
+    Means are exact; percentiles are interpolated within 10-point buckets.
+    """
+    group_by, points = _parse_stats_params(group_by, percentiles)
+    with phase("db"):
+        groups = await stats.rollup_stats(db, group_by, points)
+    return {"group_by": group_by, "approximate": True, "groups": groups}
+
+@app.get("/projects/stats/exact", response_model=schemas.PortfolioStats)
+async def project_stats_exact(
+    group_by: str = Query("all", description="all, projectType or location"),
+    percentiles: str = Query("25,50,75,90", description="Comma-separated percentiles"),
+    db: AsyncSession = Depends(get_db)
+):
+    """Exact score statistics per group, aggregated over all projects in SQL"""
+    group_by, points = _parse_stats_params(group_by, percentiles)
+    with phase("db"):
+        groups = await stats.exact_stats(db, group_by, points)
+    return {"group_by": group_by, "approximate": False, "groups": groups}
+
+def _parse_stats_params(group_by: str, percentiles: str):
+    if group_by not in crud.DIMENSIONS:
+        raise HTTPException(status_code=400, detail=f"group_by must be one of {', '.join(crud.DIMENSIONS)}")
+    try:
+        points = sorted({int(p) for p in percentiles.split(",") if p.strip()})
+    except ValueError:
+        raise HTTPException(status_code=400, detail="percentiles must be integers")
+    if any(not 0 <= p <= 100 for p in points):
+        raise HTTPException(status_code=400, detail="percentiles must be between 0 and 100")
+    return group_by, points
+
+@app.get("/projects/export")
+async def export_projects(
+    format: str = Query("csv", description="csv, parquet or arrow (Arrow IPC stream)"),
+    columns: Optional[str] = Query(None, description="Comma-separated columns; 'answers' adds q1..q35"),
+    projectType: Optional[str] = None,
+    location: Optional[str] = None,
+    min_score: Optional[float] = Query(None, description="Minimum total ESG score"),
+    max_score: Optional[float] = Query(None, description="Maximum total ESG score"),
+    answer: List[str] = Query([], description="Survey answer filters such as 16:B; repeat to combine"),
+    batch_size: int = Query(export.DEFAULT_BATCH_SIZE, ge=1, le=100000)
+):
+    """Stream every matching project, in id order, as a file download.
+
+    Rows are read through a server-side cursor and encoded batch by batch,
+    so exports of any size run in bounded memory.
+    """
+    try:
+        fields = export.parse_columns(columns)
+        statement = export.export_statement(
+            fields,
+            project_type=projectType,
+            location=location,
+            min_score=min_score,
+            max_score=max_score,
+            answers=crud.parse_answers(answer),
+        )
+        encoder = export.make_encoder(format, export.output_columns(fields))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    async def chunks():
+        async with AsyncSessionLocal() as db:
+            async for chunk in export.stream_export(db, statement, fields, encoder, batch_size):
+                if chunk:
+                    yield chunk
+
+    filename = f"projects.{encoder.extension}"
+    return StreamingResponse(
+        chunks(),
+        media_type=encoder.media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+@app.post("/projects/{project_id}/whatif", response_model=schemas.WhatIfResponse)
+async def project_whatif(
+    project_id: int,
+    answers: int = Query(3, ge=1, le=10, description="Questions changed per plan"),
+    top: int = Query(5, ge=1, le=50, description="Number of plans to return"),
+    target: str = Query("total", description="Score to rank by: total or a category"),
+    db: AsyncSession = Depends(get_db)
+):
+    """Rank the answers that would raise a stored project's scores.
+
+    ``actions`` lists every question not yet answered 'A' with the score
+    change of answering it 'A'; ``plans`` the best sets of ``answers``
+    such changes.
+    """
+    with phase("db"):
+        row = (await db.execute(
+            select(models.Project.survey_answered, models.Project.survey_yes).where(models.Project.id == project_id)
+        )).first()
+    if row is None:
+        raise HTTPException(status_code=404, detail="Project not found")
+
+    plan = scorer.plan
+    fields = plan.categories + ("total",)
+    if target not in fields:
+        raise HTTPException(status_code=400, detail=f"target must be one of {', '.join(fields)}")
+    column = fields.index(target)
+
+    with phase("scoring"):
+        yes, answered = (array[0] for array in arrays_from_masks(row.survey_answered, row.survey_yes))
+        scores = scorer.score_masks([row.survey_answered], [row.survey_yes])[0]
+        actions = whatif.single_flips(scorer, yes, answered, column, plan)
+        plans = whatif.best_plans(scorer, yes, answered, answers, top, column, plan)
+    return {"project_id": project_id, "target": target, "scores": scores, "actions": actions, "plans": plans}
+
+@app.get("/projects/{project_id}/history", response_model=schemas.ProjectHistory)
+async def project_history(
+    project_id: int,
+    answers: bool = Query(False, description="Rebuild every version's full survey answers"),
+    db: AsyncSession = Depends(get_db)
+):
+    """Every stored version of a project with its scores and changed answers, oldest first"""
+    with phase("db"):
+        found = await revisions.project_versions(db, project_id, answers=answers)
+    if found is None:
+        raise HTTPException(status_code=404, detail="Project not found")
+    project, versions = found
+    return {
+        "project_id": project.id,
+        "projectName": project.projectName,
+        "location": project.location,
+        "revision": project.revision,
+        "versions": versions,
+    }
+
+@app.get("/projects/{project_id}/versions/{revision}", response_model=schemas.ProjectVersion)
+async def project_version(project_id: int, revision: int, db: AsyncSession = Depends(get_db)):
+    """One version of a project with its full survey answers"""
+    with phase("db"):
+        found = await revisions.project_versions(db, project_id, oldest=revision, answers=True)
+    if found is None:
+        raise HTTPException(status_code=404, detail="Project not found")
+    versions = found[1]
+    if revision < 1 or not versions:
+        raise HTTPException(status_code=404, detail="Version not found")
+    return versions[0]
 
 @app.get("/projects/{project_id}", response_model=schemas.ProjectResponse)
-async def get_project(project_id: int, db: Session = Depends(get_db)):
-    project = db.query(models.Project).filter(models.Project.id == project_id).first()
+async def get_project(project_id: int, db: AsyncSession = Depends(get_db)):
+    with phase("db"):
+        project = await db.get(models.Project, project_id)
     if project is None:
         raise HTTPException(status_code=404, detail="Project not found")
     return project
\ No newline at end of file
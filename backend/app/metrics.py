@@ -0,0 +1,205 @@
+# app/metrics.py
+"""Request timing and a Prometheus text-format metrics registry.
+
+``TimingMiddleware`` records per-route latency histograms. ``TimedRoute``
+splits each request into request validation, the endpoint itself and
+response serialization. Handlers mark finer phases with ``phase("db")`` or
+``phase("scoring")``. Metrics are per process.
+"""
+import asyncio
+import functools
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Optional, Tuple
+
+from fastapi.routing import APIRoute
+
+# Upper bounds in seconds, as in the Prometheus client defaults plus a few sub-millisecond buckets
+LATENCY_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+
+# Phase durations (seconds) of the request being handled
+_timings: ContextVar[Optional[Dict[str, float]]] = ContextVar("request_timings", default=None)
+
+
+class Histogram:
+    """Cumulative-bucket histogram keyed by a tuple of label values"""
+
+    def __init__(self, name: str, help_text: str, label_names: Tuple[str, ...], buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self.buckets = buckets
+        self._series: Dict[tuple, list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, labels: tuple, value: float) -> None:
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                # one counter per bucket, then +Inf, sum
+                series = self._series[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+                    break
+            else:
+                series[len(self.buckets)] += 1
+            series[-1] += value
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = sorted((labels, list(series)) for labels, series in self._series.items())
+        for labels, series in items:
+            label_text = ",".join(f'{name}="{_escape(value)}"' for name, value in zip(self.label_names, labels))
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), series):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f'{self.name}_bucket{{{label_text},le="{le}"}} {cumulative}')
+            lines.append(f"{self.name}_sum{{{label_text}}} {series[-1]}")
+            lines.append(f"{self.name}_count{{{label_text}}} {cumulative}")
+        return "\n".join(lines)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+REQUEST_LATENCY = Histogram(
+    "esg_http_request_duration_seconds",
+    "HTTP request latency by route",
+    ("method", "route", "status"),
+)
+PHASE_LATENCY = Histogram(
+    "esg_http_request_phase_duration_seconds",
+    "Time spent in each phase of a request",
+    ("route", "phase"),
+)
+
+
+def record_phase(name: str, seconds: float) -> None:
+    """Add time to a phase of the current request, if one is being timed"""
+    timings = _timings.get()
+    if timings is not None:
+        timings[name] = timings.get(name, 0.0) + seconds
+
+
+@contextmanager
+def phase(name: str):
+    """Time a block as part of the current request, e.g. ``with phase("db"):``"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_phase(name, time.perf_counter() - start)
+
+
+class TimedRoute(APIRoute):
+    """APIRoute that times request validation, the endpoint and response serialization"""
+
+    def __init__(self, path: str, endpoint, **kwargs):
+        super().__init__(path, _timed_endpoint(endpoint), **kwargs)
+
+    def get_route_handler(self):
+        handler = super().get_route_handler()
+
+        async def timed_handler(request):
+            start = time.perf_counter()
+            response = await handler(request)
+            timings = _timings.get()
+            if timings is not None and "_endpoint_end" in timings:
+                timings["validation"] = timings.pop("_endpoint_start") - start
+                timings["serialization"] = time.perf_counter() - timings.pop("_endpoint_end")
+            return response
+
+        return timed_handler
+
+
+def _timed_endpoint(endpoint):
+    # functools.wraps keeps the signature FastAPI reads dependencies from
+    if asyncio.iscoroutinefunction(endpoint):
+        @functools.wraps(endpoint)
+        async def wrapper(*args, **kwargs):
+            _mark("_endpoint_start")
+            try:
+                return await endpoint(*args, **kwargs)
+            finally:
+                _mark_endpoint_end()
+    else:
+        @functools.wraps(endpoint)
+        def wrapper(*args, **kwargs):
+            _mark("_endpoint_start")
+            try:
+                return endpoint(*args, **kwargs)
+            finally:
+                _mark_endpoint_end()
+    return wrapper
+
+
+def _mark(key: str) -> None:
+    timings = _timings.get()
+    if timings is not None:
+        timings[key] = time.perf_counter()
+
+
+def _mark_endpoint_end() -> None:
+    timings = _timings.get()
+    if timings is not None and "_endpoint_start" in timings:
+        now = time.perf_counter()
+        timings["_endpoint_end"] = now
+        timings["handler"] = now - timings["_endpoint_start"]
+
+
+class TimingMiddleware:
+    """ASGI middleware recording request latency and, optionally, a Server-Timing header"""
+
+    def __init__(self, app, server_timing: bool = False):
+        self.app = app
+        self.server_timing = server_timing
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timings: Dict[str, float] = {}
+        token = _timings.set(timings)
+        start = time.perf_counter()
+        status = 500
+
+        async def send_with_timing(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if self.server_timing:
+                    header = _server_timing_header(timings, time.perf_counter() - start)
+                    message["headers"] = list(message.get("headers", [])) + [(b"server-timing", header.encode())]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            elapsed = time.perf_counter() - start
+            _timings.reset(token)
+            route = scope.get("route")
+            route_path = getattr(route, "path", "unmatched")
+            REQUEST_LATENCY.observe((scope["method"], route_path, str(status)), elapsed)
+            for name, seconds in timings.items():
+                if not name.startswith("_"):
+                    PHASE_LATENCY.observe((route_path, name), seconds)
+
+
+def _server_timing_header(timings: Dict[str, float], total: float) -> str:
+    entries = [f"{name};dur={seconds * 1000:.3f}" for name, seconds in timings.items() if not name.startswith("_")]
+    entries.append(f"total;dur={total * 1000:.3f}")
+    return ", ".join(entries)
+
+
+def render_metrics(*extra: str) -> str:
+    """Prometheus text exposition of all registered metrics"""
+    return "\n".join((REQUEST_LATENCY.render(), PHASE_LATENCY.render()) + extra) + "\n"
@@ -1,7 +1,18 @@
 # app/models.py
-from sqlalchemy import Column, Integer, String, Float, JSON, DateTime
+from sqlalchemy import BigInteger, Column, ForeignKey, Integer, String, Float, DateTime, Index, PrimaryKeyConstraint
+from sqlalchemy.dialects import sqlite
 from sqlalchemy.sql import func
 from .database import Base
+from .scoring import decode_masks, encode_masks
+
+# SQLite stores CURRENT_TIMESTAMP without microseconds; bind datetimes in the same
+# format so keyset comparisons against server-generated values line up
+Timestamp = DateTime(timezone=True).with_variant(
+    sqlite.DATETIME(
+        storage_format="%(year)04d-%(month)02d-%(day)02d %(hour)02d:%(minute)02d:%(second)02d"
+    ),
+    "sqlite",
+)
 
 class Project(Base):
     __tablename__ = "projects"
@@ -10,13 +21,126 @@ class Project(Base):
     projectName = Column(String, index=True)
     location = Column(String)
     projectType = Column(String)
-    surveyResponses = Column(JSON)
+    # Normalized projectName and location (crud.identity_key) that resubmissions
+    # are matched on; null for duplicates stored before projects were upserted
+    identity_key = Column(String)
+    # Number of the version held in this row; older versions are in project_revisions
+    revision = Column(Integer, nullable=False, default=1, server_default="1")
+    # Survey answers as bitmasks: bit q - 1 is set in survey_answered when question q
+    # was answered and in survey_yes when the answer was 'A'
+    survey_answered = Column(BigInteger, nullable=False, default=0, server_default="0")
+    survey_yes = Column(BigInteger, nullable=False, default=0, server_default="0")
+    # Site coordinates, given with the project or geocoded from location when stored
+    latitude = Column(Float)
+    longitude = Column(Float)
+    # Location risks (0-100) looked up from the risk rasters for those coordinates
+    air_quality_risk = Column(Float)
+    water_quality_risk = Column(Float)
+    facility_density = Column(Float)
+    environmental_justice_risk = Column(Float)
 
     standard_esg_score = Column(Float)
     european_esg_score = Column(Float)
     us_esg_score = Column(Float)
     community_engagement_score = Column(Float)
     total_esg_score = Column(Float)
+    # Version of the scoring weights the stored scores were computed with
+    scoring_version = Column(String, index=True)
 
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    created_at = Column(Timestamp, server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+
+    # Keyset pagination: the default (created_at, id) order, the same order within
+    # each filter, and score-sorted pages
+    __table_args__ = (
+        Index("ix_projects_created_at_id", "created_at", "id"),
+        Index("ix_projects_type_created_at_id", "projectType", "created_at", "id"),
+        Index("ix_projects_location_created_at_id", "location", "created_at", "id"),
+        Index("ix_projects_total_score_id", "total_esg_score", "id"),
+        Index("ix_projects_identity_key", "identity_key", unique=True),
+    )
+
+    @property
+    def surveyResponses(self) -> dict:
+        return decode_masks(self.survey_answered or 0, self.survey_yes or 0)
+
+    @surveyResponses.setter
+    def surveyResponses(self, survey_responses: dict) -> None:
+        self.survey_answered, self.survey_yes = encode_masks(survey_responses)
+
+    @property
+    def location_risks(self):
+        risks = {
+            "air_quality_risk": self.air_quality_risk,
+            "water_quality_risk": self.water_quality_risk,
+            "facility_density": self.facility_density,
+            "environmental_justice_risk": self.environmental_justice_risk,
+        }
+        return risks if any(value is not None for value in risks.values()) else None
+
+
+class ProjectRevision(Base):
+    """A superseded version of a project, stored as a reverse delta.
+
+    The projects row always holds the latest version in full. Each older
+    version keeps its scores and the XOR of its answer bitmasks with the
+    next version's, so version n is rebuilt by XOR-ing the deltas of
+    revisions n and later into the current masks.
+    """
+    __tablename__ = "project_revisions"
+
+    id = Column(Integer, primary_key=True)
+    project_id = Column(Integer, ForeignKey("projects.id", ondelete="CASCADE"), nullable=False)
+    revision = Column(Integer, nullable=False)
+    projectType = Column(String)
+    answered_delta = Column(BigInteger, nullable=False)
+    yes_delta = Column(BigInteger, nullable=False)
+
+    standard_esg_score = Column(Float)
+    european_esg_score = Column(Float)
+    us_esg_score = Column(Float)
+    community_engagement_score = Column(Float)
+    total_esg_score = Column(Float)
+    scoring_version = Column(String)
+    # When this version was submitted
+    submitted_at = Column(Timestamp)
+
+    __table_args__ = (
+        Index("ix_project_revisions_project_revision", "project_id", "revision", unique=True),
+    )
+
+
+class ScoreRollup(Base):
+    """Per-group score histograms, kept up to date as projects are inserted.
+
+    One row per (dimension, group value, score category, 10-point bucket).
+    ``dimension`` is a Project column name such as ``projectType``, or
+    ``all`` for the whole portfolio.
+    """
+    __tablename__ = "score_rollups"
+
+    dimension = Column(String, nullable=False)
+    group_value = Column(String, nullable=False)
+    category = Column(String, nullable=False)
+    bucket = Column(Integer, nullable=False)
+    count = Column(Integer, nullable=False, default=0)
+    score_sum = Column(Float, nullable=False, default=0)
+    score_sq_sum = Column(Float, nullable=False, default=0)
+
+    __table_args__ = (
+        PrimaryKeyConstraint("dimension", "group_value", "category", "bucket"),
+    )
+
+
+class GeocodeCache(Base):
+    """Geocoding results by normalized location string.
+
+    Unresolvable locations are cached too, with null coordinates.
+    ``last_used`` (epoch seconds) drives least-recently-used eviction.
+    """
+    __tablename__ = "geocode_cache"
+
+    query = Column(String, primary_key=True)
+    latitude = Column(Float)
+    longitude = Column(Float)
+    last_used = Column(Float, nullable=False, index=True)
@@ -0,0 +1,348 @@
+# app/rankings.py
+"""Percentile ranks of scores among peer projects.
+
+Peers are the stored projects sharing a projectType or a location. For
+every (dimension, group, category) the peer scores are kept in a
+ScoreIndex: a sorted int64 array plus small sorted lists of pending
+additions and removals that are merged into the array in bulk. A rank or
+neighbour lookup is a ``searchsorted`` on the array and a bisect on each
+list, so it costs O(log n).
+
+The index lives in process memory. It is warmed from the projects table
+at startup, updated with the projects this process stores or revises, and
+picks up projects stored or revised by other processes every
+PEER_REFRESH_INTERVAL seconds. ``python -m app.rescore`` rewrites scores in
+place without revisions, so refresh also counts the rows whose
+scoring_version differs from the active plan and re-warms once that count
+has changed and then held steady for one interval. Set PEER_RANKINGS=false
+in the environment to skip the index and leave rankings out of analyses.
+"""
+import time
+from bisect import bisect_left, insort
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import func, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from . import models
+from .crud import SCORE_COLUMNS
+from .scoring import get_plan
+
+PEER_DIMENSIONS = ("projectType", "location")
+
+# Keys pack (score in hundredths, project id) into one int64, so ties
+# between equal scores are broken by id and every key is unique
+_ID_BITS = 32
+_ID_MASK = (1 << _ID_BITS) - 1
+
+_LOAD_CHUNK = 50000
+
+
+def _centis(score: float) -> int:
+    return max(int(round(score * 100)), 0)
+
+
+def score_key(score: float, project_id: int = 0) -> int:
+    return (_centis(score) << _ID_BITS) | project_id
+
+
+def _split_key(key: int) -> Tuple[int, float]:
+    return key & _ID_MASK, (key >> _ID_BITS) / 100
+
+
+class ScoreIndex:
+    """Sorted multiset of score keys with O(log n) rank queries"""
+
+    # Pending changes are folded into the array once either list grows this long
+    MERGE_SIZE = 2048
+
+    __slots__ = ("keys", "added", "removed")
+
+    def __init__(self, keys: Optional[np.ndarray] = None):
+        self.keys = np.sort(keys) if keys is not None else np.empty(0, dtype=np.int64)
+        self.added: List[int] = []
+        self.removed: List[int] = []
+
+    def __len__(self) -> int:
+        return len(self.keys) + len(self.added) - len(self.removed)
+
+    def __contains__(self, key: int) -> bool:
+        return self.count_below(key + 1) > self.count_below(key)
+
+    def add(self, key: int) -> None:
+        position = bisect_left(self.removed, key)
+        if position < len(self.removed) and self.removed[position] == key:
+            del self.removed[position]
+            return
+        insort(self.added, key)
+        if len(self.added) >= self.MERGE_SIZE:
+            self._merge()
+
+    def remove(self, key: int) -> None:
+        position = bisect_left(self.added, key)
+        if position < len(self.added) and self.added[position] == key:
+            del self.added[position]
+            return
+        insort(self.removed, key)
+        if len(self.removed) >= self.MERGE_SIZE:
+            self._merge()
+
+    def count_below(self, key: int) -> int:
+        """Number of keys smaller than ``key``"""
+        return (
+            int(np.searchsorted(self.keys, key))
+            + bisect_left(self.added, key)
+            - bisect_left(self.removed, key)
+        )
+
+    def before(self, key: int, k: int) -> List[int]:
+        """The ``k`` largest keys smaller than ``key``, ascending"""
+        stop = int(np.searchsorted(self.keys, key))
+        position = bisect_left(self.added, key)
+        # Enough array keys that k remain after dropping removed ones
+        candidates = self.keys[max(stop - k - len(self.removed), 0):stop].tolist()
+        candidates = sorted(candidates + self.added[max(position - k, 0):position])
+        return [key for key in candidates if not self._is_removed(key)][-k:] if k else []
+
+    def after(self, key: int, k: int) -> List[int]:
+        """The ``k`` smallest keys larger than ``key``, ascending"""
+        start = int(np.searchsorted(self.keys, key, side="right"))
+        position = bisect_left(self.added, key + 1)
+        candidates = self.keys[start:start + k + len(self.removed)].tolist()
+        candidates = sorted(candidates + self.added[position:position + k])
+        return [key for key in candidates if not self._is_removed(key)][:k]
+
+    def _is_removed(self, key: int) -> bool:
+        position = bisect_left(self.removed, key)
+        return position < len(self.removed) and self.removed[position] == key
+
+    def _merge(self) -> None:
+        keys = self.keys
+        if self.added:
+            added = np.array(self.added, dtype=np.int64)
+            keys = np.insert(keys, np.searchsorted(keys, added), added)
+        if self.removed:
+            keys = np.delete(keys, np.searchsorted(keys, np.array(self.removed, dtype=np.int64)))
+        self.keys, self.added, self.removed = keys, [], []
+
+
+class PeerRankings:
+    """ScoreIndex per (dimension, group, category) for the stored projects"""
+
+    def __init__(self, neighbors: int = 2, refresh_interval: float = 5):
+        self.neighbors = neighbors
+        self.refresh_interval = refresh_interval
+        self.indexes: Dict[Tuple[str, str, str], ScoreIndex] = {}
+        # Projects up to max_id are loaded; own inserts above it are tracked so
+        # refresh() does not add them twice
+        self.max_id = 0
+        # Revisions up to max_revision_id are reflected in the loaded scores
+        self.max_revision_id = 0
+        self.loaded = False
+        # Rows scored with other weights than the active plan, as last counted
+        self.stale_count = 0
+        self._stale_changed = False
+        self._own_ids = set()
+        self._refreshed_at = 0.0
+
+    async def warm(self, db: AsyncSession) -> int:
+        """Load every stored project's scores; returns the number of projects"""
+        # Read first: revisions made while loading are applied again by refresh(), which is harmless
+        max_revision_id = await db.scalar(select(func.max(models.ProjectRevision.id))) or 0
+        stale_count = await _count_stale(db)
+        columns = [getattr(models.Project, column) for column in SCORE_COLUMNS.values()]
+        statement = select(models.Project.id, models.Project.projectType, models.Project.location, *columns)
+        result = await db.stream(statement.execution_options(yield_per=_LOAD_CHUNK))
+
+        # Group values are coded as ints per dimension, so each partition becomes plain arrays
+        codes: Dict[str, Dict[Optional[str], int]] = {dimension: {} for dimension in PEER_DIMENSIONS}
+        ids, group_codes, scores = [], {dimension: [] for dimension in PEER_DIMENSIONS}, []
+        async for rows in result.partitions():
+            ids.append(np.array([row[0] for row in rows], dtype=np.int64))
+            for position, dimension in enumerate(PEER_DIMENSIONS, start=1):
+                dimension_codes = codes[dimension]
+                group_codes[dimension].append(np.array(
+                    [dimension_codes.setdefault(row[position], len(dimension_codes)) for row in rows], dtype=np.int64
+                ))
+            scores.append(np.array([row[len(PEER_DIMENSIONS) + 1:] for row in rows], dtype=np.float64))
+
+        self.indexes = {}
+        self.loaded = True
+        self.max_revision_id = max_revision_id
+        self.stale_count = stale_count
+        self._stale_changed = False
+        self._own_ids = set()
+        self._refreshed_at = time.monotonic()
+        if not ids:
+            self.max_id = 0
+            return 0
+        ids, scores = np.concatenate(ids), np.concatenate(scores)
+        self.max_id = int(ids.max())
+        for dimension in PEER_DIMENSIONS:
+            groups = list(codes[dimension])
+            dimension_codes = np.concatenate(group_codes[dimension])
+            for column, category in enumerate(SCORE_COLUMNS):
+                scored = ~np.isnan(scores[:, column]) & (np.array([g is not None for g in groups])[dimension_codes])
+                centis = np.maximum(np.rint(scores[scored, column] * 100), 0).astype(np.int64)
+                keys = (centis << _ID_BITS) | ids[scored]
+                order = np.lexsort((keys, dimension_codes[scored]))
+                keys, sorted_codes = keys[order], dimension_codes[scored][order]
+                starts = np.concatenate(([0], np.flatnonzero(np.diff(sorted_codes)) + 1))
+                for start, stop in zip(starts.tolist(), starts[1:].tolist() + [len(keys)]):
+                    if start < stop:
+                        self.indexes[(dimension, groups[sorted_codes[start]], category)] = ScoreIndex(keys[start:stop])
+        return len(ids)
+
+    async def refresh(self, db: AsyncSession) -> None:
+        """Add projects other processes stored, and move the ones they revised,
+        since the last refresh; at most every refresh_interval"""
+        now = time.monotonic()
+        if now - self._refreshed_at < self.refresh_interval:
+            return
+        self._refreshed_at = now
+        stale_count = await _count_stale(db)
+        if stale_count != self.stale_count:
+            # Rescored in place: wait for the count to settle rather than reload after every chunk
+            self.stale_count, self._stale_changed = stale_count, True
+        elif self._stale_changed:
+            await self.warm(db)
+            return
+        columns = [getattr(models.Project, column) for column in SCORE_COLUMNS.values()]
+        rows = (await db.execute(
+            select(models.Project.id, models.Project.projectType, models.Project.location, *columns)
+            .where(models.Project.id > self.max_id)
+            .order_by(models.Project.id)
+        )).all()
+        new_rows = [row._mapping for row in rows if row.id not in self._own_ids]
+        self._add(new_rows)
+        if rows:
+            self.max_id = max(self.max_id, rows[-1].id)
+            self._own_ids = {project_id for project_id in self._own_ids if project_id > self.max_id}
+
+        # Each archived version moves its project from the archived scores to the current ones
+        archived = models.ProjectRevision
+        revisions = (await db.execute(
+            select(
+                archived.id.label("revision_id"),
+                archived.projectType.label("archived_projectType"),
+                *[getattr(archived, column).label(f"archived_{column}") for column in SCORE_COLUMNS.values()],
+                models.Project.id, models.Project.projectType, models.Project.location, *columns,
+            )
+            .join(models.Project, models.Project.id == archived.project_id)
+            .where(archived.id > self.max_revision_id)
+            .order_by(archived.id)
+        )).all()
+        self.revise(
+            (
+                {
+                    "id": row.id,
+                    "location": row.location,
+                    "projectType": row.archived_projectType,
+                    **{column: getattr(row, f"archived_{column}") for column in SCORE_COLUMNS.values()},
+                },
+                row._mapping,
+            )
+            for row in revisions
+        )
+        if revisions:
+            self.max_revision_id = revisions[-1].revision_id
+
+    def add(self, rows: Iterable[dict]) -> None:
+        """Index stored project rows (crud.project_row() values plus ``id``)"""
+        rows = list(rows)
+        self._add(rows)
+        self._own_ids.update(row["id"] for row in rows if row["id"] > self.max_id)
+
+    def revise(self, rows: Iterable[Tuple[dict, dict]]) -> None:
+        """Move revised projects from their previous to their current scores.
+
+        Takes (previous, current) row pairs. Keys that are already gone or
+        already present are skipped, so applying a revision twice is harmless.
+        """
+        for previous, current in rows:
+            for index_key, key in self._keys(previous):
+                index = self.indexes.get(index_key)
+                if index is not None and key in index:
+                    index.remove(key)
+            for index_key, key in self._keys(current):
+                index = self.indexes.setdefault(index_key, ScoreIndex())
+                if key not in index:
+                    index.add(key)
+
+    def _add(self, rows) -> None:
+        for row in rows:
+            for index_key, key in self._keys(row):
+                self.indexes.setdefault(index_key, ScoreIndex()).add(key)
+
+    @staticmethod
+    def _keys(row) -> Iterable[Tuple[Tuple[str, str, str], int]]:
+        """(index key, score key) of every index a project row belongs in"""
+        for dimension in PEER_DIMENSIONS:
+            group = row[dimension]
+            if group is None:
+                continue
+            for category, column in SCORE_COLUMNS.items():
+                if row[column] is not None:
+                    yield (dimension, group, category), score_key(row[column], row["id"])
+
+    def rank(self, scores: Dict[str, float], groups: Dict[str, Optional[str]], project_id: Optional[int] = None) -> List[dict]:
+        """Rank ``scores`` within each peer group (schemas.PeerRanking dicts).
+
+        Pass ``project_id`` for a stored project so it is not counted as its
+        own peer. Groups without other projects are left out.
+        """
+        rankings = []
+        for dimension in PEER_DIMENSIONS:
+            group = groups.get(dimension)
+            categories = {}
+            for category, score in scores.items():
+                index = self.indexes.get((dimension, group, category))
+                if index is None or score is None:
+                    continue
+                ranking = self._rank_in(index, score, project_id)
+                if ranking is not None:
+                    categories[category] = ranking
+            if categories:
+                rankings.append({"dimension": dimension, "group": group, "categories": categories})
+        return rankings
+
+    def _rank_in(self, index: ScoreIndex, score: float, project_id: Optional[int]) -> Optional[dict]:
+        centis = _centis(score)
+        below = index.count_below(centis << _ID_BITS)
+        equal = index.count_below((centis + 1) << _ID_BITS) - below
+        peers = len(index)
+        if project_id is not None:
+            own = score_key(score, project_id)
+            if index.count_below(own + 1) - index.count_below(own):
+                peers -= 1
+                equal -= 1
+        if peers <= 0:
+            return None
+        # Neighbours are ordered around this project's own key (id 0 when unsaved)
+        position = score_key(score, project_id or 0)
+        return {
+            "peers": peers,
+            "rank": peers - below - equal + 1,
+            # Share of peers scoring lower, counting ties as half
+            "percentile": round(100 * (below + 0.5 * equal) / peers, 2),
+            "below": [_neighbor(key) for key in reversed(index.before(position, self.neighbors))],
+            "above": [_neighbor(key) for key in index.after(position, self.neighbors)],
+        }
+
+
+async def _count_stale(db: AsyncSession) -> int:
+    """Projects whose stored scores came from other weights than the active plan"""
+    version = models.Project.scoring_version
+    active = get_plan().version
+    # Two ranges rather than != so the scoring_version index is used; usually both are empty
+    return await db.scalar(
+        select(func.count())
+        .select_from(models.Project)
+        .where(or_(version < active, version > active, version.is_(None)))
+    )
+
+
+def _neighbor(key: int) -> dict:
+    project_id, score = _split_key(key)
+    return {"id": project_id, "score": score}
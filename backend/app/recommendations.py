@@ -0,0 +1,207 @@
+# app/recommendations.py
+"""Threshold rules that turn scores into recommendations and risks.
+
+Rules come from scoring_config (RECOMMENDATION_RULES plus the per-type
+PROJECT_TYPE_RECOMMENDATIONS lists) or RECOMMENDATION_RULES_PATH. At load
+time the rules on each (metric, project type) are compiled into an
+interval index. The index holds the sorted rule boundaries and, for
+every gap between two boundaries, the rules covering it. Matching a
+score is then one bisect plus the matched rules, however many rules
+exist, and a batch of scores is one ``searchsorted`` per index.
+"""
+import hashlib
+import json
+import logging
+import threading
+import time
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .config import settings
+from .scoring_config import file_signature, load_rules
+
+logger = logging.getLogger(__name__)
+
+# Project type key of rules that apply to every type
+ANY_TYPE = None
+
+
+@dataclass(frozen=True)
+class Rule:
+    kind: str  # 'recommendation' or 'risk'
+    metric: str
+    at_least: Optional[float]
+    below: Optional[float]
+    message: str
+
+
+class IntervalIndex:
+    """Rules on one metric, partitioned into disjoint score intervals.
+
+    Interval ``i`` spans ``[breakpoints[i - 1], breakpoints[i])``, with the
+    first and last intervals open-ended; ``covering[i]`` lists the ids of
+    the rules whose range contains it.
+    """
+
+    def __init__(self, rules: Sequence[Tuple[int, Rule]]):
+        bounds = {value for _, rule in rules for value in (rule.at_least, rule.below) if value is not None}
+        self.breakpoints = sorted(bounds)
+        self._array = np.array(self.breakpoints, dtype=np.float64)
+        covering = [[] for _ in range(len(self.breakpoints) + 1)]
+        for rule_id, rule in rules:
+            first = 0 if rule.at_least is None else bisect_left(self.breakpoints, rule.at_least) + 1
+            last = len(self.breakpoints) if rule.below is None else bisect_left(self.breakpoints, rule.below)
+            for interval in range(first, last + 1):
+                covering[interval].append(rule_id)
+        self.covering = [tuple(ids) for ids in covering]
+
+    def match(self, value: float) -> Tuple[int, ...]:
+        return self.covering[bisect_right(self.breakpoints, value)]
+
+    def intervals(self, values: np.ndarray) -> np.ndarray:
+        """Interval of each value; index ``covering`` with the result"""
+        return np.searchsorted(self._array, values, side="right")
+
+
+class RuleSet:
+    """Compiled rules, grouped by project type and metric"""
+
+    def __init__(self, rules: List[Tuple[Rule, Optional[Sequence[str]]]], version: str):
+        self.version = version
+        self.rules = [rule for rule, _ in rules]
+        grouped: Dict[Optional[str], Dict[str, list]] = {}
+        for rule_id, (rule, project_types) in enumerate(rules):
+            for project_type in project_types or (ANY_TYPE,):
+                grouped.setdefault(project_type, {}).setdefault(rule.metric, []).append((rule_id, rule))
+        self.indexes: Dict[Optional[str], Dict[str, IntervalIndex]] = {
+            project_type: {metric: IntervalIndex(metric_rules) for metric, metric_rules in by_metric.items()}
+            for project_type, by_metric in grouped.items()
+        }
+        # Subcategory metrics ("category.subcategory") need subcategory scores as input
+        self.needs_subcategories = any("." in rule.metric for rule in self.rules)
+
+    def evaluate(self, metrics: Dict[str, float], project_type: Optional[str] = None) -> Tuple[List[str], List[str]]:
+        """(recommendations, risks) for one set of scores, in rule order"""
+        matched = []
+        for key in (ANY_TYPE, project_type) if project_type is not None else (ANY_TYPE,):
+            for metric, index in self.indexes.get(key, {}).items():
+                value = metrics.get(metric)
+                if value is not None:
+                    matched.extend(index.match(value))
+        return self._messages(matched)
+
+    def evaluate_batch(
+        self,
+        metrics: Sequence[Dict[str, float]],
+        project_types: Sequence[Optional[str]]
+    ) -> List[Tuple[List[str], List[str]]]:
+        """evaluate() for many score sets, with one searchsorted per index"""
+        matched: List[list] = [[] for _ in metrics]
+        types = np.array([t if t is not None else "" for t in project_types], dtype=object)
+        for key, by_metric in self.indexes.items():
+            rows = np.arange(len(metrics)) if key is ANY_TYPE else np.flatnonzero(types == key)
+            for metric, index in by_metric.items():
+                present = [row for row in rows if metrics[row].get(metric) is not None]
+                if not present:
+                    continue
+                values = np.array([metrics[row][metric] for row in present], dtype=np.float64)
+                for row, interval in zip(present, index.intervals(values).tolist()):
+                    matched[row].extend(index.covering[interval])
+        return [self._messages(ids) for ids in matched]
+
+    def _messages(self, rule_ids: list) -> Tuple[List[str], List[str]]:
+        recommendations, risks = [], []
+        for rule_id in sorted(rule_ids):
+            rule = self.rules[rule_id]
+            (recommendations if rule.kind == "recommendation" else risks).append(rule.message)
+        return recommendations, risks
+
+
+def compile_rules(config: dict) -> RuleSet:
+    """Build a RuleSet from a validated load_rules() dict.
+
+    Generic rules come first, then each project type's lists, so output
+    keeps that order.
+    """
+    rules = [
+        (
+            Rule(rule['kind'], rule['metric'], rule.get('at_least'), rule.get('below'), rule['message']),
+            rule.get('project_types'),
+        )
+        for rule in config['rules']
+    ]
+    bands = config['project_type_score_bands']
+    for project_type, lists in config['project_type_recommendations'].items():
+        for band, messages in lists.items():
+            for message in messages:
+                rule = Rule('recommendation', 'total', bands[band].get('at_least'), bands[band].get('below'), message)
+                rules.append((rule, [project_type]))
+    canonical = json.dumps(config, sort_keys=True, separators=(",", ":"))
+    return RuleSet(rules, hashlib.sha256(canonical.encode()).hexdigest()[:12])
+
+
+_active_rules: Optional[RuleSet] = None
+_rules_lock = threading.Lock()
+# RECOMMENDATION_RULES_PATH's file_signature() when last loaded, and when it was last checked
+_rules_signature = None
+_rules_checked_at = 0.0
+
+
+def get_rules() -> RuleSet:
+    """The shared rule set, compiled on first use.
+
+    Like scoring.get_plan, re-read once RECOMMENDATION_RULES_PATH changes.
+    """
+    rules = _active_rules
+    if rules is None:
+        with _rules_lock:
+            if _active_rules is None:
+                signature = file_signature(settings.RECOMMENDATION_RULES_PATH)
+                _set_rules(compile_rules(load_rules(settings.RECOMMENDATION_RULES_PATH, _plan_metrics())), signature)
+            rules = _active_rules
+    elif time.monotonic() - _rules_checked_at >= settings.CONFIG_CHECK_INTERVAL:
+        rules = _follow_rules_file()
+    return rules
+
+
+def reload_rules(path: Optional[str] = None) -> RuleSet:
+    """Load and compile a rules file, then swap it in; invalid files raise ValueError"""
+    path = path or settings.RECOMMENDATION_RULES_PATH
+    signature = file_signature(path)
+    rules = compile_rules(load_rules(path, _plan_metrics()))
+    with _rules_lock:
+        _set_rules(rules, signature)
+    return rules
+
+
+def _follow_rules_file() -> RuleSet:
+    global _rules_checked_at, _rules_signature
+    with _rules_lock:
+        _rules_checked_at = time.monotonic()
+        signature = file_signature(settings.RECOMMENDATION_RULES_PATH)
+        if signature == _rules_signature or signature is None:
+            return _active_rules
+        # Not retried until the file changes again
+        _rules_signature = signature
+    try:
+        rules = reload_rules()
+    except (OSError, ValueError, KeyError) as e:
+        logger.error("Edited recommendation rules not loaded: %s", e)
+        return _active_rules
+    logger.info("Recommendation rules reloaded", extra={"version": rules.version})
+    return rules
+
+
+def _plan_metrics() -> Tuple[str, ...]:
+    # Imported here because scoring imports this module
+    from .scoring import get_plan
+    return get_plan().metrics
+
+
+def _set_rules(rules: RuleSet, signature=None) -> None:
+    global _active_rules, _rules_signature
+    _active_rules = rules
+    _rules_signature = signature
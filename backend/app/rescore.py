@@ -0,0 +1,164 @@
+# app/rescore.py
+"""Recompute stored scores after the scoring weights change.
+
+Run from the backend directory, e.g. from a nightly cron job:
+
+    python -m app.rescore --chunk-size 2000
+
+Only rows whose ``scoring_version`` differs from the current weights are
+touched, so an interrupted run simply picks up where it left off.
+"""
+import argparse
+import time
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+from sqlalchemy import bindparam, func, select, update
+from sqlalchemy.orm import Session
+
+from . import models
+from .crud import SCORE_COLUMNS
+from .database import SessionLocal
+from .scoring import ESGScorer
+from .stats import rebuild_rollups
+
+# Passes over rows that were revised while being rescored
+MAX_PASSES = 3
+
+@dataclass
+class RescoreProgress:
+    """Running totals reported after every committed chunk"""
+    total: int
+    done: int = 0
+    last_id: int = 0
+    started_at: float = 0.0
+    # Rows revised between being read and written, still stale after the retries
+    skipped: int = 0
+
+    @property
+    def rate(self) -> float:
+        elapsed = time.monotonic() - self.started_at
+        return self.done / elapsed if elapsed > 0 else 0.0
+
+    @property
+    def eta_seconds(self) -> Optional[float]:
+        return (self.total - self.done) / self.rate if self.rate else None
+
+
+def rescore_projects(
+    db: Session,
+    scorer: ESGScorer,
+    chunk_size: int = 1000,
+    window_size: int = 50000,
+    start_after_id: int = 0,
+    progress: Optional[Callable[[RescoreProgress], None]] = None
+) -> RescoreProgress:
+    """Rescore every project whose stored scores came from other weights.
+
+    Work proceeds in id-ordered windows of ``window_size`` rows. Each window
+    is streamed with ``yield_per`` and scored ``chunk_size`` rows at a time
+    with ``score_batch``; only the compact score updates are kept. Once the
+    read cursor is closed the updates are written with bulk UPDATEs, one
+    commit per chunk. Keeping reads and writes apart means no read snapshot
+    is held open while committing (which would block SQLite writers), and
+    an interrupted run resumes from the stale rows that remain. A project
+    revised between the read and the write is left alone and rescored in
+    another pass, up to MAX_PASSES.
+    """
+    version = scorer.plan.version
+    stale = models.Project.scoring_version.is_distinct_from(version)
+    total = db.scalar(select(func.count()).where(stale, models.Project.id > start_after_id))
+    state = RescoreProgress(total=total, last_id=start_after_id, started_at=time.monotonic())
+    projects = models.Project.__table__
+    # Only write scores over the survey they were computed from; a project
+    # revised since it was read keeps its new scores and is picked up again
+    write_scores = update(projects).where(
+        projects.c.id == bindparam("b_id"),
+        projects.c.survey_answered == bindparam("b_answered"),
+        projects.c.survey_yes == bindparam("b_yes"),
+    )
+
+    after_id = start_after_id
+    missed = []
+    for _ in range(MAX_PASSES):
+        while True:
+            statement = (
+                select(models.Project.id, models.Project.survey_answered, models.Project.survey_yes)
+                .where(stale, models.Project.id > after_id)
+                .order_by(models.Project.id)
+                .limit(window_size)
+                .execution_options(yield_per=chunk_size)
+            )
+            updates = []
+            for rows in db.execute(statement).partitions():
+                all_scores = scorer.score_masks(
+                    [row.survey_answered for row in rows], [row.survey_yes for row in rows]
+                )
+                updates.extend(
+                    {
+                        "b_id": row.id,
+                        "b_answered": row.survey_answered,
+                        "b_yes": row.survey_yes,
+                        "scoring_version": version,
+                        **{column: scores[key] for key, column in SCORE_COLUMNS.items()},
+                    }
+                    for row, scores in zip(rows, all_scores)
+                )
+            db.commit()
+            if not updates:
+                break
+
+            for start in range(0, len(updates), chunk_size):
+                chunk = updates[start:start + chunk_size]
+                db.execute(write_scores, chunk)
+                db.commit()
+                # Checked afterwards because executemany row counts are not reliable on every driver
+                chunk_missed = db.scalars(
+                    select(models.Project.id).where(models.Project.id.in_([row["b_id"] for row in chunk]), stale)
+                ).all()
+                missed.extend(chunk_missed)
+                state.done += len(chunk) - len(chunk_missed)
+                state.last_id = after_id = chunk[-1]["b_id"]
+                if progress is not None:
+                    progress(state)
+        if not missed:
+            break
+        after_id, missed = min(missed) - 1, []
+    else:
+        state.skipped = db.scalar(select(func.count()).where(stale, models.Project.id > start_after_id))
+
+    if state.done:
+        # Incremental rollup updates only cover inserts; rescoring moves scores between buckets
+        rebuild_rollups(db)
+    return state
+
+
+def _print_progress(state: RescoreProgress) -> None:
+    eta = f"{state.eta_seconds:,.0f}s" if state.eta_seconds is not None else "?"
+    print(
+        f"rescored {state.done:,}/{state.total:,} "
+        f"(last id {state.last_id}, {state.rate:,.0f} rows/s, eta {eta})",
+        flush=True,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Recompute stored ESG scores for the current weights")
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    parser.add_argument("--window-size", type=int, default=50000, help="Rows read per streamed window")
+    parser.add_argument("--start-after-id", type=int, default=0, help="Skip rows up to and including this id")
+    args = parser.parse_args()
+
+    scorer = ESGScorer()
+    print(f"scoring version {scorer.plan.version}", flush=True)
+    with SessionLocal() as db:
+        state = rescore_projects(
+            db, scorer, args.chunk_size, args.window_size, args.start_after_id, _print_progress
+        )
+    print(f"done: {state.done:,} rows rescored", flush=True)
+    if state.skipped:
+        print(f"{state.skipped:,} rows kept changing while being rescored; run again to retry them", flush=True)
+
+
+if __name__ == "__main__":
+    main()
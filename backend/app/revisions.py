@@ -0,0 +1,219 @@
+# app/revisions.py
+"""Project upserts and version history.
+
+Stored projects are matched to submissions by crud.identity_key. A
+resubmission that changes the answers, the projectType or the scores
+archives the stored version in project_revisions and overwrites the
+projects row; one that changes nothing writes nothing. Each distinct
+survey is scored once, and not at all when a stored project already has
+scores for it under the current weights.
+
+Archived versions are reverse deltas: the XOR of their answer bitmasks
+with the next version's, plus their own scores. Score trends are read
+straight from those rows, and a past version's answers are rebuilt by
+XOR-ing the deltas into the current masks, newest first.
+"""
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from . import crud, models
+from .scoring import ESGScorer, NUM_QUESTIONS, decode_masks
+
+# A resubmission that changes none of these adds no revision
+VERSION_COLUMNS = ("projectType", "survey_answered", "survey_yes", *crud.SCORE_COLUMNS.values())
+# Kept as first submitted, so the project stays in the same location group
+FIXED_COLUMNS = ("projectName", "location", "identity_key")
+
+_LOOKUP_CHUNK = 500
+
+
+@dataclass
+class UpsertResult:
+    """Outcome of upsert_projects()"""
+    # Project id of every input row, in input order
+    ids: List[int] = field(default_factory=list)
+    # Stored rows of newly created projects, with ids
+    inserted: List[dict] = field(default_factory=list)
+    # (previous, current) rows of projects that got a new revision
+    revised: List[Tuple[dict, dict]] = field(default_factory=list)
+
+
+async def current_rows(db: AsyncSession, identity_keys: Iterable[str]) -> Dict[str, dict]:
+    """Stored project rows by identity key"""
+    table = models.Project.__table__
+    keys = list(dict.fromkeys(identity_keys))
+    rows = {}
+    for start in range(0, len(keys), _LOOKUP_CHUNK):
+        result = await db.execute(select(table).where(table.c.identity_key.in_(keys[start:start + _LOOKUP_CHUNK])))
+        rows.update((row.identity_key, dict(row._mapping)) for row in result)
+    return rows
+
+
+def score_surveys(scorer: ESGScorer, masks: List[Tuple[int, int]], stored: Iterable[dict]) -> List[dict]:
+    """Scores of (answered, yes) bitmask pairs.
+
+    Each distinct survey is scored once; surveys a ``stored`` row already
+    holds current-version scores for are not scored at all.
+    """
+    version = scorer.plan.version
+    known = {
+        (row["survey_answered"], row["survey_yes"]): {key: row[column] for key, column in crud.SCORE_COLUMNS.items()}
+        for row in stored
+        if row["scoring_version"] == version
+    }
+    missing = [pair for pair in dict.fromkeys(masks) if pair not in known]
+    if missing:
+        answered, yes = zip(*missing)
+        known.update(zip(missing, scorer.score_masks(answered, yes)))
+    return [known[pair] for pair in masks]
+
+
+async def upsert_projects(
+    db: AsyncSession,
+    rows: List[dict],
+    current: Dict[str, dict],
+    chunk_size: int
+) -> UpsertResult:
+    """Insert or revise project rows (crud.project_row() values), one commit per chunk.
+
+    ``current`` holds the stored rows by identity key (current_rows()) and
+    is kept up to date as chunks are written. Several rows for the same
+    project are applied in order, each change becoming a revision. Score
+    rollups are updated in the same transaction as each chunk.
+    """
+    result = UpsertResult()
+    for start in range(0, len(rows), chunk_size):
+        chunk = rows[start:start + chunk_size]
+        await _upsert_chunk(db, chunk, current, result)
+        await db.commit()
+        result.ids.extend(current[row["identity_key"]]["id"] for row in chunk)
+    return result
+
+
+async def _upsert_chunk(db: AsyncSession, rows: List[dict], current: Dict[str, dict], result: UpsertResult) -> None:
+    writable = [name for name in rows[0] if name not in FIXED_COLUMNS]
+    # Versions of every project in the chunk, oldest first, starting from the stored one
+    chains: Dict[str, List[dict]] = {}
+    for row in rows:
+        key = row["identity_key"]
+        chain = chains.setdefault(key, [current[key]] if key in current else [])
+        if chain and all(chain[-1][name] == row[name] for name in VERSION_COLUMNS):
+            # Same version; coordinates and location risks are updated in place
+            chain[-1] = {**chain[-1], **{name: row[name] for name in writable}}
+        else:
+            chain.append(row)
+
+    new_keys = [key for key in chains if key not in current]
+    added = []
+    if new_keys:
+        new_rows = [{**chains[key][-1], "revision": len(chains[key])} for key in new_keys]
+        inserted = await db.execute(
+            insert(models.Project).returning(models.Project.id, sort_by_parameter_order=True), new_rows
+        )
+        for key, row, project_id in zip(new_keys, new_rows, inserted.scalars().all()):
+            current[key] = {**row, "id": project_id}
+            added.append(current[key])
+        result.inserted.extend(added)
+
+    updates, archived, removed = [], [], []
+    now = datetime.now(timezone.utc)
+    for key, chain in chains.items():
+        previous = current[key] if key not in new_keys else None
+        if previous is not None:
+            latest = {**previous, **{name: chain[-1][name] for name in writable}}
+            latest["revision"] = previous["revision"] + len(chain) - 1
+            if len(chain) == 1 and all(latest[name] == previous[name] for name in writable):
+                continue
+            # Set by the column's onupdate; a later chunk archives this version with it
+            latest["updated_at"] = now
+            updates.append({"id": previous["id"], "revision": latest["revision"], **{name: latest[name] for name in writable}})
+            current[key] = latest
+            if len(chain) > 1:
+                result.revised.append((previous, latest))
+                added.append(latest)
+                removed.append(previous)
+        project_id = current[key]["id"]
+        first_revision = current[key]["revision"] - len(chain) + 1
+        archived.extend(
+            _archived_version(project_id, first_revision + i, version, newer, now)
+            for i, (version, newer) in enumerate(zip(chain, chain[1:]))
+        )
+
+    if updates:
+        await db.execute(update(models.Project), updates)
+    if archived:
+        await db.execute(insert(models.ProjectRevision), archived)
+    await crud.add_to_rollups(db, added, removed)
+
+
+def _archived_version(project_id: int, revision: int, version: dict, newer: dict, now: datetime) -> dict:
+    """project_revisions row for ``version``, superseded by ``newer``"""
+    return {
+        "project_id": project_id,
+        "revision": revision,
+        "projectType": version["projectType"],
+        "answered_delta": version["survey_answered"] ^ newer["survey_answered"],
+        "yes_delta": version["survey_yes"] ^ newer["survey_yes"],
+        **{column: version[column] for column in crud.SCORE_COLUMNS.values()},
+        "scoring_version": version["scoring_version"],
+        # Stored versions carry their own timestamps; ones from this request are new
+        "submitted_at": version.get("updated_at") or version.get("created_at") or now,
+    }
+
+
+async def project_versions(
+    db: AsyncSession,
+    project_id: int,
+    oldest: int = 1,
+    answers: bool = False
+) -> Optional[Tuple[models.Project, List[dict]]]:
+    """A project and its versions from revision ``oldest`` on (schemas.ProjectVersion dicts), oldest first.
+
+    Only the deltas of revisions at or after ``oldest`` are read. Returns
+    None if the project does not exist.
+    """
+    project = await db.get(models.Project, project_id)
+    if project is None:
+        return None
+    revision = models.ProjectRevision
+    archived = (await db.execute(
+        select(revision)
+        .where(revision.project_id == project_id, revision.revision >= oldest - 1)
+        .order_by(revision.revision.desc())
+    )).scalars().all()
+
+    answered, yes = project.survey_answered, project.survey_yes
+    newest = _version(project, project.revision, answered, yes, project.updated_at or project.created_at, answers)
+    versions = [newest]
+    for row in archived:
+        newest["changes"] = _changes(row.answered_delta | row.yes_delta, answered, yes)
+        answered, yes = answered ^ row.answered_delta, yes ^ row.yes_delta
+        newest = _version(row, row.revision, answered, yes, row.submitted_at, answers)
+        versions.append(newest)
+    versions.reverse()
+    return project, [version for version in versions if version["revision"] >= oldest]
+
+
+def _version(row, revision: int, answered: int, yes: int, submitted_at, answers: bool) -> dict:
+    return {
+        "revision": revision,
+        "submitted_at": submitted_at,
+        "projectType": row.projectType,
+        "scoring_version": row.scoring_version,
+        "scores": {key: getattr(row, column) for key, column in crud.SCORE_COLUMNS.items()},
+        "changes": {},
+        "surveyResponses": decode_masks(answered, yes) if answers else None,
+    }
+
+
+def _changes(changed: int, answered: int, yes: int) -> Dict[str, Optional[str]]:
+    """New answers to the questions set in ``changed``; None where the answer was removed"""
+    return {
+        str(q): ("A" if yes >> (q - 1) & 1 else "B") if answered >> (q - 1) & 1 else None
+        for q in range(1, NUM_QUESTIONS + 1)
+        if changed >> (q - 1) & 1
+    }
@@ -4,6 +4,10 @@ from typing import Dict, List, Optional
 from datetime import datetime
 import re
 
+from .scoring import NUM_QUESTIONS
+
+QUESTION_IDS = frozenset(str(q) for q in range(1, NUM_QUESTIONS + 1))
+
 class SurveyResponse(BaseModel):
     """Schema for survey responses"""
     surveyResponses: Dict[str, str] = Field(
@@ -23,12 +27,24 @@ class EPAFacility(BaseModel):
     longitude83: Optional[float] = None
 
 class EPAEnvironmentalData(BaseModel):
-    """Schema for EPA environmental data"""
-    air_quality_index: Optional[float] = Field(None, description="Local air quality index")
-    water_quality_score: Optional[float] = Field(None, description="Local water quality score")
+    """Schema for EPA environmental data from the local facility store.
+
+    Air, water and environmental justice measures are not in the facility
+    export; they are reported as ``location_risks`` from the risk rasters.
+    Their fields here are kept for existing clients and are always None.
+    """
+    air_quality_index: Optional[float] = Field(None, description="Local air quality index (not filled; see location_risks)")
+    water_quality_score: Optional[float] = Field(None, description="Local water quality score (not filled; see location_risks)")
     nearby_facilities: List[EPAFacility] = Field(default_factory=list)
     compliance_metrics: Dict[str, float] = Field(default_factory=dict)
-    environmental_justice_score: Optional[float] = Field(None, description="Environmental justice index")
+    environmental_justice_score: Optional[float] = Field(None, description="Environmental justice index (not filled; see location_risks)")
+
+class LocationRiskMetrics(BaseModel):
+    """Schema for location-specific risk metrics"""
+    air_quality_risk: Optional[float] = Field(None, description="Air quality risk score")
+    water_quality_risk: Optional[float] = Field(None, description="Water quality risk score")
+    facility_density: Optional[float] = Field(None, description="Nearby facility density score")
+    environmental_justice_risk: Optional[float] = Field(None, description="Environmental justice risk score")
 
 class ProjectBase(BaseModel):
     """Base schema for project data"""
@@ -39,6 +55,8 @@ class ProjectBase(BaseModel):
         ..., 
         description="Survey responses where key is question number and value is 'A' (Yes) or 'B' (No)"
     )
+    latitude: Optional[float] = Field(None, ge=-90, le=90, description="Project site latitude (WGS84)")
+    longitude: Optional[float] = Field(None, ge=-180, le=180, description="Project site longitude (WGS84)")
 
     @validator('location')
     def validate_location(cls, v):
@@ -47,6 +65,17 @@ class ProjectBase(BaseModel):
             raise ValueError('Location cannot be empty')
         return v.strip()
 
+    @validator('surveyResponses')
+    def validate_survey_responses(cls, v):
+        # Question ids "1".."35" only, answered 'A' (Yes) or 'B' (No)
+        unknown = sorted(set(v) - QUESTION_IDS)
+        if unknown:
+            raise ValueError(f'Unknown question ids: {", ".join(unknown)}; expected "1" to "{NUM_QUESTIONS}"')
+        invalid = sorted((q for q, answer in v.items() if answer not in ('A', 'B')), key=int)
+        if invalid:
+            raise ValueError(f'Answers must be "A" or "B"; invalid for questions: {", ".join(invalid)}')
+        return v
+
     model_config = {
         "json_schema_extra": {
             "example": {
@@ -65,12 +94,15 @@ class ProjectCreate(ProjectBase):
 class ProjectResponse(ProjectBase):
     """Schema for project response including scores"""
     id: Optional[int] = Field(None, description="Project ID")
+    revision: Optional[int] = Field(None, description="Version number, counting submissions that changed the survey or scores")
     standard_esg_score: Optional[float] = Field(None, description="Standard ESG score")
     european_esg_score: Optional[float] = Field(None, description="European ESG score")
     us_esg_score: Optional[float] = Field(None, description="US ESG score")
     community_engagement_score: Optional[float] = Field(None, description="Community engagement score")
     total_esg_score: Optional[float] = Field(None, description="Total ESG score")
+    scoring_version: Optional[str] = Field(None, description="Version of the scoring weights used")
     epa_data: Optional[EPAEnvironmentalData] = Field(None, description="EPA environmental data")
+    location_risks: Optional[LocationRiskMetrics] = Field(None, description="Location-specific risk metrics")
     created_at: Optional[datetime] = Field(None, description="Creation timestamp")
     updated_at: Optional[datetime] = Field(None, description="Last update timestamp")
 
@@ -86,12 +118,24 @@ class ESGScores(BaseModel):
     community_engagement: float = Field(..., description="Community engagement score")
     total: float = Field(..., description="Total ESG score")
 
-class LocationRiskMetrics(BaseModel):
-    """Schema for location-specific risk metrics"""
-    air_quality_risk: Optional[float] = Field(None, description="Air quality risk score")
-    water_quality_risk: Optional[float] = Field(None, description="Water quality risk score")
-    facility_density: Optional[float] = Field(None, description="Nearby facility density score")
-    environmental_justice_risk: Optional[float] = Field(None, description="Environmental justice risk score")
+class PeerNeighbor(BaseModel):
+    """Schema for a stored project scoring next to the analyzed one"""
+    id: int = Field(..., description="Project ID")
+    score: float = Field(..., description="Its score in this category")
+
+class CategoryRanking(BaseModel):
+    """Schema for the rank of one ESG category score among peers"""
+    peers: int = Field(..., description="Number of peer projects")
+    rank: int = Field(..., description="1 for the highest score among peers")
+    percentile: float = Field(..., description="Share of peers scoring lower, ties counted as half")
+    below: List[PeerNeighbor] = Field(..., description="Closest lower-ranked peers, nearest first")
+    above: List[PeerNeighbor] = Field(..., description="Closest higher-ranked peers, nearest first")
+
+class PeerRanking(BaseModel):
+    """Schema for rankings among projects of one projectType or location"""
+    dimension: str = Field(..., description="projectType or location")
+    group: str = Field(..., description="The shared projectType or location")
+    categories: Dict[str, CategoryRanking] = Field(..., description="Ranking per ESG category")
 
 class ESGAnalysisResponse(BaseModel):
     """Schema for the complete ESG analysis response"""
@@ -100,6 +144,7 @@ class ESGAnalysisResponse(BaseModel):
     risks: List[str] = Field(..., description="List of identified risks based on scores")
     epa_data: Optional[EPAEnvironmentalData] = Field(None, description="EPA environmental data")
     location_risks: Optional[LocationRiskMetrics] = Field(None, description="Location-specific risk metrics")
+    rankings: Optional[List[PeerRanking]] = Field(None, description="Percentile ranks among stored peer projects")
 
     model_config = {
         "json_schema_extra": {
@@ -119,11 +164,12 @@ class ESGAnalysisResponse(BaseModel):
                     "Limited alignment with EU standards may restrict funding options"
                 ],
                 "epa_data": {
-                    "air_quality_index": 65.0,
-                    "water_quality_score": 80.0,
                     "nearby_facilities": [],
-                    "compliance_metrics": {},
-                    "environmental_justice_score": 72.5
+                    "compliance_metrics": {
+                        "facilities_within_radius": 3.0,
+                        "radius_km": 10.0,
+                        "nearest_facility_km": 1.248
+                    }
                 },
                 "location_risks": {
                     "air_quality_risk": 35.0,
@@ -133,4 +179,77 @@ class ESGAnalysisResponse(BaseModel):
                 }
             }
         }
-    }
\ No newline at end of file
+    }
+
+class BulkCreateResponse(BaseModel):
+    """Schema for the result of a bulk project import"""
+    ids: List[int] = Field(..., description="Assigned project IDs, in request order")
+    count: int = Field(..., description="Number of projects stored")
+
+class BulkAnalysisRecord(BaseModel):
+    """Schema for one line of a bulk analysis NDJSON response"""
+    index: int = Field(..., description="Position of the project in the request body")
+    projectName: Optional[str] = Field(None, description="Name of the project, when it could be read")
+    result: Optional[ESGAnalysisResponse] = Field(None, description="Analysis result")
+    error: Optional[str] = Field(None, description="Why this project could not be analyzed")
+
+
+class CategoryStats(BaseModel):
+    """Schema for score statistics of one ESG category"""
+    count: int = Field(..., description="Number of scored projects")
+    mean: float = Field(..., description="Mean score")
+    std: float = Field(..., description="Population standard deviation")
+    percentiles: Dict[str, float] = Field(..., description="Scores at the requested percentiles, keyed p25, p50, ...")
+    histogram: List[int] = Field(..., description="Project counts per 10-point score bucket, 0-10 through 90-100")
+
+class GroupStats(BaseModel):
+    """Schema for score statistics of one project group"""
+    group: Optional[str] = Field(None, description="Group value, or null for the whole portfolio")
+    categories: Dict[str, CategoryStats] = Field(..., description="Statistics by ESG category")
+
+class PortfolioStats(BaseModel):
+    """Schema for portfolio-level score statistics"""
+    group_by: str = Field(..., description="Dimension the projects are grouped by")
+    approximate: bool = Field(..., description="Whether percentiles are interpolated from histograms")
+    groups: List[GroupStats] = Field(..., description="Statistics per group")
+
+class ProjectVersion(BaseModel):
+    """Schema for one stored version of a project"""
+    revision: int = Field(..., description="Version number, starting at 1")
+    submitted_at: Optional[datetime] = Field(None, description="When this version was stored")
+    projectType: Optional[str] = Field(None, description="Project type of this version")
+    scoring_version: Optional[str] = Field(None, description="Version of the scoring weights used")
+    scores: Dict[str, Optional[float]] = Field(..., description="Scores of this version")
+    changes: Dict[str, Optional[str]] = Field(
+        ..., description="Answers changed from the previous version; null where an answer was removed"
+    )
+    surveyResponses: Optional[Dict[str, str]] = Field(None, description="All answers of this version, when requested")
+
+class ProjectHistory(BaseModel):
+    """Schema for the version history of a project"""
+    project_id: int = Field(..., description="Project ID")
+    projectName: str = Field(..., description="Name of the project")
+    location: str = Field(..., description="Project location")
+    revision: int = Field(..., description="Current version number")
+    versions: List[ProjectVersion] = Field(..., description="Versions, oldest first")
+
+class WhatIfAction(BaseModel):
+    """Schema for the effect of answering one more question 'A'"""
+    question: int = Field(..., description="Question number")
+    current_answer: Optional[str] = Field(None, description="Current answer ('B'), or null if unanswered")
+    delta: Dict[str, float] = Field(..., description="Score change by category, including total")
+
+class WhatIfPlan(BaseModel):
+    """Schema for a set of questions to answer 'A' together"""
+    questions: List[int] = Field(..., description="Question numbers")
+    delta: Dict[str, float] = Field(..., description="Score change by category, including total")
+    scores: Dict[str, float] = Field(..., description="Scores after the change")
+    exhaustive: bool = Field(..., description="Whether every combination was scored (otherwise beam search)")
+
+class WhatIfResponse(BaseModel):
+    """Schema for a project's what-if analysis"""
+    project_id: int = Field(..., description="Project ID")
+    target: str = Field(..., description="Score the actions and plans are ranked by")
+    scores: Dict[str, float] = Field(..., description="Current scores")
+    actions: List[WhatIfAction] = Field(..., description="Single-answer changes, best first")
+    plans: List[WhatIfPlan] = Field(..., description="Best multi-answer plans, best first")
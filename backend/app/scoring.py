@@ -1,129 +1,313 @@
 # app/scoring.py
+import hashlib
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
 
-class ESGScorer:
-    def __init__(self):
-        self.weights = {
-            'standard_esg': {
-                'weight': 0.35,
-                'questions': range(1, 16),  # Questions 1-15
-                'categories': {
-                    'basic_compliance': {'questions': [1, 2, 3, 4, 5], 'weight': 0.4},
-                    'environmental_practices': {'questions': [6, 7, 8, 9, 10], 'weight': 0.3},
-                    'governance': {'questions': [11, 12, 13, 14, 15], 'weight': 0.3}
-                }
-            },
-            'european_esg': {
-                'weight': 0.25,
-                'questions': range(16, 22),  # Questions 16-21
-                'categories': {
-                    'eu_taxonomy': {'questions': [16, 17], 'weight': 0.4},
-                    'sustainability_reporting': {'questions': [18, 19], 'weight': 0.3},
-                    'stakeholder_engagement': {'questions': [20, 21], 'weight': 0.3}
-                }
-            },
-            'us_esg': {
-                'weight': 0.25,
-                'questions': range(22, 32),  # Questions 22-31
-                'categories': {
-                    'environmental': {'questions': [22, 23, 24, 25], 'weight': 0.4},
-                    'social': {'questions': [26, 27], 'weight': 0.3},
-                    'governance': {'questions': [28, 29, 30, 31], 'weight': 0.3}
-                }
-            },
-            'community_engagement': {
-                'weight': 0.15,
-                'questions': range(32, 36),  # Questions 32-35
-                'categories': {
-                    'public_engagement': {'questions': [32, 33], 'weight': 0.5},
-                    'communication': {'questions': [34, 35], 'weight': 0.5}
-                }
-            }
-        }
+import numpy as np
 
-    def calculate_scores(self, survey_responses: dict) -> dict:
-        """Calculate ESG scores based on survey responses"""
-        try:
-            scores = {}
-            total_score = 0
+from .config import settings
+from .recommendations import get_rules
+from .scoring_config import file_signature, load_weights
 
-            # Convert string question IDs to integers
-            responses = {int(k): v for k, v in survey_responses.items()}
+logger = logging.getLogger(__name__)
 
-            for category, config in self.weights.items():
-                category_score = self._calculate_category_score(responses, config)
-                scores[category] = round(category_score, 2)
-                total_score += category_score * config['weight']
+NUM_QUESTIONS = 35
 
-            scores['total'] = round(total_score, 2)
-            return scores
-        except Exception as e:
-            print(f"Error in calculate_scores: {str(e)}")
-            raise
 
-    def _calculate_category_score(self, responses: dict, config: dict) -> float:
-        """Calculate score for a specific category"""
+@dataclass(frozen=True, eq=False)
+class ScoringPlan:
+    """Weight tree compiled into dense, read-only matrices.
+
+    Question ``q`` maps to column ``q - 1``. ``membership`` is a
+    (questions x subcategories) 0/1 matrix, ``subcategory_weights`` a
+    (subcategories x categories) matrix holding each subcategory's weight
+    in its category, and ``category_weights`` the weight of each category
+    in the total score. ``version`` hashes the compiled matrices, so
+    anything derived from scores can tell when the weights changed.
+    """
+    version: str
+    weights: dict
+    categories: Tuple[str, ...]
+    subcategories: Tuple[Tuple[str, str], ...]
+    membership: np.ndarray
+    subcategory_weights: np.ndarray
+    category_weights: np.ndarray
+
+    @property
+    def metrics(self) -> Tuple[str, ...]:
+        """Score names rules can test: each category, 'total' and 'category.subcategory'"""
+        return self.categories + ('total',) + tuple(f"{c}.{s}" for c, s in self.subcategories)
+
+
+def compile_weights(weights: dict) -> ScoringPlan:
+    """Compile a nested weight dict into a ScoringPlan"""
+    categories = tuple(weights)
+    subcategories = tuple(
+        (category, subcategory)
+        for category, config in weights.items()
+        for subcategory in config['subcategories']
+    )
+
+    membership = np.zeros((NUM_QUESTIONS, len(subcategories)))
+    subcategory_weights = np.zeros((len(subcategories), len(categories)))
+    category_weights = np.zeros(len(categories))
+
+    column = 0
+    for c, (category, config) in enumerate(weights.items()):
+        category_weights[c] = config['weight']
+        for subconfig in config['subcategories'].values():
+            for question in subconfig['questions']:
+                if not 1 <= question <= NUM_QUESTIONS:
+                    raise ValueError(f"Question {question} in '{category}' is out of range")
+                membership[question - 1, column] = 1
+            subcategory_weights[column, c] = subconfig['weight']
+            column += 1
+
+    for array in (membership, subcategory_weights, category_weights):
+        array.flags.writeable = False
+
+    return ScoringPlan(
+        version=plan_version(categories, membership, subcategory_weights, category_weights),
+        weights=weights,
+        categories=categories,
+        subcategories=subcategories,
+        membership=membership,
+        subcategory_weights=subcategory_weights,
+        category_weights=category_weights,
+    )
+
+
+def plan_version(categories: Tuple[str, ...], *arrays: np.ndarray) -> str:
+    """Short content hash of everything that affects computed scores.
+
+    Subcategory names are deliberately left out; renaming one does not
+    make stored scores stale.
+    """
+    digest = hashlib.sha256(",".join(categories).encode())
+    for array in arrays:
+        digest.update(np.ascontiguousarray(array, dtype=np.float64).tobytes())
+    return digest.hexdigest()[:12]
+
+
+_active_plan: Optional[ScoringPlan] = None
+_plan_lock = threading.Lock()
+# SCORING_CONFIG_PATH's file_signature() when last loaded, and when it was last checked
+_plan_signature = None
+_plan_checked_at = 0.0
+
+
+def get_plan() -> ScoringPlan:
+    """The shared scoring plan, compiled on first use.
+
+    Every process re-reads SCORING_CONFIG_PATH on its own once the file
+    changes, checking at most every CONFIG_CHECK_INTERVAL seconds, so all
+    server workers follow an edit.
+    """
+    plan = _active_plan
+    if plan is None:
+        with _plan_lock:
+            if _active_plan is None:
+                signature = file_signature(settings.SCORING_CONFIG_PATH)
+                _set_plan(compile_weights(load_weights(settings.SCORING_CONFIG_PATH)), signature)
+            plan = _active_plan
+    elif time.monotonic() - _plan_checked_at >= settings.CONFIG_CHECK_INTERVAL:
+        plan = _follow_config_file()
+    return plan
+
+
+def reload_plan(path: Optional[str] = None) -> ScoringPlan:
+    """Load, validate and compile a weights file, then swap it in atomically.
+
+    In-flight scoring keeps the plan it started with. If the file is
+    invalid a ValueError is raised and the current plan stays active.
+    """
+    path = path or settings.SCORING_CONFIG_PATH
+    signature = file_signature(path)
+    plan = compile_weights(load_weights(path))
+    with _plan_lock:
+        _set_plan(plan, signature)
+    return plan
+
+
+def _follow_config_file() -> ScoringPlan:
+    global _plan_checked_at, _plan_signature
+    with _plan_lock:
+        _plan_checked_at = time.monotonic()
+        signature = file_signature(settings.SCORING_CONFIG_PATH)
+        if signature == _plan_signature or signature is None:
+            return _active_plan
+        # Not retried until the file changes again
+        _plan_signature = signature
+    try:
+        plan = reload_plan()
+    except (OSError, ValueError, KeyError) as e:
+        logger.error("Edited scoring config not loaded: %s", e)
+        return _active_plan
+    logger.info("Scoring config reloaded", extra={"version": plan.version})
+    return plan
+
+
+def _set_plan(plan: ScoringPlan, signature=None) -> None:
+    global _active_plan, _plan_signature
+    _active_plan = plan
+    _plan_signature = signature
+
+
+_QUESTION_COLUMNS = {str(q): q - 1 for q in range(1, NUM_QUESTIONS + 1)}
+
+
+def encode_responses(responses: List[dict]) -> Tuple[np.ndarray, np.ndarray]:
+    """Encode survey responses as (yes, answered) boolean arrays of shape (N, 35).
+
+    Matches the scalar scoring rules: any answer counts as answered, only
+    'A' counts as yes, and question ids outside 1-35 are ignored.
+    """
+    rows, columns, values = [], [], []
+    for row, survey_responses in enumerate(responses):
+        for key, value in survey_responses.items():
+            column = _QUESTION_COLUMNS.get(key)
+            if column is None:
+                # Non-canonical ids such as "07" still go through int()
+                question = int(key)
+                if not 1 <= question <= NUM_QUESTIONS:
+                    continue
+                column = question - 1
+            rows.append(row)
+            columns.append(column)
+            values.append(value == 'A')
+
+    yes = np.zeros((len(responses), NUM_QUESTIONS), dtype=bool)
+    answered = np.zeros((len(responses), NUM_QUESTIONS), dtype=bool)
+    answered[rows, columns] = True
+    yes[rows, columns] = values
+    return yes, answered
+
+
+# Bit q - 1 of a survey mask stands for question q
+_QUESTION_BITS = np.left_shift(np.int64(1), np.arange(NUM_QUESTIONS, dtype=np.int64))
+
+
+def masks_from_arrays(yes: np.ndarray, answered: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Pack (N, 35) boolean arrays into (answered, yes) int64 bitmasks"""
+    return answered.astype(np.int64) @ _QUESTION_BITS, yes.astype(np.int64) @ _QUESTION_BITS
+
+
+def arrays_from_masks(answered_masks, yes_masks) -> Tuple[np.ndarray, np.ndarray]:
+    """Unpack (answered, yes) bitmasks into (yes, answered) boolean arrays of shape (N, 35)"""
+    answered_masks = np.asarray(answered_masks, dtype=np.int64).reshape(-1, 1)
+    yes_masks = np.asarray(yes_masks, dtype=np.int64).reshape(-1, 1)
+    return (yes_masks & _QUESTION_BITS) != 0, (answered_masks & _QUESTION_BITS) != 0
+
+
+def encode_masks(survey_responses: dict) -> Tuple[int, int]:
+    """(answered, yes) bitmasks of one survey; any answer other than 'A' is stored as 'B'"""
+    answered, yes = masks_from_arrays(*encode_responses([survey_responses]))
+    return int(answered[0]), int(yes[0])
+
+
+def decode_masks(answered: int, yes: int) -> dict:
+    """Survey responses dict for a pair of bitmasks"""
+    return {
+        str(q): 'A' if yes >> (q - 1) & 1 else 'B'
+        for q in range(1, NUM_QUESTIONS + 1)
+        if answered >> (q - 1) & 1
+    }
+
+
+class ESGScorer:
+    """Scores surveys with the shared scoring plan.
+
+    Scorers hold no weights of their own; every instance reads the plan
+    from get_plan(), so a reload applies to all of them at once.
+    """
+
+    @property
+    def plan(self) -> ScoringPlan:
+        return get_plan()
+
+    @property
+    def weights(self) -> dict:
+        return self.plan.weights
+
+    def calculate_scores(self, survey_responses: dict) -> dict:
+        """Calculate ESG scores based on survey responses"""
         try:
-            category_score = 0
-            for subcategory, subconfig in config['categories'].items():
-                subcategory_score = 0
-                relevant_questions = subconfig['questions']
-                answered_questions = 0
-
-                for question in relevant_questions:
-                    if question in responses:
-                        if responses[question] == 'A':
-                            subcategory_score += 1
-                        answered_questions += 1
-
-                if answered_questions > 0:
-                    subcategory_score = (subcategory_score / answered_questions) * 100
-                    category_score += subcategory_score * subconfig['weight']
-
-            return category_score
+            return self.score_batch([survey_responses])[0]
         except Exception as e:
-            print(f"Error in _calculate_category_score: {str(e)}")
+            logger.warning("Error in calculate_scores: %s", e)
             raise
 
-    def generate_recommendations(self, scores: dict) -> list:
-        """Generate recommendations based on scores"""
-        recommendations = []
-
-        if scores['standard_esg'] < 70:
-            recommendations.append(
-                "Improve basic ESG compliance measures, including materials recycling and workforce development programs."
-            )
-
-        if scores['european_esg'] < 70:
-            recommendations.append(
-                "Enhance alignment with EU Taxonomy and CSRD reporting requirements."
-            )
+    def score_arrays(self, yes: np.ndarray, answered: np.ndarray, plan: Optional[ScoringPlan] = None) -> np.ndarray:
+        """Score encoded responses; returns an unrounded (N, categories + 1) array.
 
-        if scores['us_esg'] < 70:
-            recommendations.append(
-                "Strengthen environmental and social impact measures to meet US standards."
-            )
+        The last column is the weighted total. Question counts come from one
+        matrix product; the weighted sums are accumulated column by column in
+        the same order as the weight tree so results match the scalar path
+        bit for bit.
+        """
+        plan = plan or self.plan  # read once so a concurrent reload cannot mix two plans
+        subcategory_scores = self.subcategory_arrays(yes, answered, plan)
 
-        if scores['community_engagement'] < 70:
-            recommendations.append(
-                "Develop more robust community engagement and communication strategies."
-            )
+        scores = np.zeros((len(subcategory_scores), len(plan.categories) + 1))
+        for s, c in zip(*np.nonzero(plan.subcategory_weights)):
+            scores[:, c] += subcategory_scores[:, s] * plan.subcategory_weights[s, c]
+        for c, weight in enumerate(plan.category_weights):
+            scores[:, -1] += scores[:, c] * weight
+        return scores
 
-        return recommendations
+    def subcategory_arrays(self, yes: np.ndarray, answered: np.ndarray, plan: Optional[ScoringPlan] = None) -> np.ndarray:
+        """Unrounded (N, subcategories) scores: the share of answered questions answered 'A'"""
+        plan = plan or self.plan
+        yes_counts = yes.astype(np.float64) @ plan.membership
+        answered_counts = answered.astype(np.float64) @ plan.membership
+        return np.divide(
+            yes_counts,
+            answered_counts,
+            out=np.zeros_like(yes_counts),
+            where=answered_counts > 0,
+        ) * 100
 
-    def identify_risks(self, scores: dict) -> list:
-        """Identify risk factors based on scores"""
-        risks = []
+    def subcategory_batch(self, responses: List[dict]) -> List[dict]:
+        """Rounded subcategory scores keyed ``category.subcategory``"""
+        if not responses:
+            return []
+        plan = self.plan
+        names = [f"{category}.{subcategory}" for category, subcategory in plan.subcategories]
+        return [
+            {name: round(value, 2) for name, value in zip(names, row)}
+            for row in self.subcategory_arrays(*encode_responses(responses), plan=plan).tolist()
+        ]
 
-        if scores['standard_esg'] < 50:
-            risks.append("Critical ESG compliance gaps may affect project viability")
+    def score_batch(self, responses: List[dict]) -> List[dict]:
+        """Calculate ESG scores for many survey responses at once"""
+        if not responses:
+            return []
+        plan = self.plan
+        return self._score_dicts(self.score_arrays(*encode_responses(responses), plan=plan), plan)
 
-        if scores['european_esg'] < 50:
-            risks.append("Limited alignment with EU standards may restrict funding options")
+    def score_masks(self, answered_masks, yes_masks) -> List[dict]:
+        """score_batch() for surveys stored as bitmasks, without building dicts"""
+        if not len(answered_masks):
+            return []
+        plan = self.plan
+        return self._score_dicts(self.score_arrays(*arrays_from_masks(answered_masks, yes_masks), plan=plan), plan)
 
-        if scores['us_esg'] < 50:
-            risks.append("Below-standard US ESG practices pose regulatory risks")
+    @staticmethod
+    def _score_dicts(scores: np.ndarray, plan: ScoringPlan) -> List[dict]:
+        fields = plan.categories + ('total',)
+        # Python's round() (not np.round) so values match calculate_scores exactly
+        return [
+            {field: round(value, 2) for field, value in zip(fields, row)}
+            for row in scores.tolist()
+        ]
 
-        if scores['community_engagement'] < 50:
-            risks.append("Insufficient community engagement may lead to project opposition")
+    def generate_recommendations(self, scores: dict, project_type: Optional[str] = None) -> list:
+        """Recommendations from the rule set for these scores"""
+        return get_rules().evaluate(scores, project_type)[0]
 
-        return risks
\ No newline at end of file
+    def identify_risks(self, scores: dict, project_type: Optional[str] = None) -> list:
+        """Risk factors from the rule set for these scores"""
+        return get_rules().evaluate(scores, project_type)[1]
@@ -0,0 +1,293 @@
+# app/scoring_config.py
+import json
+import os
+from typing import Iterable, Optional, Tuple
+
+# Default scoring weights. Override at runtime with a JSON file of the same
+# shape (see load_weights); question lists must be plain lists there.
+
+ESG_WEIGHTS = {
+    'standard_esg': {
+        'weight': 0.35,
+        'questions': range(1, 16),
+        'subcategories': {
+            'basic_compliance': {
+                'questions': [1, 2, 3, 4, 5],
+                'weight': 0.4
+            },
+            'environmental_practices': {
+                'questions': [6, 7, 8, 9, 10],
+                'weight': 0.3
+            },
+            'documentation_reporting': {
+                'questions': [11, 12, 13, 14, 15],
+                'weight': 0.30
+            }
+        }
+    },
+    'european_esg': {
+        'weight': 0.25,
+        'questions': range(16, 22),
+        'subcategories': {
+            'eu_taxonomy': {
+                'questions': [16, 17],
+                'weight': 0.4
+            },
+            'sustainability_reporting': {
+                'questions': [18, 19],
+                'weight': 0.3
+            },
+            'stakeholder_engagement': {
+                'questions': [20, 21],
+                'weight': 0.3
+            }
+        }
+    },
+    'us_esg': {
+        'weight': 0.25,
+        'questions': range(22, 32),
+        'subcategories': {
+            'environmental': {
+                'questions': [22, 23, 24, 25],
+                'weight': 0.4
+            },
+            'social': {
+                'questions': [26, 27],
+                'weight': 0.3
+            },
+            'governance': {
+                'questions': [28, 29, 30, 31],
+                'weight': 0.3
+            }
+        }
+    },
+    'community_engagement': {
+        'weight': 0.15,
+        'questions': range(32, 36),
+        'subcategories': {
+            'engagement_history': {
+                'questions': [32, 33],
+                'weight': 0.5
+            },
+            'public_communication': {
+                'questions': [34, 35],
+                'weight': 0.5
+            }
+        }
+    }
+}
+
+PROJECT_TYPES = [
+    'solar_utility',
+    'solar_commercial',
+    'solar_residential',
+    'wind_onshore',
+    'wind_offshore',
+    'bioenergy',
+    'geothermal',
+    'hydroelectric',
+    'energy_storage',
+    'hydrogen',
+    'other'
+]
+
+# Specific recommendations based on project type and scores
+PROJECT_TYPE_RECOMMENDATIONS = {
+    'solar_utility': {
+        'low_score': [
+            "Implement comprehensive land use and biodiversity assessment protocols",
+            "Develop robust community engagement strategy for utility-scale installations",
+            "Establish recycling programs for solar panels and materials"
+        ],
+        'medium_score': [
+            "Enhance monitoring systems for environmental impact",
+            "Strengthen stakeholder communication channels",
+            "Consider additional certifications for sustainability practices"
+        ]
+    },
+    'wind_onshore': {
+        'low_score': [
+            "Conduct detailed wildlife impact assessments",
+            "Implement noise reduction measures",
+            "Develop community benefit sharing programs"
+        ],
+        'medium_score': [
+            "Enhance bird and bat monitoring systems",
+            "Strengthen community engagement processes",
+            "Improve supply chain sustainability"
+        ]
+    }
+    # Add similar recommendations for other project types
+}
+
+# Total-score bands that select a project type's low_score/medium_score list
+PROJECT_TYPE_SCORE_BANDS = {
+    'low_score': {'below': 50},
+    'medium_score': {'at_least': 50, 'below': 70},
+}
+
+# Threshold rules: a rule fires when at_least <= score of `metric` < below.
+# `metric` is a category, 'total' or 'category.subcategory'; `project_types`
+# limits a rule to those types.
+RECOMMENDATION_RULES = [
+    {
+        'kind': 'recommendation',
+        'metric': 'standard_esg',
+        'below': 70,
+        'message': "Improve basic ESG compliance measures, including materials recycling and workforce development programs."
+    },
+    {
+        'kind': 'recommendation',
+        'metric': 'european_esg',
+        'below': 70,
+        'message': "Enhance alignment with EU Taxonomy and CSRD reporting requirements."
+    },
+    {
+        'kind': 'recommendation',
+        'metric': 'us_esg',
+        'below': 70,
+        'message': "Strengthen environmental and social impact measures to meet US standards."
+    },
+    {
+        'kind': 'recommendation',
+        'metric': 'community_engagement',
+        'below': 70,
+        'message': "Develop more robust community engagement and communication strategies."
+    },
+    {
+        'kind': 'risk',
+        'metric': 'standard_esg',
+        'below': 50,
+        'message': "Critical ESG compliance gaps may affect project viability"
+    },
+    {
+        'kind': 'risk',
+        'metric': 'european_esg',
+        'below': 50,
+        'message': "Limited alignment with EU standards may restrict funding options"
+    },
+    {
+        'kind': 'risk',
+        'metric': 'us_esg',
+        'below': 50,
+        'message': "Below-standard US ESG practices pose regulatory risks"
+    },
+    {
+        'kind': 'risk',
+        'metric': 'community_engagement',
+        'below': 50,
+        'message': "Insufficient community engagement may lead to project opposition"
+    },
+]
+
+
+def file_signature(path: Optional[str]) -> Optional[Tuple[int, int]]:
+    """(mtime_ns, size) of a config file; None for the built-in defaults or a missing file"""
+    if path is None:
+        return None
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def load_weights(path: Optional[str] = None) -> dict:
+    """Load and validate scoring weights from a JSON file, or the defaults above"""
+    if path is None:
+        weights = ESG_WEIGHTS
+    else:
+        with open(path) as f:
+            weights = json.load(f)
+    validate_weights(weights)
+    return weights
+
+
+def validate_weights(weights: dict) -> None:
+    """Raise ValueError unless the weight tree is complete and consistent"""
+    if not weights:
+        raise ValueError("Scoring config defines no categories")
+
+    _check_weight_sum("categories", [config.get('weight') for config in weights.values()])
+    seen = {}
+    for category, config in weights.items():
+        subcategories = config.get('subcategories')
+        if not subcategories:
+            raise ValueError(f"Category '{category}' defines no subcategories")
+        _check_weight_sum(
+            f"subcategories of '{category}'",
+            [subconfig.get('weight') for subconfig in subcategories.values()]
+        )
+        allowed = set(config.get('questions', ()))
+        for subcategory, subconfig in subcategories.items():
+            for question in subconfig.get('questions', ()):
+                if not isinstance(question, int) or not 1 <= question <= 35:
+                    raise ValueError(f"Invalid question {question!r} in '{category}.{subcategory}'")
+                if allowed and question not in allowed:
+                    raise ValueError(f"Question {question} in '{category}.{subcategory}' is outside its category")
+                if question in seen:
+                    raise ValueError(f"Question {question} is used by both '{seen[question]}' and '{category}.{subcategory}'")
+                seen[question] = f"{category}.{subcategory}"
+
+
+def load_rules(path: Optional[str] = None, metrics: Optional[Iterable[str]] = None) -> dict:
+    """Load and validate recommendation rules from a JSON file, or the defaults above.
+
+    The file holds ``rules`` and optionally ``project_type_recommendations``
+    and ``project_type_score_bands``, shaped like the constants above. Pass
+    the scoring plan's ``metrics`` to reject rules on scores it does not produce.
+    """
+    if path is None:
+        config = {}
+    else:
+        with open(path) as f:
+            config = json.load(f)
+    rules = {
+        'rules': config.get('rules', RECOMMENDATION_RULES),
+        'project_type_recommendations': config.get('project_type_recommendations', PROJECT_TYPE_RECOMMENDATIONS),
+        'project_type_score_bands': config.get('project_type_score_bands', PROJECT_TYPE_SCORE_BANDS),
+    }
+    validate_rules(rules, metrics)
+    return rules
+
+
+def validate_rules(rules: dict, metrics: Optional[Iterable[str]] = None) -> None:
+    """Raise ValueError unless every rule and score band is well formed"""
+    metrics = set(metrics) if metrics is not None else None
+    for i, rule in enumerate(rules['rules']):
+        if rule.get('kind') not in ('recommendation', 'risk'):
+            raise ValueError(f"Rule {i} has kind {rule.get('kind')!r}, expected 'recommendation' or 'risk'")
+        if not isinstance(rule.get('metric'), str) or not isinstance(rule.get('message'), str):
+            raise ValueError(f"Rule {i} needs a metric and a message")
+        if metrics is not None and rule['metric'] not in metrics:
+            raise ValueError(f"Rule {i} uses unknown metric '{rule['metric']}'")
+        _check_band(f"rule {i}", rule)
+        project_types = rule.get('project_types')
+        if project_types is not None and (not project_types or not all(isinstance(t, str) for t in project_types)):
+            raise ValueError(f"Rule {i} project_types must be a non-empty list of strings")
+
+    bands = rules['project_type_score_bands']
+    for band, bounds in bands.items():
+        _check_band(f"score band '{band}'", bounds)
+    for project_type, lists in rules['project_type_recommendations'].items():
+        for band, messages in lists.items():
+            if band not in bands:
+                raise ValueError(f"Recommendations for '{project_type}' use unknown score band '{band}'")
+            if not all(isinstance(message, str) for message in messages):
+                raise ValueError(f"Recommendations for '{project_type}' ({band}) must be strings")
+
+
+def _check_band(label: str, bounds: dict) -> None:
+    at_least, below = bounds.get('at_least'), bounds.get('below')
+    for value in (at_least, below):
+        if value is not None and not isinstance(value, (int, float)):
+            raise ValueError(f"Bounds of {label} must be numbers")
+    if at_least is not None and below is not None and at_least >= below:
+        raise ValueError(f"Bounds of {label} are empty: at_least {at_least} >= below {below}")
+
+
+def _check_weight_sum(label: str, values: list) -> None:
+    if any(not isinstance(value, (int, float)) or value < 0 for value in values):
+        raise ValueError(f"Weights of {label} must be non-negative numbers")
+    if abs(sum(values) - 1) > 1e-6:
+        raise ValueError(f"Weights of {label} sum to {sum(values)}, expected 1")
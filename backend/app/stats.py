@@ -0,0 +1,195 @@
+# app/stats.py
+"""Portfolio score statistics.
+
+Dashboards read ``score_rollups``, a per-group histogram table that is
+updated in the same transaction as every project insert or revision, so
+queries cost O(groups) rather than O(projects). Exact statistics are
+computed straight from ``projects`` with SQL aggregates and window
+functions.
+
+Rebuild the rollups from scratch (e.g. after restoring a backup) with:
+
+    python -m app.stats --rebuild
+"""
+import argparse
+import math
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+from sqlalchemy import case, delete, func, literal, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from . import models
+from .database import SessionLocal
+from .crud import BUCKET_WIDTH, DIMENSIONS, NUM_BUCKETS, SCORE_COLUMNS, bucket_expression
+
+DEFAULT_PERCENTILES = (25, 50, 75, 90)
+
+
+def rebuild_rollups(db: Session) -> None:
+    """Recompute every rollup row from the projects table in SQL, then commit"""
+    db.execute(delete(models.ScoreRollup))
+    for dimension in DIMENSIONS:
+        group = literal("") if dimension == "all" else func.coalesce(getattr(models.Project, dimension), "")
+        for category, column_name in SCORE_COLUMNS.items():
+            score = getattr(models.Project, column_name)
+            bucket = bucket_expression(score, db.bind.dialect.name)
+            aggregate = (
+                select(
+                    literal(dimension),
+                    group,
+                    literal(category),
+                    bucket,
+                    func.count(),
+                    func.sum(score),
+                    func.sum(score * score),
+                )
+                .where(score.is_not(None))
+                .group_by(group, bucket)
+            )
+            db.execute(
+                models.ScoreRollup.__table__.insert().from_select(
+                    ["dimension", "group_value", "category", "bucket", "count", "score_sum", "score_sq_sum"],
+                    aggregate,
+                )
+            )
+    db.commit()
+
+
+async def rollup_stats(db: AsyncSession, dimension: str, percentiles=DEFAULT_PERCENTILES) -> List[dict]:
+    """Per-group statistics from the rollup table.
+
+    Means and standard deviations are exact; percentiles are interpolated
+    within the 10-point histogram buckets.
+    """
+    rows = await db.execute(
+        select(
+            models.ScoreRollup.group_value,
+            models.ScoreRollup.category,
+            models.ScoreRollup.bucket,
+            models.ScoreRollup.count,
+            models.ScoreRollup.score_sum,
+            models.ScoreRollup.score_sq_sum,
+        )
+        .where(models.ScoreRollup.dimension == dimension)
+        # Buckets emptied by project revisions stay behind with a zero count
+        .where(models.ScoreRollup.count > 0)
+        .order_by(models.ScoreRollup.group_value)
+    )
+
+    groups: Dict[str, Dict[str, dict]] = defaultdict(dict)
+    for group_value, category, bucket, count, score_sum, score_sq_sum in rows:
+        stats = groups[group_value].setdefault(
+            category, {"count": 0, "sum": 0.0, "sq_sum": 0.0, "histogram": [0] * NUM_BUCKETS}
+        )
+        stats["count"] += count
+        stats["sum"] += score_sum
+        stats["sq_sum"] += score_sq_sum
+        stats["histogram"][bucket] += count
+
+    return [
+        {
+            "group": None if dimension == "all" else group_value,
+            "categories": {
+                category: _summarize_histogram(stats, percentiles)
+                for category, stats in categories.items()
+            },
+        }
+        for group_value, categories in groups.items()
+    ]
+
+
+def _summarize_histogram(stats: dict, percentiles) -> dict:
+    count = stats["count"]
+    mean = stats["sum"] / count
+    variance = max(stats["sq_sum"] / count - mean * mean, 0.0)
+    return {
+        "count": count,
+        "mean": round(mean, 2),
+        "std": round(math.sqrt(variance), 2),
+        "percentiles": {
+            f"p{p}": round(_histogram_percentile(stats["histogram"], count, p), 2)
+            for p in percentiles
+        },
+        "histogram": stats["histogram"],
+    }
+
+
+def _histogram_percentile(histogram: List[int], count: int, percentile: float) -> float:
+    target = percentile / 100 * count
+    cumulative = 0
+    for bucket, bucket_count in enumerate(histogram):
+        if bucket_count and cumulative + bucket_count >= target:
+            return (bucket + (target - cumulative) / bucket_count) * BUCKET_WIDTH
+        cumulative += bucket_count
+    return float(NUM_BUCKETS * BUCKET_WIDTH)
+
+
+async def exact_stats(db: AsyncSession, dimension: str, percentiles=DEFAULT_PERCENTILES) -> List[dict]:
+    """Per-group statistics computed directly from projects in SQL.
+
+    Percentiles use the nearest-rank method over a window function, so the
+    database does the sorting. This scans the projects table; prefer
+    rollup_stats for dashboards.
+    """
+    groups: Dict[Optional[str], dict] = defaultdict(dict)
+    for category, column_name in SCORE_COLUMNS.items():
+        score = getattr(models.Project, column_name)
+        group = literal("") if dimension == "all" else func.coalesce(getattr(models.Project, dimension), "")
+        ranked = (
+            select(
+                group.label("group_value"),
+                score.label("score"),
+                func.row_number().over(partition_by=group, order_by=score).label("rank"),
+                func.count().over(partition_by=group).label("total"),
+            )
+            .where(score.is_not(None))
+            .subquery()
+        )
+        bucket = bucket_expression(ranked.c.score, db.bind.dialect.name)
+        columns = [
+            ranked.c.group_value,
+            func.count().label("count"),
+            func.avg(ranked.c.score).label("mean"),
+            (func.avg(ranked.c.score * ranked.c.score) - func.avg(ranked.c.score) * func.avg(ranked.c.score)).label("variance"),
+        ]
+        # Nearest rank: the smallest score whose rank reaches p% of the group
+        columns += [
+            func.min(case((ranked.c.rank * 100 >= p * ranked.c.total, ranked.c.score))).label(f"p{p}")
+            for p in percentiles
+        ]
+        columns += [
+            func.sum(case((bucket == b, 1), else_=0)).label(f"bucket_{b}")
+            for b in range(NUM_BUCKETS)
+        ]
+        result = await db.execute(select(*columns).group_by(ranked.c.group_value).order_by(ranked.c.group_value))
+        for row in result.mappings():
+            groups[row["group_value"]][category] = {
+                "count": row["count"],
+                "mean": round(row["mean"], 2),
+                "std": round(math.sqrt(max(row["variance"], 0.0)), 2),
+                "percentiles": {f"p{p}": row[f"p{p}"] for p in percentiles},
+                "histogram": [row[f"bucket_{b}"] for b in range(NUM_BUCKETS)],
+            }
+
+    return [
+        {"group": None if dimension == "all" else group_value, "categories": categories}
+        for group_value, categories in groups.items()
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Maintain the score_rollups summary table")
+    parser.add_argument("--rebuild", action="store_true", help="Recompute all rollups from projects")
+    args = parser.parse_args()
+    if args.rebuild:
+        with SessionLocal() as db:
+            rebuild_rollups(db)
+        print("score_rollups rebuilt", flush=True)
+    else:
+        parser.print_help()
+
+
+if __name__ == "__main__":
+    main()
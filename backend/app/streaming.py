@@ -0,0 +1,228 @@
+# app/streaming.py
+import codecs
+import json
+import re
+from typing import Any, AsyncIterator, List, Optional, Tuple
+
+from starlette.responses import StreamingResponse
+
+# Largest single JSON document we are willing to buffer while waiting for it to complete
+MAX_DOCUMENT_SIZE = 1024 * 1024
+
+
+class JSONDocumentError(ValueError):
+    """A single input document could not be parsed"""
+
+
+class NDJSONResponse(StreamingResponse):
+    """Streaming NDJSON response that can be sent while the request body is still being read.
+
+    Starlette's StreamingResponse listens for client disconnects by calling
+    ``receive()`` concurrently, which would swallow request body chunks the
+    body generator still has to read.
+    """
+    media_type = "application/x-ndjson"
+
+    async def __call__(self, scope, receive, send) -> None:
+        await self.stream_response(send)
+
+
+async def iter_json_documents(chunks: AsyncIterator[bytes]) -> AsyncIterator[Tuple[int, Any]]:
+    """Parse a streamed NDJSON body or JSON array one document at a time.
+
+    Yields ``(index, document)`` pairs. A document that fails to parse, or
+    grows past MAX_DOCUMENT_SIZE, is yielded as a JSONDocumentError instead
+    and the documents after it are still parsed, so callers can report it
+    and move on. Only the current line (or array element) is held in memory.
+    """
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    parser = None
+    index = 0
+
+    async for chunk in chunks:
+        text = decoder.decode(chunk)
+        if parser is None:
+            text = text.lstrip()
+            if not text:
+                continue
+            parser = _ArrayParser() if text[0] == "[" else _LineParser()
+            if isinstance(parser, _ArrayParser):
+                text = text[1:]
+        for document in parser.feed(text):
+            yield index, document
+            index += 1
+        if parser.done:
+            return
+
+    if parser is not None:
+        for document in parser.feed(decoder.decode(b"", final=True)) + parser.finish():
+            yield index, document
+            index += 1
+
+
+def _parse(text: str) -> Any:
+    try:
+        return json.loads(text)
+    except json.JSONDecodeError as e:
+        return JSONDocumentError(f"Invalid JSON: {e}")
+
+
+class _LineParser:
+    """Splits an NDJSON body into documents, one per non-blank line"""
+
+    done = False
+
+    def __init__(self):
+        self._buffer = ""
+        # Set while dropping the rest of a line that exceeded MAX_DOCUMENT_SIZE
+        self._skipping = False
+
+    def feed(self, text: str) -> List[Any]:
+        *lines, self._buffer = (self._buffer + text).split("\n")
+        documents = []
+        for line in lines:
+            if self._skipping:
+                self._skipping = False
+            elif len(line) > MAX_DOCUMENT_SIZE:
+                documents.append(JSONDocumentError("Line exceeds the maximum document size"))
+            elif line.strip():
+                documents.append(_parse(line))
+        if len(self._buffer) > MAX_DOCUMENT_SIZE:
+            if not self._skipping:
+                documents.append(JSONDocumentError("Line exceeds the maximum document size"))
+                self._skipping = True
+            self._buffer = ""
+        return documents
+
+    def finish(self) -> List[Any]:
+        if self._skipping or not self._buffer.strip():
+            return []
+        return [_parse(self._buffer)]
+
+
+# Characters that can end or nest an array element, and those that matter inside a string
+_STRUCTURAL = re.compile(r'[\[\]{},"]')
+_STRING_SPECIAL = re.compile(r'["\\]')
+_WHITESPACE = re.compile(r"[ \t\r\n]*")
+
+
+class _ArrayParser:
+    """Splits the body of a streamed JSON array into its elements.
+
+    Well-formed elements are decoded directly. Anything else is delimited
+    by scanning for the comma or closing bracket outside any string or
+    nested value, so a malformed element is reported and parsing resumes
+    after it. An element that grows past MAX_DOCUMENT_SIZE is reported at
+    once and skipped.
+    """
+
+    def __init__(self):
+        self.done = False
+        self._decoder = json.JSONDecoder()
+        # Text of the current element from its start; scanned up to _scan
+        # once it could not be decoded directly
+        self._buffer = ""
+        self._scan = 0
+        self._depth = 0
+        self._in_string = False
+        self._oversized = False
+
+    def feed(self, text: str) -> List[Any]:
+        self._buffer += text
+        documents = []
+        while not self.done:
+            if self._scan == 0 and not self._oversized:
+                decoded = self._decode_element()
+                if decoded is not None:
+                    document, end = decoded
+                    documents.append(document)
+                    self._end_element(end)
+                    continue
+            boundary = self._find_boundary()
+            if boundary is None:
+                break
+            if self._oversized:
+                self._oversized = False
+            elif boundary > MAX_DOCUMENT_SIZE:
+                documents.append(JSONDocumentError("Array element exceeds the maximum document size"))
+            elif self._buffer[:boundary].strip():
+                documents.append(_parse(self._buffer[:boundary]))
+            self._end_element(boundary)
+
+        if not self.done and len(self._buffer) > MAX_DOCUMENT_SIZE:
+            if not self._oversized:
+                documents.append(JSONDocumentError("Array element exceeds the maximum document size"))
+                self._oversized = True
+            # Keep only what is not scanned yet (at most a dangling escape)
+            self._buffer, self._scan = self._buffer[self._scan:], 0
+        return documents
+
+    def finish(self) -> List[Any]:
+        if self.done:
+            return []
+        documents = []
+        if self._buffer.strip() and not self._oversized:
+            documents.append(_parse(self._buffer))
+        documents.append(JSONDocumentError("Unterminated JSON array"))
+        return documents
+
+    def _decode_element(self) -> Optional[Tuple[Any, int]]:
+        """(element, offset of the "," or "]" after it), or None to fall back to scanning"""
+        buffer = self._buffer
+        start = _WHITESPACE.match(buffer).end()
+        if start == len(buffer) or buffer[start] in ",]":
+            # Empty so far, or an empty element that scanning skips
+            return None
+        try:
+            document, end = self._decoder.raw_decode(buffer, start)
+        except json.JSONDecodeError:
+            return None
+        if end - start > MAX_DOCUMENT_SIZE:
+            # Arrived in one piece, but held to the same limit as one that was buffered
+            document = JSONDocumentError("Array element exceeds the maximum document size")
+        end = _WHITESPACE.match(buffer, end).end()
+        if end == len(buffer) or buffer[end] not in ",]":
+            # Not followed by a separator yet: wait for more text, or scan for the element's end
+            return None
+        return document, end
+
+    def _end_element(self, boundary: int) -> None:
+        self.done = self._buffer[boundary] == "]"
+        self._buffer, self._scan, self._depth, self._in_string = self._buffer[boundary + 1:], 0, 0, False
+
+    def _find_boundary(self) -> Optional[int]:
+        """Offset of the ``,`` or ``]`` ending the current element, if buffered yet"""
+        buffer = self._buffer
+        while True:
+            if self._in_string:
+                match = _STRING_SPECIAL.search(buffer, self._scan)
+                if match is None:
+                    self._scan = len(buffer)
+                    return None
+                if match.group() == "\\":
+                    if match.end() == len(buffer):
+                        # The escaped character has not arrived yet
+                        self._scan = match.start()
+                        return None
+                    self._scan = match.end() + 1
+                    continue
+                self._in_string = False
+                self._scan = match.end()
+                continue
+
+            match = _STRUCTURAL.search(buffer, self._scan)
+            if match is None:
+                self._scan = len(buffer)
+                return None
+            char = match.group()
+            self._scan = match.end()
+            if char == '"':
+                self._in_string = True
+            elif char in "[{":
+                self._depth += 1
+            elif self._depth == 0:
+                if char in ",]":
+                    return match.start()
+                # A stray '}' is left for json.loads to reject
+            elif char in "]}":
+                self._depth -= 1
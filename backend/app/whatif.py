@@ -0,0 +1,120 @@
+# app/whatif.py
+"""What-if analysis: which answers would raise a project's scores most.
+
+Every candidate survey is one row of the (N, 35) arrays that
+``ESGScorer.score_arrays`` scores in a single vectorized pass. All
+single-answer flips fit in one pass of at most 35 rows. Multi-answer plans
+are enumerated exhaustively when the number of combinations is small,
+and otherwise found with a beam search that scores each level in one pass.
+"""
+import itertools
+import math
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from .scoring import ESGScorer, ScoringPlan
+
+# Largest number of k-answer combinations scored exhaustively
+MAX_EXHAUSTIVE_PLANS = 20000
+BEAM_WIDTH = 64
+
+
+def improvable_questions(yes: np.ndarray, plan: ScoringPlan) -> np.ndarray:
+    """0-based indices of questions not answered 'A' that count towards some score"""
+    return np.flatnonzero(~yes & (plan.membership.sum(axis=1) > 0))
+
+
+def _with_yes(yes: np.ndarray, answered: np.ndarray, changes: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    # One candidate survey per row of ``changes`` (question indices set to 'A')
+    rows = np.arange(len(changes))[:, None]
+    candidate_yes = np.repeat(yes[None, :], len(changes), axis=0)
+    candidate_answered = np.repeat(answered[None, :], len(changes), axis=0)
+    candidate_yes[rows, changes] = True
+    candidate_answered[rows, changes] = True
+    return candidate_yes, candidate_answered
+
+
+def single_flips(
+    scorer: ESGScorer,
+    yes: np.ndarray,
+    answered: np.ndarray,
+    target: int = -1,
+    plan: Optional[ScoringPlan] = None
+) -> List[dict]:
+    """Score change from answering each improvable question 'A', best first.
+
+    ``target`` is the score column to rank by; -1 is the total.
+    """
+    plan = plan or scorer.plan
+    base = scorer.score_arrays(yes[None, :], answered[None, :], plan=plan)[0]
+    questions = improvable_questions(yes, plan)
+    if not len(questions):
+        return []
+    scores = scorer.score_arrays(*_with_yes(yes, answered, questions[:, None]), plan=plan)
+    deltas = scores - base
+    order = np.argsort(-deltas[:, target], kind="stable")
+    fields = plan.categories + ("total",)
+    return [
+        {
+            "question": int(questions[i]) + 1,
+            "current_answer": ("B" if answered[questions[i]] else None),
+            "delta": {field: round(value, 2) for field, value in zip(fields, deltas[i].tolist())},
+        }
+        for i in order
+    ]
+
+
+def best_plans(
+    scorer: ESGScorer,
+    yes: np.ndarray,
+    answered: np.ndarray,
+    answers: int,
+    top: int,
+    target: int = -1,
+    plan: Optional[ScoringPlan] = None
+) -> List[dict]:
+    """The ``top`` sets of ``answers`` questions whose 'A' answers raise ``target`` most"""
+    plan = plan or scorer.plan
+    questions = improvable_questions(yes, plan)
+    answers = min(answers, len(questions))
+    if not answers:
+        return []
+    base = scorer.score_arrays(yes[None, :], answered[None, :], plan=plan)[0]
+
+    if math.comb(len(questions), answers) <= MAX_EXHAUSTIVE_PLANS:
+        combos = questions[np.array(list(itertools.combinations(range(len(questions)), answers)))]
+        scores = scorer.score_arrays(*_with_yes(yes, answered, combos), plan=plan)
+        exact = True
+    else:
+        combos, scores = _beam_search(scorer, yes, answered, questions, answers, target, plan)
+        exact = False
+
+    order = np.argsort(-scores[:, target], kind="stable")[:top]
+    fields = plan.categories + ("total",)
+    return [
+        {
+            "questions": sorted(int(q) + 1 for q in combos[i]),
+            "delta": {field: round(value, 2) for field, value in zip(fields, (scores[i] - base).tolist())},
+            "scores": {field: round(value, 2) for field, value in zip(fields, scores[i].tolist())},
+            "exhaustive": exact,
+        }
+        for i in order
+    ]
+
+
+def _beam_search(scorer, yes, answered, questions, answers, target, plan):
+    # Grow the best BEAM_WIDTH partial plans one question at a time
+    beams = np.empty((1, 0), dtype=np.int64)
+    for _ in range(answers):
+        extended = np.concatenate([
+            np.repeat(beams, len(questions), axis=0),
+            np.tile(questions, len(beams))[:, None],
+        ], axis=1)
+        # Drop plans that repeat a question, then duplicates in another order
+        extended = extended[np.all(extended[:, :-1] != extended[:, -1:], axis=1)]
+        extended = np.unique(np.sort(extended, axis=1), axis=0)
+        scores = scorer.score_arrays(*_with_yes(yes, answered, extended), plan=plan)
+        keep = np.argsort(-scores[:, target], kind="stable")[:BEAM_WIDTH]
+        beams, beam_scores = extended[keep], scores[keep]
+    return beams, beam_scores
@@ -0,0 +1,133 @@
+"""In-process load test of the API through httpx's ASGI transport.
+
+No server or sockets are involved. The numbers cover the app itself:
+middleware, validation, scoring, the database and serialization. Run from
+the backend directory:
+
+    python -m benchmarks.bench_api --requests 2000 --concurrency 1 16 --seed-rows 10000
+
+The app runs against a fresh SQLite database in a temporary directory,
+seeded with ``--seed-rows`` synthetic projects. This module points
+settings.DATABASE_URL there before it imports the app, so it must be
+configured before anything else imports app.database.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import tempfile
+import time
+
+import httpx
+
+from app.config import settings
+
+from .load_test import synthetic_project
+from .timing import summarize
+
+SCENARIOS = {
+    "analyze": lambda client, rng, i: client.post("/projects/analyze", json=synthetic_project(rng, i)),
+    "list": lambda client, rng, i: client.get("/projects/", params={"limit": 50}),
+    "list_fields": lambda client, rng, i: client.get(
+        "/projects/", params={"limit": 50, "fields": "projectName,total_esg_score"}
+    ),
+}
+
+
+def configure(directory: str):
+    """Point the app at a fresh database in ``directory`` and import it"""
+    settings.DATABASE_URL = f"sqlite:///{os.path.join(directory, 'api.db')}"
+    settings.ASYNC_DATABASE_URL = None
+    settings.LOG_LEVEL = "WARNING"
+    from app import database, models
+    if database.SQLALCHEMY_DATABASE_URL != settings.DATABASE_URL:
+        raise RuntimeError("app.database was imported before benchmarks.bench_api.configure()")
+    models.Base.metadata.create_all(bind=database.engine)
+    from app.main import app
+    return app
+
+
+async def seed(count: int) -> None:
+    from app import crud
+    from app.database import AsyncSessionLocal
+    from app.scoring import ESGScorer
+
+    from .bench_db import synthetic_rows
+
+    async with AsyncSessionLocal() as db:
+        for rows in synthetic_rows(ESGScorer(), count):
+            await crud.bulk_insert_projects(db, rows, len(rows))
+
+
+async def run_level(client: httpx.AsyncClient, scenario, total: int, concurrency: int) -> dict:
+    rng = random.Random(concurrency)
+    pending = iter(range(total))
+    latencies = []
+    errors = 0
+
+    async def worker():
+        nonlocal errors
+        for i in pending:
+            start = time.perf_counter()
+            response = await scenario(client, rng, i)
+            latencies.append(time.perf_counter() - start)
+            if response.status_code >= 400:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    return {
+        "concurrency": concurrency,
+        "requests_per_sec": round(total / elapsed, 1),
+        **summarize(latencies),
+        "errors": errors,
+    }
+
+
+async def run_scenarios(app, requests: int, concurrency_levels, seed_rows: int) -> dict:
+    await seed(seed_rows)
+    results = {"seed_rows": seed_rows, "scenarios": {}}
+    # Run the app lifespan (startup and shutdown), which ASGITransport does not send
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            for name, scenario in SCENARIOS.items():
+                # Warm up lazily initialized paths before timing
+                await run_level(client, scenario, min(requests, 50), 1)
+                results["scenarios"][name] = [
+                    await run_level(client, scenario, requests, concurrency) for concurrency in concurrency_levels
+                ]
+    return results
+
+
+def run(directory: str, requests: int = 2000, concurrency_levels=(1, 16), seed_rows: int = 10000) -> dict:
+    app = configure(directory)
+    return asyncio.run(run_scenarios(app, requests, concurrency_levels, seed_rows))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=2000, help="Requests per scenario and concurrency level")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 16])
+    parser.add_argument("--seed-rows", type=int, default=10000)
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        results = run(directory, args.requests, args.concurrency, args.seed_rows)
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"{'scenario':<12} {'concurrency':>11} {'req/s':>10} {'p50 ms':>9} {'p99 ms':>9} {'errors':>7}")
+    for name, levels in results["scenarios"].items():
+        for level in levels:
+            print(
+                f"{name:<12} {level['concurrency']:>11} {level['requests_per_sec']:>10,.0f} "
+                f"{level['p50_ms']:>9.2f} {level['p99_ms']:>9.2f} {level['errors']:>7}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""Compare per-row project inserts with the chunked bulk insert path.
+
+Run from the backend directory:
+
+    python -m benchmarks.bench_bulk_insert --rows 5000 --chunk-sizes 100 500 2000
+"""
+import argparse
+import asyncio
+import os
+import random
+import tempfile
+import time
+
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app import crud, models, revisions, schemas
+from app.scoring import ESGScorer
+
+PROJECT_TYPES = ["solar_utility", "wind_onshore", "hydrogen", "geothermal"]
+
+
+def synthetic_projects(count: int, seed: int = 0) -> list:
+    rng = random.Random(seed)
+    return [
+        schemas.ProjectCreate(
+            projectName=f"Project {i}",
+            location=rng.choice(["New York, NY", "Austin, TX", "Denver, CO"]),
+            projectType=rng.choice(PROJECT_TYPES),
+            surveyResponses={str(q): rng.choice("AB") for q in range(1, 36) if rng.random() < 0.9},
+        )
+        for i in range(count)
+    ]
+
+
+def fresh_session(directory: str, name: str):
+    engine = create_engine(f"sqlite:///{os.path.join(directory, name)}")
+    models.Base.metadata.create_all(bind=engine)
+    return engine, sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+
+
+def bench_per_row(projects: list, directory: str) -> float:
+    """The create_project path: score, add, commit and refresh one row at a time"""
+    scorer = ESGScorer()
+    engine, db = fresh_session(directory, "per_row.db")
+    start = time.perf_counter()
+    for project in projects:
+        scores = scorer.calculate_scores(project.surveyResponses)
+        db_project = models.Project(**crud.project_row(project, scores, scorer.plan.version))
+        db.add(db_project)
+        db.commit()
+        db.refresh(db_project)
+    elapsed = time.perf_counter() - start
+    db.close()
+    engine.dispose()
+    return elapsed
+
+
+async def bench_bulk(projects: list, directory: str, chunk_size: int) -> float:
+    """The /projects/bulk path: batch scoring plus one executemany and commit per chunk.
+
+    Every project is new, so the lookup of stored revisions is skipped.
+    """
+    scorer = ESGScorer()
+    engine, db = fresh_session(directory, f"bulk_{chunk_size}.db")
+    db.close()
+    engine.dispose()
+
+    async_engine = create_async_engine(f"sqlite+aiosqlite:///{os.path.join(directory, f'bulk_{chunk_size}.db')}")
+    async with AsyncSession(async_engine) as db:
+        start = time.perf_counter()
+        all_scores = scorer.score_batch([project.surveyResponses for project in projects])
+        rows = [crud.project_row(project, scores, scorer.plan.version) for project, scores in zip(projects, all_scores)]
+        ids = (await revisions.upsert_projects(db, rows, {}, chunk_size)).ids
+        elapsed = time.perf_counter() - start
+    assert len(ids) == len(projects)
+    await async_engine.dispose()
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=5000)
+    parser.add_argument("--chunk-sizes", type=int, nargs="+", default=[100, 500, 2000])
+    args = parser.parse_args()
+
+    projects = synthetic_projects(args.rows)
+    with tempfile.TemporaryDirectory() as directory:
+        per_row = bench_per_row(projects, directory)
+        print(f"per-row          {args.rows / per_row:12,.0f} rows/sec")
+        for chunk_size in args.chunk_sizes:
+            elapsed = asyncio.run(bench_bulk(projects, directory, chunk_size))
+            print(
+                f"bulk chunk={chunk_size:<6}{args.rows / elapsed:12,.0f} rows/sec"
+                f"  ({per_row / elapsed:.1f}x)"
+            )
+
+
+if __name__ == "__main__":
+    main()
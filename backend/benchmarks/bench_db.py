@@ -0,0 +1,155 @@
+"""SQLite ingest and project-list query benchmarks at several table sizes.
+
+Run from the backend directory:
+
+    python -m benchmarks.bench_db --sizes 10000 100000 1000000
+
+Each size gets a fresh database in a temporary directory. Ingest goes
+through revisions.upsert_projects, the /projects/bulk path. The list
+queries are built the way GET /projects/ builds them.
+"""
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+import time
+from typing import Iterator, List, Optional
+
+import numpy as np
+from sqlalchemy import create_engine, select
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from app import crud, models, revisions
+from app.scoring import ESGScorer, masks_from_arrays
+
+from .timing import summarize
+
+LOCATIONS = ["New York, NY", "Austin, TX", "Denver, CO", "Seattle, WA", "Phoenix, AZ"]
+PROJECT_TYPES = ["solar_utility", "wind_onshore", "hydrogen", "geothermal"]
+
+
+def synthetic_rows(scorer: ESGScorer, count: int, seed: int = 0, chunk_size: int = 10000) -> Iterator[List[dict]]:
+    """Scored project rows in chunks, generated as bitmasks to keep 1M-row runs cheap"""
+    rng = np.random.default_rng(seed)
+    version = scorer.plan.version
+    for start in range(0, count, chunk_size):
+        n = min(chunk_size, count - start)
+        answered = rng.random((n, 35)) < 0.9
+        yes = answered & (rng.random((n, 35)) < 0.5)
+        answered_masks, yes_masks = masks_from_arrays(yes, answered)
+        locations = rng.integers(len(LOCATIONS), size=n).tolist()
+        types = rng.integers(len(PROJECT_TYPES), size=n).tolist()
+        all_scores = scorer.score_masks(answered_masks, yes_masks)
+        yield [
+            {
+                "projectName": f"Project {start + i}",
+                "location": LOCATIONS[locations[i]],
+                "projectType": PROJECT_TYPES[types[i]],
+                "identity_key": crud.identity_key(f"Project {start + i}", LOCATIONS[locations[i]]),
+                "survey_answered": int(answered_masks[i]),
+                "survey_yes": int(yes_masks[i]),
+                **{column: scores[key] for key, column in crud.SCORE_COLUMNS.items()},
+                "scoring_version": version,
+            }
+            for i, scores in enumerate(all_scores)
+        ]
+
+
+def list_statement(
+    fields: Optional[List[str]] = None,
+    sort: str = "created_at",
+    cursor: Optional[str] = None,
+    limit: int = 100,
+    skip: int = 0,
+    **filters
+):
+    """The statement GET /projects/ runs for these parameters"""
+    sort_name, _ = crud.parse_sort(sort)
+    columns = crud.field_columns(["id"] + fields) if fields else [models.Project]
+    statement = select(*columns, crud.SORT_COLUMNS[sort_name].label("sort_value"))
+    statement = crud.keyset_page(crud.filter_projects(statement, **filters), sort, cursor, limit)
+    return statement.offset(skip) if skip and cursor is None else statement
+
+
+async def _middle_cursor(db: AsyncSession, count: int) -> str:
+    row = (await db.execute(
+        select(models.Project.created_at, models.Project.id)
+        .order_by(models.Project.created_at, models.Project.id)
+        .offset(count // 2)
+        .limit(1)
+    )).one()
+    return crud.encode_cursor(row.created_at, row.id)
+
+
+async def bench_size(directory: str, count: int, chunk_size: int, repeat: int) -> dict:
+    path = os.path.join(directory, f"bench_{count}.db")
+    sync_engine = create_engine(f"sqlite:///{path}")
+    models.Base.metadata.create_all(bind=sync_engine)
+    sync_engine.dispose()
+    engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+
+    scorer = ESGScorer()
+    insert_seconds = 0.0
+    async with AsyncSession(engine) as db:
+        for rows in synthetic_rows(scorer, count, chunk_size=chunk_size):
+            start = time.perf_counter()
+            # Every row is a new project, so there are no stored rows to look up
+            await revisions.upsert_projects(db, rows, {}, chunk_size)
+            insert_seconds += time.perf_counter() - start
+
+        queries = {
+            "first_page": list_statement(),
+            "first_page_fields": list_statement(fields=["projectName", "total_esg_score"]),
+            "deep_page_offset": list_statement(skip=count // 2),
+            "deep_page_cursor": list_statement(cursor=await _middle_cursor(db, count)),
+            "top_scores_by_type": list_statement(
+                sort="-total_esg_score", project_type="solar_utility", min_score=50
+            ),
+            "answer_filter": list_statement(answers=[(16, False), (3, True)]),
+        }
+        list_results = {}
+        for name, statement in queries.items():
+            durations = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                (await db.execute(statement)).all()
+                durations.append(time.perf_counter() - start)
+            list_results[name] = summarize(durations)
+
+    await engine.dispose()
+    size_mb = os.path.getsize(path) / 1e6
+    os.remove(path)
+    return {
+        "rows": count,
+        "ingest": {"seconds": round(insert_seconds, 3), "rows_per_sec": round(count / insert_seconds)},
+        "database_mb": round(size_mb, 1),
+        "list": list_results,
+    }
+
+
+async def run(sizes=(10000, 100000, 1000000), chunk_size: int = 5000, repeat: int = 20) -> dict:
+    with tempfile.TemporaryDirectory() as directory:
+        return {str(count): await bench_size(directory, count, chunk_size, repeat) for count in sizes}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000, 1000000])
+    parser.add_argument("--chunk-size", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=20, help="Runs of each list query")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args.sizes, args.chunk_size, args.repeat))
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    for count, result in results.items():
+        print(f"{int(count):,} rows: ingest {result['ingest']['rows_per_sec']:,} rows/sec, {result['database_mb']} MB")
+        for name, timing in result["list"].items():
+            print(f"  {name:<22} p50 {timing['p50_ms']:>9.2f} ms  p99 {timing['p99_ms']:>9.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
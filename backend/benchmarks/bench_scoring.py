@@ -0,0 +1,76 @@
+"""Micro-benchmarks of the scoring hot paths over synthetic surveys.
+
+Run from the backend directory:
+
+    python -m benchmarks.bench_scoring --surveys 5000
+
+Reports the best of ``--repeat`` passes over the surveys, in microseconds
+per survey, so one-off noise (GC, frequency scaling) does not count.
+"""
+import argparse
+import json
+import random
+import time
+
+from app.scoring import ESGScorer
+from app.scoring_config import PROJECT_TYPE_RECOMMENDATIONS
+
+
+def synthetic_surveys(count: int, seed: int = 0) -> list:
+    """Surveys answering ~90% of the questions, half of them 'A'"""
+    rng = random.Random(seed)
+    return [
+        {str(q): rng.choice("AB") for q in range(1, 36) if rng.random() < 0.9}
+        for _ in range(count)
+    ]
+
+
+def _best_per_item(fn, items: list, repeat: int) -> float:
+    # Best pass, in microseconds per item
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(items)
+        best = min(best, time.perf_counter() - start)
+    return round(best / len(items) * 1e6, 3)
+
+
+def run(surveys: int = 5000, repeat: int = 5, seed: int = 0) -> dict:
+    scorer = ESGScorer()
+    responses = synthetic_surveys(surveys, seed)
+    rng = random.Random(seed)
+    project_types = [rng.choice(list(PROJECT_TYPE_RECOMMENDATIONS) + [None]) for _ in responses]
+    all_scores = scorer.score_batch(responses)
+    pairs = list(zip(all_scores, project_types))
+
+    def per_survey(method):
+        return lambda items: [method(scores, project_type) for scores, project_type in items]
+
+    return {
+        "surveys": surveys,
+        "us_per_survey": {
+            "calculate_scores": _best_per_item(lambda items: [scorer.calculate_scores(r) for r in items], responses, repeat),
+            "score_batch": _best_per_item(scorer.score_batch, responses, repeat),
+            "generate_recommendations": _best_per_item(per_survey(scorer.generate_recommendations), pairs, repeat),
+            "identify_risks": _best_per_item(per_survey(scorer.identify_risks), pairs, repeat),
+        },
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--surveys", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+
+    results = run(args.surveys, args.repeat)
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    for name, micros in results["us_per_survey"].items():
+        print(f"{name:<26}{micros:>10.2f} us/survey")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""Concurrent load test against a running API server.
+
+Start the server (``uvicorn app.main:app``) and run from the backend directory:
+
+    python -m benchmarks.load_test --requests 2000 --concurrency 1 8 32 64
+
+Each concurrency level sends the same mix of project creates and list
+reads and reports throughput and latency percentiles. With handlers that
+block the event loop, throughput stays flat as concurrency grows; with the
+async database layer it should scale until the database is the bottleneck.
+"""
+import argparse
+import asyncio
+import random
+import time
+
+import httpx
+
+
+def synthetic_project(rng: random.Random, i: int) -> dict:
+    return {
+        "projectName": f"Load test {i}",
+        "location": rng.choice(["New York, NY", "Austin, TX", "Denver, CO"]),
+        "projectType": rng.choice(["solar_utility", "wind_onshore", "hydrogen"]),
+        "surveyResponses": {str(q): rng.choice("AB") for q in range(1, 36)},
+    }
+
+
+async def run_level(client: httpx.AsyncClient, total: int, concurrency: int, write_ratio: float) -> dict:
+    rng = random.Random(concurrency)
+    queue = asyncio.Queue()
+    for i in range(total):
+        queue.put_nowait(i)
+    latencies = []
+    errors = 0
+
+    async def worker():
+        nonlocal errors
+        while True:
+            try:
+                i = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            start = time.perf_counter()
+            if rng.random() < write_ratio:
+                response = await client.post("/projects/", json=synthetic_project(rng, i))
+            else:
+                response = await client.get("/projects/", params={"limit": 50, "fields": "projectName,total_esg_score"})
+            latencies.append(time.perf_counter() - start)
+            if response.status_code >= 400:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        "concurrency": concurrency,
+        "requests_per_sec": total / elapsed,
+        "p50_ms": latencies[len(latencies) // 2] * 1000,
+        "p99_ms": latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000,
+        "errors": errors,
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32, 64])
+    parser.add_argument("--write-ratio", type=float, default=0.2, help="Share of requests that create projects")
+    args = parser.parse_args()
+
+    limits = httpx.Limits(max_connections=max(args.concurrency))
+    async with httpx.AsyncClient(base_url=args.url, limits=limits, timeout=60) as client:
+        print(f"{'concurrency':>11} {'req/s':>10} {'p50 ms':>9} {'p99 ms':>9} {'errors':>7}")
+        for concurrency in args.concurrency:
+            result = await run_level(client, args.requests, concurrency, args.write_ratio)
+            print(
+                f"{result['concurrency']:>11} {result['requests_per_sec']:>10,.0f} "
+                f"{result['p50_ms']:>9.1f} {result['p99_ms']:>9.1f} {result['errors']:>7}"
+            )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,108 @@
+"""Run every benchmark and write the results to a JSON file.
+
+Run from the backend directory:
+
+    python -m benchmarks.run_suite --out results.json
+    python -m benchmarks.run_suite --quick --out new.json --compare results.json
+
+The file records the git commit and library versions next to the
+numbers. ``--compare`` prints the change of every metric against an
+earlier results file. ``--quick`` runs only the 10k-row database size
+and fewer requests, which is enough to spot large regressions.
+"""
+import argparse
+import asyncio
+import datetime
+import json
+import platform
+import subprocess
+import sys
+import tempfile
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def metadata() -> dict:
+    import fastapi
+    import numpy
+    import sqlalchemy
+
+    return {
+        "commit": _git_commit(),
+        "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "numpy": numpy.__version__,
+        "sqlalchemy": sqlalchemy.__version__,
+        "fastapi": fastapi.__version__,
+    }
+
+
+def flatten(results: dict, prefix: str = "") -> dict:
+    """Numeric leaves of a results dict keyed by dotted path; list items by concurrency"""
+    flat = {}
+    for key, value in results.items():
+        path = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(flatten(value, path + "."))
+        elif isinstance(value, list):
+            for item in value:
+                flat.update(flatten(item, f"{path}.c{item.get('concurrency', '')}."))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[path] = value
+    return flat
+
+
+def compare(baseline: dict, current: dict) -> None:
+    before, after = flatten(baseline), flatten(current)
+    print(f"{'metric':<64} {'baseline':>12} {'current':>12} {'change':>8}")
+    for path in sorted(before.keys() & after.keys()):
+        if path.startswith("meta.") or path.endswith((".count", ".rows", ".surveys", ".concurrency", ".seed_rows")):
+            continue
+        old, new = before[path], after[path]
+        change = f"{(new - old) / old * 100:+.1f}%" if old else "n/a"
+        print(f"{path:<64} {old:>12,.3f} {new:>12,.3f} {change:>8}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--out", default="benchmark_results.json")
+    parser.add_argument("--compare", help="Earlier results file to compare against")
+    parser.add_argument("--quick", action="store_true", help="Smaller sizes and request counts")
+    parser.add_argument("--sizes", type=int, nargs="+", help="Database sizes (default 10k 100k 1M)")
+    args = parser.parse_args()
+    sizes = args.sizes or ([10000] if args.quick else [10000, 100000, 1000000])
+    requests = 300 if args.quick else 2000
+
+    with tempfile.TemporaryDirectory() as directory:
+        # bench_api must configure the app before the other benchmarks import app.database
+        from . import bench_api
+        app = bench_api.configure(directory)
+        from . import bench_db, bench_scoring
+
+        results = {"meta": {**metadata(), "quick": args.quick}}
+        print("scoring micro-benchmarks ...", file=sys.stderr, flush=True)
+        results["scoring"] = bench_scoring.run(surveys=1000 if args.quick else 5000)
+        print(f"database benchmarks at {sizes} rows ...", file=sys.stderr, flush=True)
+        results["database"] = asyncio.run(bench_db.run(sizes))
+        print("API load test ...", file=sys.stderr, flush=True)
+        results["api"] = asyncio.run(bench_api.run_scenarios(app, requests, (1, 16), 10000))
+
+    with open(args.out, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"wrote {args.out}", file=sys.stderr, flush=True)
+
+    if args.compare:
+        with open(args.compare) as f:
+            compare(json.load(f), results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,19 @@
+"""Shared helpers for summarizing benchmark timings."""
+from typing import List
+
+
+def percentile(sorted_values: List[float], p: float) -> float:
+    """Nearest-rank percentile of an ascending list"""
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * p / 100))]
+
+
+def summarize(seconds: List[float]) -> dict:
+    """Mean, p50 and p99 in milliseconds of a list of durations"""
+    values = sorted(seconds)
+    return {
+        "count": len(values),
+        "mean_ms": round(sum(values) / len(values) * 1000, 4),
+        "p50_ms": round(percentile(values, 50) * 1000, 4),
+        "p99_ms": round(percentile(values, 99) * 1000, 4),
+    }
+
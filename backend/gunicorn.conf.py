@@ -0,0 +1,79 @@
+"""Production serving: several uvicorn worker processes under gunicorn.
+
+Run from the backend directory:
+
+    alembic upgrade head
+    gunicorn -c gunicorn.conf.py app.main:app
+
+The app is imported once in the master (``preload_app``). The scoring
+plan, the recommendation rules, the EPA and risk rasters and the peer
+ranking index are all built there, then forked workers share them
+copy-on-write. Each worker then opens its own database connections, log
+writer thread and analysis cache connection. Workers share nothing else:
+/metrics and the in-memory caches are per worker, and each worker picks
+up edits to the scoring config and rules files by itself within
+CONFIG_CHECK_INTERVAL seconds (POST /admin/scoring/reload only reloads the
+worker that serves it, and needs ADMIN_TOKEN).
+
+WEB_CONCURRENCY sets the number of workers (default: one per CPU) and
+BIND the listen address (default 0.0.0.0:8000). The app's own settings
+are environment variables too (see app.config), e.g.:
+
+    DB_POOL_SIZE=8 DB_MAX_OVERFLOW=8 SQLITE_WAL=true AUTO_CREATE_TABLES=false \
+        gunicorn -c gunicorn.conf.py app.main:app
+"""
+import asyncio
+import math
+import multiprocessing
+import os
+
+from app.config import settings
+
+bind = os.environ.get("BIND", "0.0.0.0:8000")
+workers = int(os.environ.get("WEB_CONCURRENCY", multiprocessing.cpu_count()))
+worker_class = "uvicorn.workers.UvicornWorker"
+preload_app = True
+timeout = 60
+graceful_timeout = 30
+keepalive = 5
+
+# Each worker has its own connection pool. Split the configured pool so the
+# whole server stays within DB_POOL_SIZE + DB_MAX_OVERFLOW connections. This
+# must happen before the preload creates the engines.
+settings.DB_POOL_SIZE = max(2, math.ceil(settings.DB_POOL_SIZE / workers))
+settings.DB_MAX_OVERFLOW = max(1, math.ceil(settings.DB_MAX_OVERFLOW / workers))
+
+
+def on_starting(server):
+    """Runs in the master after the preload, before any worker is forked"""
+    from sqlalchemy.ext.asyncio import AsyncSession
+
+    from app import main
+    from app.database import bootstrap_engine, init_db
+
+    async def prepare():
+        # Not async_engine: the workers' event loops must be the only ones to use it
+        bootstrap = bootstrap_engine()
+        try:
+            if settings.AUTO_CREATE_TABLES:
+                await init_db(bootstrap)
+            if main.peer_rankings is not None:
+                async with AsyncSession(bootstrap) as db:
+                    await main.peer_rankings.warm(db)
+        finally:
+            await bootstrap.dispose()
+
+    asyncio.run(prepare())
+    # Done once here, so workers do not race to create tables
+    settings.AUTO_CREATE_TABLES = False
+
+
+def post_fork(server, worker):
+    from app import main
+    from app.database import dispose_inherited_pools
+    from app.logging_config import configure_logging
+
+    dispose_inherited_pools()
+    # The master's log writer thread does not exist in the child
+    configure_logging(settings.LOG_LEVEL, settings.LOG_FORMAT)
+    main.analysis_cache.reopen()
@@ -0,0 +1,51 @@
+"""Initial schema
+
+The original projects table. Databases created by ``create_all`` before
+migrations were introduced can be marked with the revision matching the
+schema they have, then upgraded with ``alembic upgrade head``:
+
+    0001  the original schema
+    0002  with the keyset pagination indexes
+    0003  with projects.scoring_version
+    0004  with score_rollups
+    0005  with project coordinates and geocode_cache
+    0006  with the location risk columns
+
+e.g. ``alembic stamp 0004`` for a database that has score_rollups but no
+latitude column.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "projects",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("projectName", sa.String()),
+        sa.Column("location", sa.String()),
+        sa.Column("projectType", sa.String()),
+        sa.Column("surveyResponses", sa.JSON()),
+        sa.Column("standard_esg_score", sa.Float()),
+        sa.Column("european_esg_score", sa.Float()),
+        sa.Column("us_esg_score", sa.Float()),
+        sa.Column("community_engagement_score", sa.Float()),
+        sa.Column("total_esg_score", sa.Float()),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column("updated_at", sa.DateTime(timezone=True)),
+    )
+    op.create_index("ix_projects_id", "projects", ["id"])
+    op.create_index("ix_projects_projectName", "projects", ["projectName"])
+
+
+def downgrade() -> None:
+    op.drop_table("projects")
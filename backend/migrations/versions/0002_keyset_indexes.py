@@ -0,0 +1,33 @@
+"""Keyset pagination indexes
+
+Indexes for the project list: the default (created_at, id) order, the
+same order within projectType and location filters, and score-sorted
+pages.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18
+"""
+from alembic import op
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+INDEXES = {
+    "ix_projects_created_at_id": ["created_at", "id"],
+    "ix_projects_type_created_at_id": ["projectType", "created_at", "id"],
+    "ix_projects_location_created_at_id": ["location", "created_at", "id"],
+    "ix_projects_total_score_id": ["total_esg_score", "id"],
+}
+
+
+def upgrade() -> None:
+    for name, columns in INDEXES.items():
+        op.create_index(name, "projects", columns)
+
+
+def downgrade() -> None:
+    for name in reversed(list(INDEXES)):
+        op.drop_index(name, table_name="projects")
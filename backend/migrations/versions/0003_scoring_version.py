@@ -0,0 +1,28 @@
+"""Scoring version on projects
+
+Adds the indexed ``scoring_version`` column. Existing rows stay null,
+which the rescoring job (``python -m app.rescore``) treats as stale.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table("projects") as batch:
+        batch.add_column(sa.Column("scoring_version", sa.String()))
+        batch.create_index("ix_projects_scoring_version", ["scoring_version"])
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("projects") as batch:
+        batch.drop_index("ix_projects_scoring_version")
+        batch.drop_column("scoring_version")
@@ -0,0 +1,75 @@
+"""Score rollups
+
+Creates ``score_rollups``, the per-group score histograms behind
+/projects/stats, and fills it from the projects already stored.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# Buckets must match the ones the app maintains, so this one rule is shared
+from app.crud import bucket_expression
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+# Same dimensions and columns as app.stats.rebuild_rollups, frozen here; the bucket
+# rule is app.crud.bucket_expression itself so migrated rollups match the app's
+DIMENSIONS = ("all", "projectType", "location")
+SCORE_COLUMNS = {
+    "standard_esg": "standard_esg_score",
+    "european_esg": "european_esg_score",
+    "us_esg": "us_esg_score",
+    "community_engagement": "community_engagement_score",
+    "total": "total_esg_score",
+}
+projects = sa.table(
+    "projects",
+    sa.column("projectType", sa.String),
+    sa.column("location", sa.String),
+    *(sa.column(name, sa.Float) for name in SCORE_COLUMNS.values()),
+)
+
+
+def _fill_rollups(rollups) -> None:
+    connection = op.get_bind()
+    for dimension in DIMENSIONS:
+        group = sa.literal("") if dimension == "all" else sa.func.coalesce(projects.c[dimension], "")
+        for category, column_name in SCORE_COLUMNS.items():
+            score = projects.c[column_name]
+            bucket = bucket_expression(score, connection.dialect.name)
+            connection.execute(
+                rollups.insert().from_select(
+                    ["dimension", "group_value", "category", "bucket", "count", "score_sum", "score_sq_sum"],
+                    sa.select(
+                        sa.literal(dimension), group, sa.literal(category), bucket,
+                        sa.func.count(), sa.func.sum(score), sa.func.sum(score * score),
+                    )
+                    .where(score.is_not(None))
+                    .group_by(group, bucket),
+                )
+            )
+
+
+def upgrade() -> None:
+    rollups = op.create_table(
+        "score_rollups",
+        sa.Column("dimension", sa.String(), nullable=False),
+        sa.Column("group_value", sa.String(), nullable=False),
+        sa.Column("category", sa.String(), nullable=False),
+        sa.Column("bucket", sa.Integer(), nullable=False),
+        sa.Column("count", sa.Integer(), nullable=False),
+        sa.Column("score_sum", sa.Float(), nullable=False),
+        sa.Column("score_sq_sum", sa.Float(), nullable=False),
+        sa.PrimaryKeyConstraint("dimension", "group_value", "category", "bucket"),
+    )
+    _fill_rollups(rollups)
+
+
+def downgrade() -> None:
+    op.drop_table("score_rollups")
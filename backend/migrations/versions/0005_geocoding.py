@@ -0,0 +1,39 @@
+"""Project coordinates and the geocode cache
+
+Adds latitude and longitude to projects and the ``geocode_cache``
+table. Existing rows keep null coordinates; they are not geocoded
+retroactively.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table("projects") as batch:
+        batch.add_column(sa.Column("latitude", sa.Float()))
+        batch.add_column(sa.Column("longitude", sa.Float()))
+
+    op.create_table(
+        "geocode_cache",
+        sa.Column("query", sa.String(), primary_key=True),
+        sa.Column("latitude", sa.Float()),
+        sa.Column("longitude", sa.Float()),
+        sa.Column("last_used", sa.Float(), nullable=False),
+    )
+    op.create_index("ix_geocode_cache_last_used", "geocode_cache", ["last_used"])
+
+
+def downgrade() -> None:
+    op.drop_table("geocode_cache")
+    with op.batch_alter_table("projects") as batch:
+        batch.drop_column("longitude")
+        batch.drop_column("latitude")
@@ -0,0 +1,31 @@
+"""Location risk columns on projects
+
+Adds the four risk layers looked up from the risk rasters. Existing
+rows start with no risks; fill them with
+``python -m app.location_risk rescore``.
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0006"
+down_revision = "0005"
+branch_labels = None
+depends_on = None
+
+RISK_COLUMNS = ("air_quality_risk", "water_quality_risk", "facility_density", "environmental_justice_risk")
+
+
+def upgrade() -> None:
+    with op.batch_alter_table("projects") as batch:
+        for name in RISK_COLUMNS:
+            batch.add_column(sa.Column(name, sa.Float()))
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("projects") as batch:
+        for name in reversed(RISK_COLUMNS):
+            batch.drop_column(name)
@@ -0,0 +1,94 @@
+"""Store survey responses as answered/yes bitmasks
+
+Replaces the per-row ``surveyResponses`` JSON blob with two BIGINT
+columns. Bit q - 1 of ``survey_answered`` is set when question q was
+answered, and the same bit of ``survey_yes`` when the answer was 'A'.
+Existing rows are converted in batches.
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0007"
+down_revision = "0006"
+branch_labels = None
+depends_on = None
+
+NUM_QUESTIONS = 35
+BATCH_SIZE = 5000
+
+projects = sa.table(
+    "projects",
+    sa.column("id", sa.Integer),
+    sa.column("surveyResponses", sa.JSON),
+    sa.column("survey_answered", sa.BigInteger),
+    sa.column("survey_yes", sa.BigInteger),
+)
+
+
+def _encode(survey_responses) -> dict:
+    # Same rules as app.scoring.encode_masks, frozen here so the migration never changes
+    answered = yes = 0
+    for key, value in (survey_responses or {}).items():
+        question = int(key)
+        if 1 <= question <= NUM_QUESTIONS:
+            answered |= 1 << (question - 1)
+            if value == "A":
+                yes |= 1 << (question - 1)
+    return {"survey_answered": answered, "survey_yes": yes}
+
+
+def _decode(answered: int, yes: int) -> dict:
+    return {
+        str(q): "A" if yes >> (q - 1) & 1 else "B"
+        for q in range(1, NUM_QUESTIONS + 1)
+        if answered >> (q - 1) & 1
+    }
+
+
+def _convert(select_columns, convert) -> None:
+    # Rewrite every row in id-ordered batches with one executemany per batch
+    connection = op.get_bind()
+    last_id = 0
+    while True:
+        rows = connection.execute(
+            sa.select(projects.c.id, *select_columns)
+            .where(projects.c.id > last_id)
+            .order_by(projects.c.id)
+            .limit(BATCH_SIZE)
+        ).all()
+        if not rows:
+            return
+        last_id = rows[-1].id
+        connection.execute(
+            projects.update().where(projects.c.id == sa.bindparam("row_id")),
+            [{"row_id": row.id, **convert(row)} for row in rows],
+        )
+
+
+def upgrade() -> None:
+    with op.batch_alter_table("projects") as batch:
+        batch.add_column(sa.Column("survey_answered", sa.BigInteger(), nullable=False, server_default="0"))
+        batch.add_column(sa.Column("survey_yes", sa.BigInteger(), nullable=False, server_default="0"))
+
+    _convert([projects.c.surveyResponses], lambda row: _encode(row.surveyResponses))
+
+    with op.batch_alter_table("projects") as batch:
+        batch.drop_column("surveyResponses")
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("projects") as batch:
+        batch.add_column(sa.Column("surveyResponses", sa.JSON()))
+
+    _convert(
+        [projects.c.survey_answered, projects.c.survey_yes],
+        lambda row: {"surveyResponses": _decode(row.survey_answered, row.survey_yes)},
+    )
+
+    with op.batch_alter_table("projects") as batch:
+        batch.drop_column("survey_yes")
+        batch.drop_column("survey_answered")
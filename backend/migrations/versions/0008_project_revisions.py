@@ -0,0 +1,97 @@
+"""Project identity keys and revision history
+
+Adds ``identity_key`` and ``revision`` to projects and the
+``project_revisions`` table of superseded versions. Existing rows get
+revision 1 and the key of their name and location. Where several rows
+share a key, only the newest one gets it; the older ones stay as
+separate projects that resubmissions no longer reach.
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0008"
+down_revision = "0007"
+branch_labels = None
+depends_on = None
+
+BATCH_SIZE = 5000
+
+projects = sa.table(
+    "projects",
+    sa.column("id", sa.Integer),
+    sa.column("projectName", sa.String),
+    sa.column("location", sa.String),
+    sa.column("identity_key", sa.String),
+)
+
+
+def _identity_key(project_name, location) -> str:
+    # Same rules as app.crud.identity_key, frozen here so the migration never changes
+    return "\n".join(" ".join((value or "").split()).casefold() for value in (project_name, location))
+
+
+def _assign_identity_keys() -> None:
+    # Newest rows first, so the newest of any duplicates claims the key
+    connection = op.get_bind()
+    seen = set()
+    last_id = None
+    while True:
+        statement = sa.select(projects.c.id, projects.c.projectName, projects.c.location)
+        if last_id is not None:
+            statement = statement.where(projects.c.id < last_id)
+        rows = connection.execute(statement.order_by(projects.c.id.desc()).limit(BATCH_SIZE)).all()
+        if not rows:
+            return
+        last_id = rows[-1].id
+        updates = []
+        for row in rows:
+            key = _identity_key(row.projectName, row.location)
+            if key not in seen:
+                seen.add(key)
+                updates.append({"row_id": row.id, "identity_key": key})
+        if updates:
+            connection.execute(
+                projects.update().where(projects.c.id == sa.bindparam("row_id")),
+                updates,
+            )
+
+
+def upgrade() -> None:
+    with op.batch_alter_table("projects") as batch:
+        batch.add_column(sa.Column("identity_key", sa.String()))
+        batch.add_column(sa.Column("revision", sa.Integer(), nullable=False, server_default="1"))
+
+    _assign_identity_keys()
+    op.create_index("ix_projects_identity_key", "projects", ["identity_key"], unique=True)
+
+    op.create_table(
+        "project_revisions",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("project_id", sa.Integer(), sa.ForeignKey("projects.id", ondelete="CASCADE"), nullable=False),
+        sa.Column("revision", sa.Integer(), nullable=False),
+        sa.Column("projectType", sa.String()),
+        sa.Column("answered_delta", sa.BigInteger(), nullable=False),
+        sa.Column("yes_delta", sa.BigInteger(), nullable=False),
+        sa.Column("standard_esg_score", sa.Float()),
+        sa.Column("european_esg_score", sa.Float()),
+        sa.Column("us_esg_score", sa.Float()),
+        sa.Column("community_engagement_score", sa.Float()),
+        sa.Column("total_esg_score", sa.Float()),
+        sa.Column("scoring_version", sa.String()),
+        sa.Column("submitted_at", sa.DateTime(timezone=True)),
+    )
+    op.create_index(
+        "ix_project_revisions_project_revision", "project_revisions", ["project_id", "revision"], unique=True
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("project_revisions")
+    op.drop_index("ix_projects_identity_key", table_name="projects")
+    with op.batch_alter_table("projects") as batch:
+        batch.drop_column("revision")
+        batch.drop_column("identity_key")
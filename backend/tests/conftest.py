@@ -0,0 +1,44 @@
+# tests/conftest.py
+"""Shared fixtures. The app reads its settings at import time, so the
+environment is pointed at a throwaway SQLite file before anything from
+``app`` is imported."""
+import os
+import shutil
+import tempfile
+
+import pytest
+
+_DATA_DIR = tempfile.mkdtemp(prefix="esg-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{_DATA_DIR}/test.db"
+os.environ["LOG_LEVEL"] = "WARNING"
+os.environ["PEER_REFRESH_INTERVAL"] = "0"
+# Local datasets and config files from the developer's environment would change results
+for name in (
+    "ASYNC_DATABASE_URL", "SCORING_CONFIG_PATH", "RECOMMENDATION_RULES_PATH",
+    "ANALYSIS_CACHE_PATH", "EPA_DATA_DIR", "RISK_DATA_DIR",
+):
+    os.environ.pop(name, None)
+
+
+def pytest_sessionfinish(session, exitstatus):
+    shutil.rmtree(_DATA_DIR, ignore_errors=True)
+
+
+@pytest.fixture(scope="session")
+def client():
+    from fastapi.testclient import TestClient
+
+    from app import database, main
+
+    with TestClient(main.app) as client:
+        yield client
+    main.stop_logging()
+    database.engine.dispose()
+
+
+@pytest.fixture(scope="session")
+def sync_engine(client):
+    from app.database import engine
+
+    return engine
+
@@ -0,0 +1,79 @@
+# tests/test_cache.py
+import asyncio
+import json
+
+from app.cache import AnalysisCache, analysis_key
+from app.scoring import reload_plan
+from app.scoring_config import ESG_WEIGHTS
+
+PROJECT = {"projectName": "cache check", "location": "Cache, NV", "projectType": "cache", "surveyResponses": {"1": "A", "9": "A"}}
+
+
+def test_version_change_drops_memory_entries():
+    async def run():
+        cache = AnalysisCache(10, 60)
+        cache.ensure_version("v1")
+        await cache.set("key", {"v": 1})
+        cache.ensure_version("v1")
+        assert await cache.get("key") == {"v": 1}
+        cache.ensure_version("v2")
+        assert await cache.get("key") is None
+        assert cache.stats()["version"] == "v2"
+
+    asyncio.run(run())
+
+
+def test_disk_rows_are_read_back_only_under_their_version(tmp_path):
+    async def run():
+        cache = AnalysisCache(10, 60, str(tmp_path / "cache.db"))
+        cache.ensure_version("v1")
+        await cache.set("key", {"v": 1})
+        cache.ensure_version("v2")
+        assert await cache.get("key") is None
+        restarted = AnalysisCache(10, 60, str(tmp_path / "cache.db"))
+        restarted.ensure_version("v1")
+        assert await restarted.get("key") == {"v": 1}
+        assert restarted.disk_hits == 1
+
+    asyncio.run(run())
+
+
+def test_key_depends_on_version_and_scored_answers():
+    survey = {"1": "A", "2": "B"}
+    assert analysis_key(survey, "solar", "v1") != analysis_key(survey, "solar", "v2")
+    assert analysis_key(survey, "solar", "v1") != analysis_key(survey, "wind", "v1")
+    assert analysis_key(survey, "solar", "v1") == analysis_key({"2": "B", "1": "A"}, "solar", "v1")
+
+
+def test_lru_eviction_and_ttl():
+    async def run():
+        cache = AnalysisCache(2, 60)
+        for key in ("a", "b", "c"):
+            await cache.set(key, {"key": key})
+        assert await cache.get("a") is None
+        assert cache.evictions == 1
+        expired = AnalysisCache(2, -1)
+        await expired.set("a", {"key": "a"})
+        assert await expired.get("a") is None
+
+    asyncio.run(run())
+
+
+def test_analyze_misses_after_the_weights_change(client, tmp_path):
+    first = client.post("/projects/analyze", json=PROJECT).json()
+    hits = client.get("/cache/stats").json()["hits"]
+    assert client.post("/projects/analyze", json=PROJECT).json()["scores"] == first["scores"]
+    assert client.get("/cache/stats").json()["hits"] == hits + 1
+
+    weights = {category: dict(config, questions=list(config['questions']), weight=1.0 if i == 0 else 0.0) for i, (category, config) in enumerate(ESG_WEIGHTS.items())}
+    path = tmp_path / "weights.json"
+    path.write_text(json.dumps(weights))
+    reload_plan(str(path))
+    try:
+        misses = client.get("/cache/stats").json()["misses"]
+        changed = client.post("/projects/analyze", json=PROJECT).json()
+        assert client.get("/cache/stats").json()["misses"] == misses + 1
+        assert changed["scores"]["total"] == changed["scores"]["standard_esg"]
+        assert changed["scores"] != first["scores"]
+    finally:
+        reload_plan()
@@ -0,0 +1,91 @@
+# tests/test_config_reload.py
+import asyncio
+import json
+import os
+
+import pytest
+
+from app import scoring
+from app.cache import AnalysisCache
+from app.config import settings
+from app.recommendations import get_rules, reload_rules
+from app.scoring import get_plan, reload_plan
+from app.scoring_config import ESG_WEIGHTS
+
+TOKEN = "test-token"
+
+
+def weights_with_category_weights(*category_weights: float) -> dict:
+    weights = {category: dict(config, questions=list(config['questions'])) for category, config in ESG_WEIGHTS.items()}
+    for config, weight in zip(weights.values(), category_weights):
+        config['weight'] = weight
+    return weights
+
+
+@pytest.fixture
+def config_file(tmp_path, monkeypatch):
+    path = tmp_path / "weights.json"
+    path.write_text(json.dumps(weights_with_category_weights(0.25, 0.25, 0.25, 0.25)))
+    monkeypatch.setattr(settings, "SCORING_CONFIG_PATH", str(path))
+    monkeypatch.setattr(settings, "CONFIG_CHECK_INTERVAL", 0)
+    yield path
+    monkeypatch.undo()
+    reload_plan()
+    reload_rules()
+
+
+def rewrite(path, weights: dict) -> None:
+    path.write_text(json.dumps(weights))
+    # Make the edit visible even on filesystems with coarse timestamps
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+
+def test_edited_config_is_picked_up_without_the_endpoint(config_file):
+    first = reload_plan()
+    assert get_plan() is first
+
+    rewrite(config_file, weights_with_category_weights(0.4, 0.2, 0.2, 0.2))
+    second = get_plan()
+    assert second.version != first.version
+    assert list(second.category_weights) == [0.4, 0.2, 0.2, 0.2]
+    assert get_plan() is second
+
+
+def test_invalid_edit_keeps_the_current_plan(config_file):
+    first = reload_plan()
+    rewrite(config_file, weights_with_category_weights(0.9, 0.9, 0.9, 0.9))
+
+    assert get_plan() is first
+    # Not retried until the file changes again
+    assert scoring._plan_signature is not None and get_plan() is first
+
+
+def test_reload_endpoint_needs_admin_token(client, monkeypatch):
+    monkeypatch.setattr(settings, "ADMIN_TOKEN", None)
+    assert client.post("/admin/scoring/reload").status_code == 403
+
+    monkeypatch.setattr(settings, "ADMIN_TOKEN", TOKEN)
+    assert client.post("/admin/scoring/reload").status_code == 401
+    assert client.post("/admin/scoring/reload", headers={"X-Admin-Token": "wrong"}).status_code == 401
+
+    response = client.post("/admin/scoring/reload", headers={"X-Admin-Token": TOKEN})
+    assert response.status_code == 200
+    assert response.json()["version"] == get_plan().version
+    assert response.json()["rules_version"] == get_rules().version
+
+
+def test_cache_keeps_other_versions_rows(tmp_path):
+    async def run():
+        path = str(tmp_path / "cache.db")
+        worker_a, worker_b = AnalysisCache(10, 60, path), AnalysisCache(10, 60, path)
+        worker_a.ensure_version("a")
+        await worker_a.set("key-a", {"v": "a"})
+        # A second worker still on another version must not delete the first one's rows
+        worker_b.ensure_version("b")
+        await worker_b.set("key-b", {"v": "b"})
+        worker_a._entries.clear()
+        assert await worker_a.get("key-a") == {"v": "a"}
+        assert await worker_a.get("key-b") is None
+
+    asyncio.run(run())
@@ -0,0 +1,51 @@
+# tests/test_database.py
+import asyncio
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+from app import database
+from app.config import settings
+
+
+def test_sqlite_connections_use_wal_and_busy_timeout(sync_engine):
+    with sync_engine.connect() as connection:
+        assert connection.execute(text("PRAGMA journal_mode")).scalar() == "wal"
+        assert connection.execute(text("PRAGMA busy_timeout")).scalar() == settings.SQLITE_BUSY_TIMEOUT_MS
+        # NORMAL
+        assert connection.execute(text("PRAGMA synchronous")).scalar() == 1
+
+
+def test_async_engine_pools_file_database_connections(client):
+    assert database.ASYNC_SQLALCHEMY_DATABASE_URL.startswith("sqlite+aiosqlite://")
+    pool = database.async_engine.pool
+    assert isinstance(pool, AsyncAdaptedQueuePool)
+    assert pool.size() == settings.DB_POOL_SIZE
+
+    # A separate engine on the same file: the app's pool belongs to the test client's event loop
+    engine = create_async_engine(database.ASYNC_SQLALCHEMY_DATABASE_URL)
+    database._with_pragmas(engine.sync_engine)
+
+    async def run():
+        async with engine.connect() as connection:
+            assert (await connection.execute(text("PRAGMA journal_mode"))).scalar() == "wal"
+            assert (await connection.execute(text("PRAGMA busy_timeout"))).scalar() == settings.SQLITE_BUSY_TIMEOUT_MS
+        await engine.dispose()
+
+    asyncio.run(run())
+
+
+def test_async_urls_and_pool_options():
+    assert database.async_database_url("sqlite:///./esg.db") == "sqlite+aiosqlite:///./esg.db"
+    assert database.async_database_url("postgresql://u@db/esg") == "postgresql+asyncpg://u@db/esg"
+    assert database.async_database_url("postgres://u@db/esg") == "postgresql+asyncpg://u@db/esg"
+    assert database.async_database_url("postgresql+psycopg://u@db/esg") == "postgresql+psycopg://u@db/esg"
+
+    assert database.async_pool_options("sqlite+aiosqlite://") == {}
+    assert database.async_pool_options("sqlite+aiosqlite:///:memory:") == {}
+    options = database.async_pool_options("postgresql+asyncpg://u@db/esg")
+    assert options["poolclass"] is AsyncAdaptedQueuePool
+    assert options["pool_size"] == settings.DB_POOL_SIZE
+    assert options["max_overflow"] == settings.DB_MAX_OVERFLOW
+    assert options["pool_pre_ping"]
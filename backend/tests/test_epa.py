@@ -0,0 +1,63 @@
+# tests/test_epa.py
+import csv
+
+import pytest
+
+from app import epa
+from app.config import settings
+
+FACILITIES = [(39.53, -119.81), (39.54, -119.80), (39.60, -119.70), (39.90, -119.30), (40.50, -118.00)]
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    source = tmp_path / "facilities.csv"
+    with open(source, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["facility_name", "latitude83", "longitude83"])
+        for i, (latitude, longitude) in enumerate(FACILITIES):
+            writer.writerow([f"Facility {i}", latitude, longitude])
+    epa.build_store(str(source), str(tmp_path / "store"))
+    loaded = epa.FacilityStore(str(tmp_path / "store"))
+    monkeypatch.setattr(epa, "_store", loaded)
+    return loaded
+
+
+def test_stored_projects_get_the_exact_facility_density(client, store):
+    site = {
+        "projectName": "epa density", "location": "EPA Density, NV", "projectType": "epa",
+        "latitude": 39.53, "longitude": -119.81, "surveyResponses": {"1": "A"},
+    }
+    analyzed = client.post("/projects/analyze", json=site).json()
+    stored = client.post("/projects/", json=site).json()
+
+    count = int(store.count_within([39.53], [-119.81], settings.EPA_SEARCH_RADIUS_KM)[0])
+    assert count == 2
+    expected = epa.facility_density_score(count, settings.EPA_DENSITY_HALF_COUNT)
+    assert analyzed["location_risks"]["facility_density"] == expected
+    assert stored["location_risks"]["facility_density"] == expected
+
+
+def test_nearby_matches_brute_force(store):
+    for latitude, longitude in [(39.53, -119.81), (39.7, -119.5), (0.0, 0.0)]:
+        for radius in (1, 10, 50, 200):
+            indices, distances = store.nearby(latitude, longitude, radius)
+            everything = epa.haversine_km(latitude, longitude, store.lat, store.lon)
+            assert sorted(indices.tolist()) == sorted((everything <= radius).nonzero()[0].tolist())
+            assert list(distances) == sorted(distances)
+            assert store.count_within([latitude], [longitude], radius)[0] == len(indices)
+
+
+def test_analyze_reports_nearby_facilities(client, store):
+    site = {
+        "projectName": "epa nearby", "location": "EPA Nearby, NV", "projectType": "epa",
+        "latitude": 39.53, "longitude": -119.81, "surveyResponses": {"1": "A"},
+    }
+    epa_data = client.post("/projects/analyze", json=site).json()["epa_data"]
+    assert [f["facility_name"] for f in epa_data["nearby_facilities"]] == ["Facility 0", "Facility 1"]
+    assert epa_data["compliance_metrics"]["facilities_within_radius"] == 2
+    assert epa_data["compliance_metrics"]["nearest_facility_km"] == 0
+    # Kept for existing clients; the store has no such measures
+    assert epa_data["air_quality_index"] is None
+    assert epa_data["water_quality_score"] is None
+    assert epa_data["environmental_justice_score"] is None
@@ -0,0 +1,51 @@
+# tests/test_export.py
+import csv
+import io
+
+import pyarrow as pa
+
+SURVEYS = [{"1": "A", "2": "B"}, {"35": "A"}, {str(q): "B" for q in range(1, 36)}]
+
+
+def stored(client):
+    projects = [
+        {"projectName": f"export {i}", "location": "Export, NV", "projectType": "export", "surveyResponses": answers}
+        for i, answers in enumerate(SURVEYS)
+    ]
+    return client.post("/projects/bulk", json=projects).json()["ids"]
+
+
+def expected_answers(answers: dict) -> dict:
+    return {f"q{q}": answers.get(str(q)) for q in range(1, 36)}
+
+
+def test_csv_export_round_trip(client):
+    ids = stored(client)
+    response = client.get("/projects/export", params={"format": "csv", "projectType": "export", "columns": "id,projectName,total_esg_score,answers"})
+    assert response.status_code == 200
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+
+    assert [int(row["id"]) for row in rows] == ids
+    for project_id, row, answers in zip(ids, rows, SURVEYS):
+        project = client.get(f"/projects/{project_id}").json()
+        assert row["projectName"] == project["projectName"]
+        assert float(row["total_esg_score"]) == project["total_esg_score"]
+        # csv writes null answers as empty strings
+        assert {q: row[q] or None for q in expected_answers(answers)} == expected_answers(answers)
+
+
+def test_arrow_export_round_trip(client):
+    ids = stored(client)
+    response = client.get("/projects/export", params={"format": "arrow", "projectType": "export", "batch_size": 2})
+    assert response.status_code == 200
+    table = pa.ipc.open_stream(response.content).read_all()
+
+    rows = [row for row in table.to_pylist() if row["id"] in ids]
+    assert [row["id"] for row in rows] == ids
+    assert table.schema.field("id").type == pa.int64()
+    assert table.schema.field("q1").type == pa.string()
+    for row, answers in zip(rows, SURVEYS):
+        project = client.get(f"/projects/{row['id']}").json()
+        assert row["projectName"] == project["projectName"]
+        assert row["total_esg_score"] == project["total_esg_score"]
+        assert {q: row[q] for q in expected_answers(answers)} == expected_answers(answers)
@@ -0,0 +1,73 @@
+# tests/test_geocoding.py
+import asyncio
+
+import pytest
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app import models
+from app.geocoding import Geocoder, LocationResolver
+
+
+class CountingGeocoder(Geocoder):
+    def __init__(self):
+        self.queries = []
+
+    def geocode_many(self, queries):
+        self.queries += queries
+        return {query: None if query == "nowhere" else (float(len(query)), 1.0) for query in queries}
+
+
+@pytest.fixture
+def sessions(tmp_path):
+    # A database of its own, so eviction counts only this test's rows
+    path = tmp_path / "geocode.db"
+    sync_engine = create_engine(f"sqlite:///{path}")
+    models.Base.metadata.create_all(bind=sync_engine)
+    sync_engine.dispose()
+    engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+    yield async_sessionmaker(engine, expire_on_commit=False)
+    asyncio.run(engine.dispose())
+
+
+async def cached_queries(db) -> set:
+    return set((await db.scalars(select(models.GeocodeCache.query))).all())
+
+
+def test_cache_hits_skip_the_geocoder(sessions):
+    async def run():
+        geocoder = CountingGeocoder()
+        async with sessions() as db:
+            resolver = LocationResolver(geocoder)
+            first = await resolver.resolve(db, "Reno, Nevada")
+            assert await resolver.resolve(db, "  reno,  NV ") == first
+            assert await resolver.resolve(db, "Nowhere") is None
+            assert await resolver.resolve(db, "nowhere") is None
+            assert geocoder.queries == ["reno, nv", "nowhere"]
+
+            # A fresh worker finds both, misses included, in the table
+            restarted = LocationResolver(geocoder)
+            resolved = await restarted.resolve_many(db, ["Reno, NV", "nowhere"])
+            assert resolved == {"Reno, NV": first, "nowhere": None}
+            assert geocoder.queries == ["reno, nv", "nowhere"]
+
+    asyncio.run(run())
+
+
+def test_table_is_trimmed_to_max_entries(sessions):
+    async def run():
+        geocoder = CountingGeocoder()
+        async with sessions() as db:
+            resolver = LocationResolver(geocoder, memory_size=2, max_entries=20)
+            for i in range(40):
+                await resolver.resolve(db, f"place {i}")
+                assert len(await cached_queries(db)) <= resolver.high_water
+            queries = await cached_queries(db)
+            assert len(queries) >= resolver.max_entries
+            assert "place 39" in queries and "place 0" not in queries
+
+            # Evicted places are geocoded again
+            await resolver.resolve(db, "place 0")
+            assert geocoder.queries.count("place 0") == 2
+
+    asyncio.run(run())
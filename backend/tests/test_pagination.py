@@ -0,0 +1,57 @@
+# tests/test_pagination.py
+from datetime import datetime
+
+import pytest
+from sqlalchemy import text
+
+
+def project(name: str, project_type: str, answers: dict, location: str = "Austin, TX") -> dict:
+    return {"projectName": name, "location": location, "projectType": project_type, "surveyResponses": answers}
+
+
+def all_pages(client, limit: int, **params) -> list:
+    rows, cursor = [], None
+    while True:
+        query = {"limit": limit, "fields": "id,created_at", **params}
+        if cursor:
+            query["cursor"] = cursor
+        response = client.get("/projects/", params=query)
+        assert response.status_code == 200, response.text
+        rows += response.json()
+        cursor = response.headers.get("X-Next-Cursor")
+        if cursor is None:
+            return rows
+
+
+@pytest.mark.parametrize("sort", ["created_at", "-created_at"])
+def test_keyset_pages_with_created_at_ties(client, sync_engine, sort):
+    project_type = f"keyset{sort}"
+    ids = client.post(
+        "/projects/bulk", json=[project(f"tie {i}", project_type, {"1": "A"}) for i in range(11)]
+    ).json()["ids"]
+    # Two groups of identical timestamps, so the id tiebreak decides the order
+    with sync_engine.begin() as connection:
+        for project_id in ids:
+            stamp = datetime(2024, 1, 1 if project_id % 3 else 2)
+            connection.execute(text("UPDATE projects SET created_at = :stamp WHERE id = :id"), {"stamp": stamp, "id": project_id})
+
+    expected = sorted(ids, key=lambda project_id: (project_id % 3 == 0, project_id), reverse=sort.startswith("-"))
+    for limit in (1, 2, 4, 11, 50):
+        pages = all_pages(client, limit, projectType=project_type, sort=sort)
+        assert [row["id"] for row in pages] == expected
+
+
+def test_score_sort_pages_with_ties(client):
+    project_type = "keyset_score"
+    surveys = [{"1": "A"}, {"1": "B"}, {"1": "A", "2": "B"}] * 4
+    ids = client.post("/projects/bulk", json=[project(f"score {i}", project_type, s) for i, s in enumerate(surveys)]).json()["ids"]
+
+    everything = client.get("/projects/", params={"projectType": project_type, "limit": 100}).json()
+    scores = {row["id"]: row["total_esg_score"] for row in everything}
+    expected = sorted(ids, key=lambda project_id: (-scores[project_id], -project_id))
+    assert [row["id"] for row in all_pages(client, 5, projectType=project_type, sort="-total_esg_score")] == expected
+
+
+def test_invalid_cursor(client):
+    response = client.get("/projects/", params={"cursor": "not-a-cursor"})
+    assert response.status_code == 400
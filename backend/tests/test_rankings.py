@@ -0,0 +1,88 @@
+# tests/test_rankings.py
+import bisect
+import random
+
+import numpy as np
+import pytest
+
+from app.crud import SCORE_COLUMNS
+from app.rankings import PeerRankings, ScoreIndex, score_key
+
+
+def test_score_index_matches_a_sorted_list(monkeypatch):
+    # Merge often so queries run against array, pending lists and merged states
+    monkeypatch.setattr(ScoreIndex, "MERGE_SIZE", 8)
+    rng = random.Random(5)
+    start = [score_key(rng.randrange(0, 2000) / 100, i) for i in range(1, 200)]
+    index, reference = ScoreIndex(np.array(start, dtype=np.int64)), sorted(start)
+    next_id = 200
+    for _ in range(1000):
+        if reference and rng.random() < 0.45:
+            key = rng.choice(reference)
+            index.remove(key)
+            reference.remove(key)
+        else:
+            key = score_key(rng.randrange(0, 2000) / 100, next_id)
+            next_id += 1
+            index.add(key)
+            bisect.insort(reference, key)
+
+        probe = score_key(rng.randrange(0, 2000) / 100, rng.randrange(0, next_id))
+        k = rng.randrange(0, 4)
+        position = bisect.bisect_left(reference, probe)
+        assert len(index) == len(reference)
+        assert index.count_below(probe) == position
+        assert (probe in index) == (probe in reference)
+        assert index.before(probe, k) == (reference[max(position - k, 0):position] if k else [])
+        after = bisect.bisect_right(reference, probe)
+        assert index.after(probe, k) == reference[after:after + k]
+
+
+def row(project_id: int, project_type: str, total: float) -> dict:
+    return {
+        "id": project_id, "projectType": project_type, "location": None,
+        **{column: total for column in SCORE_COLUMNS.values()},
+    }
+
+
+def brute_force(peers: list, score: float) -> dict:
+    below = sum(peer < score for peer in peers)
+    equal = sum(peer == score for peer in peers)
+    return {
+        "peers": len(peers),
+        "rank": len(peers) - below - equal + 1,
+        "percentile": round(100 * (below + 0.5 * equal) / len(peers), 2),
+    }
+
+
+@pytest.mark.parametrize("seed", [1, 2, 3])
+def test_rank_and_percentile_match_brute_force(seed):
+    rng = random.Random(seed)
+    # Scores on a coarse grid so there are plenty of ties
+    totals = {project_id: rng.randrange(0, 21) * 5.0 for project_id in range(1, 301)}
+    rankings = PeerRankings(neighbors=2)
+    rankings.add(row(project_id, "solar", total) for project_id, total in totals.items())
+
+    for _ in range(50):
+        score = rng.randrange(0, 21) * 5.0
+        ranked = rankings.rank({"total": score}, {"projectType": "solar"})[0]["categories"]["total"]
+        assert {k: ranked[k] for k in ("peers", "rank", "percentile")} == brute_force(list(totals.values()), score)
+
+        # A stored project is not its own peer
+        project_id = rng.choice(list(totals))
+        own = rankings.rank({"total": totals[project_id]}, {"projectType": "solar"}, project_id)[0]["categories"]["total"]
+        others = [total for other, total in totals.items() if other != project_id]
+        assert {k: own[k] for k in ("peers", "rank", "percentile")} == brute_force(others, totals[project_id])
+
+
+def test_revise_moves_projects_between_scores():
+    rankings = PeerRankings()
+    rankings.add([row(1, "wind", 10.0), row(2, "wind", 20.0), row(3, "wind", 30.0)])
+    rankings.revise([(row(1, "wind", 10.0), row(1, "wind", 40.0))])
+    rankings.revise([(row(1, "wind", 10.0), row(1, "wind", 40.0))])
+
+    ranked = rankings.rank({"total": 35.0}, {"projectType": "wind"})[0]["categories"]["total"]
+    assert ranked["peers"] == 3
+    assert ranked["rank"] == 2
+    assert [peer["id"] for peer in ranked["below"]] == [3, 2]
+    assert [peer["id"] for peer in ranked["above"]] == [1]
@@ -0,0 +1,96 @@
+# tests/test_recommendations.py
+import random
+
+import pytest
+
+from app.recommendations import compile_rules
+from app.scoring import get_plan
+from app.scoring_config import PROJECT_TYPE_RECOMMENDATIONS, load_rules, validate_rules
+
+CATEGORIES = ("standard_esg", "european_esg", "us_esg", "community_engagement")
+
+
+def if_chain_recommendations(scores: dict) -> list:
+    """The hand-written checks the rule engine replaced"""
+    recommendations = []
+    if scores['standard_esg'] < 70:
+        recommendations.append(
+            "Improve basic ESG compliance measures, including materials recycling and workforce development programs."
+        )
+    if scores['european_esg'] < 70:
+        recommendations.append("Enhance alignment with EU Taxonomy and CSRD reporting requirements.")
+    if scores['us_esg'] < 70:
+        recommendations.append("Strengthen environmental and social impact measures to meet US standards.")
+    if scores['community_engagement'] < 70:
+        recommendations.append("Develop more robust community engagement and communication strategies.")
+    return recommendations
+
+
+def if_chain_risks(scores: dict) -> list:
+    risks = []
+    if scores['standard_esg'] < 50:
+        risks.append("Critical ESG compliance gaps may affect project viability")
+    if scores['european_esg'] < 50:
+        risks.append("Limited alignment with EU standards may restrict funding options")
+    if scores['us_esg'] < 50:
+        risks.append("Below-standard US ESG practices pose regulatory risks")
+    if scores['community_engagement'] < 50:
+        risks.append("Insufficient community engagement may lead to project opposition")
+    return risks
+
+
+def random_scores(count: int, seed: int = 5) -> list:
+    rng = random.Random(seed)
+    # Thresholds themselves are the interesting values
+    values = [0.0, 49.99, 50.0, 50.01, 69.99, 70.0, 100.0]
+    return [
+        {name: rng.choice(values) if rng.random() < 0.3 else round(rng.uniform(0, 100), 2) for name in CATEGORIES + ("total",)}
+        for _ in range(count)
+    ]
+
+
+@pytest.fixture(scope="module")
+def rules():
+    return compile_rules(load_rules(metrics=get_plan().metrics))
+
+
+def test_default_rules_match_if_chains(rules):
+    for scores in random_scores(1000):
+        assert rules.evaluate(scores, "other") == (if_chain_recommendations(scores), if_chain_risks(scores))
+        assert rules.evaluate(scores) == (if_chain_recommendations(scores), if_chain_risks(scores))
+
+
+@pytest.mark.parametrize("project_type", sorted(PROJECT_TYPE_RECOMMENDATIONS))
+def test_project_type_lists_follow_total_band(rules, project_type):
+    lists = PROJECT_TYPE_RECOMMENDATIONS[project_type]
+    for total, extra in ((49.99, lists['low_score']), (50.0, lists['medium_score']), (70.0, [])):
+        scores = {**dict.fromkeys(CATEGORIES, 80.0), "total": total}
+        assert rules.evaluate(scores, project_type) == (extra, [])
+
+
+def test_batch_matches_single_evaluation(rules):
+    all_scores = random_scores(300, seed=9)
+    types = [random.Random(i).choice(["solar_utility", "wind_onshore", "other", None]) for i in range(300)]
+
+    assert rules.evaluate_batch(all_scores, types) == [rules.evaluate(s, t) for s, t in zip(all_scores, types)]
+
+
+def test_subcategory_rules_match_boundaries():
+    config = load_rules()
+    config['rules'] = [
+        {'kind': 'risk', 'metric': 'us_esg.social', 'at_least': 20, 'below': 40, 'message': 'social'},
+    ]
+    rules = compile_rules(config)
+
+    assert rules.needs_subcategories
+    assert rules.evaluate({"us_esg.social": 19.99})[1] == []
+    assert rules.evaluate({"us_esg.social": 20.0})[1] == ["social"]
+    assert rules.evaluate({"us_esg.social": 40.0})[1] == []
+
+
+def test_unknown_metric_is_rejected():
+    config = load_rules()
+    config['rules'] = [{'kind': 'risk', 'metric': 'us_esg.bogus', 'below': 50, 'message': 'x'}]
+
+    with pytest.raises(ValueError, match="unknown metric"):
+        validate_rules(config, get_plan().metrics)
@@ -0,0 +1,64 @@
+# tests/test_rescore.py
+from sqlalchemy import select, text
+
+from app import models
+from app.crud import SCORE_COLUMNS
+from app.database import SessionLocal
+from app.rescore import rescore_projects
+from app.scoring import ESGScorer, encode_masks
+
+
+def project(name: str, answers: dict) -> dict:
+    return {"projectName": name, "location": "Reno, NV", "projectType": "rescore", "surveyResponses": answers}
+
+
+def stored_scores(db, project_id: int) -> dict:
+    row = db.execute(select(models.Project).where(models.Project.id == project_id)).scalar_one()
+    return {key: getattr(row, column) for key, column in SCORE_COLUMNS.items()}, row.scoring_version
+
+
+def make_stale(sync_engine, ids) -> None:
+    with sync_engine.begin() as connection:
+        connection.execute(
+            text("UPDATE projects SET scoring_version = 'old', total_esg_score = -1 WHERE id IN (%s)" % ",".join(map(str, ids)))
+        )
+
+
+def test_rescore_restores_current_scores(client, sync_engine):
+    surveys = [{"1": "A", "2": "B"}, {"16": "A"}, {str(q): "A" for q in range(1, 36)}]
+    ids = client.post("/projects/bulk", json=[project(f"rescore {i}", s) for i, s in enumerate(surveys)]).json()["ids"]
+    make_stale(sync_engine, ids)
+    scorer = ESGScorer()
+
+    with SessionLocal() as db:
+        state = rescore_projects(db, scorer, chunk_size=2, window_size=2)
+        assert state.done == state.total == len(ids)
+        for project_id, survey in zip(ids, surveys):
+            assert stored_scores(db, project_id) == (scorer.calculate_scores(survey), scorer.plan.version)
+        assert rescore_projects(db, scorer).total == 0
+
+
+def test_project_revised_mid_rescore_keeps_its_own_scores(client, sync_engine, monkeypatch):
+    ids = client.post("/projects/bulk", json=[project(f"raced {i}", {"1": "B"}) for i in range(4)]).json()["ids"]
+    make_stale(sync_engine, ids)
+    revised = {"1": "A", "2": "A"}
+    answered, yes = encode_masks(revised)
+    scorer = ESGScorer()
+    score_masks = scorer.score_masks
+
+    def revise_during_read(answered_masks, yes_masks):
+        # Another writer revises the first project after it was read
+        with sync_engine.begin() as connection:
+            connection.execute(
+                text("UPDATE projects SET survey_answered = :a, survey_yes = :y WHERE id = :id"),
+                {"a": answered, "y": yes, "id": ids[0]},
+            )
+        monkeypatch.setattr(scorer, "score_masks", score_masks)
+        return score_masks(answered_masks, yes_masks)
+
+    monkeypatch.setattr(scorer, "score_masks", revise_during_read)
+    with SessionLocal() as db:
+        state = rescore_projects(db, scorer)
+        assert state.done == len(ids) and state.skipped == 0
+        assert stored_scores(db, ids[0]) == (scorer.calculate_scores(revised), scorer.plan.version)
+        assert stored_scores(db, ids[1]) == (scorer.calculate_scores({"1": "B"}), scorer.plan.version)
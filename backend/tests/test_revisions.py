@@ -0,0 +1,47 @@
+# tests/test_revisions.py
+import random
+
+from app.scoring import ESGScorer
+
+
+def project(name: str, project_type: str, answers: dict, location: str = "Austin, TX") -> dict:
+    return {"projectName": name, "location": location, "projectType": project_type, "surveyResponses": answers}
+
+
+def random_answers(rng: random.Random) -> dict:
+    return {str(q): rng.choice("AB") for q in range(1, 36) if rng.random() < 0.7}
+
+
+def test_revisions_rebuild_every_version(client):
+    rng = random.Random(21)
+    versions = [random_answers(rng) for _ in range(6)]
+    for answers in versions:
+        stored = client.post("/projects/", json=project("revised", "revisions", answers, location="Denver, CO")).json()
+    project_id = stored["id"]
+    assert stored["revision"] == len(versions)
+
+    history = client.get(f"/projects/{project_id}/history", params={"answers": True}).json()
+    assert [version["revision"] for version in history["versions"]] == list(range(1, len(versions) + 1))
+    assert [version["surveyResponses"] for version in history["versions"]] == versions
+
+    scorer = ESGScorer()
+    assert history["versions"][0]["changes"] == {}
+    for previous, answers, version in zip(versions, versions[1:], history["versions"][1:]):
+        changed = {q: answers.get(q) for q in set(previous) | set(answers) if previous.get(q) != answers.get(q)}
+        assert version["changes"] == changed
+    for answers, version in zip(versions, history["versions"]):
+        assert version["scores"] == scorer.calculate_scores(answers)
+
+    for revision, answers in enumerate(versions, start=1):
+        version = client.get(f"/projects/{project_id}/versions/{revision}").json()
+        assert version["surveyResponses"] == answers
+    assert client.get(f"/projects/{project_id}/versions/{len(versions) + 1}").status_code == 404
+
+
+def test_unchanged_resubmission_stores_nothing(client):
+    body = project("unchanged", "revisions", {"1": "A", "2": "B"}, location="Boston, MA")
+    first = client.post("/projects/", json=body).json()
+    second = client.post("/projects/", json=body).json()
+
+    assert second["id"] == first["id"]
+    assert second["revision"] == first["revision"] == 1
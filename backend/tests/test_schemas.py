@@ -0,0 +1,19 @@
+# tests/test_schemas.py
+import pytest
+
+
+def project(answers: dict) -> dict:
+    return {"projectName": "schema check", "location": "Schema, NV", "projectType": "schema", "surveyResponses": answers}
+
+
+@pytest.mark.parametrize("answers", [{"0": "A"}, {"36": "A"}, {"07": "A"}, {"q1": "B"}, {"1": "C"}, {"1": "a"}, {"2": ""}])
+def test_invalid_survey_responses_are_rejected(client, answers):
+    for path in ("/projects/analyze", "/projects/"):
+        response = client.post(path, json=project(answers))
+        assert response.status_code == 422
+        assert response.json()["detail"][0]["loc"][-1] == "surveyResponses"
+
+
+def test_valid_survey_responses_are_accepted(client):
+    answers = {"1": "A", "35": "B"}
+    assert client.post("/projects/analyze", json=project(answers)).status_code == 200
@@ -0,0 +1,112 @@
+# tests/test_scoring.py
+import random
+
+import numpy as np
+import pytest
+
+from app.scoring import (
+    ESGScorer,
+    NUM_QUESTIONS,
+    arrays_from_masks,
+    decode_masks,
+    encode_masks,
+    encode_responses,
+    get_plan,
+    masks_from_arrays,
+)
+
+
+def scalar_scores(weights: dict, survey_responses: dict) -> dict:
+    """The original per-question loop, kept as the reference for the matrix path"""
+    responses = {int(k): v for k, v in survey_responses.items()}
+    scores, total = {}, 0
+    for category, config in weights.items():
+        category_score = 0
+        for subconfig in config['subcategories'].values():
+            yes = answered = 0
+            for question in subconfig['questions']:
+                if question in responses:
+                    if responses[question] == 'A':
+                        yes += 1
+                    answered += 1
+            if answered > 0:
+                category_score += (yes / answered) * 100 * subconfig['weight']
+        scores[category] = round(category_score, 2)
+        total += category_score * config['weight']
+    scores['total'] = round(total, 2)
+    return scores
+
+
+def random_surveys(count: int, seed: int = 7) -> list:
+    rng = random.Random(seed)
+    surveys = [{}, {str(q): 'A' for q in range(1, NUM_QUESTIONS + 1)}, {str(q): 'B' for q in range(1, NUM_QUESTIONS + 1)}]
+    while len(surveys) < count:
+        surveys.append({
+            str(q): rng.choice("AAB" if rng.random() < 0.5 else "ABC")
+            for q in range(1, NUM_QUESTIONS + 1)
+            if rng.random() < 0.8
+        })
+    return surveys
+
+
+@pytest.fixture(scope="module")
+def scorer():
+    return ESGScorer()
+
+
+def test_batch_scores_match_scalar_scorer(scorer):
+    surveys = random_surveys(500)
+    expected = [scalar_scores(scorer.weights, survey) for survey in surveys]
+
+    assert scorer.score_batch(surveys) == expected
+    assert [scorer.calculate_scores(survey) for survey in surveys] == expected
+
+
+def test_mask_scores_match_scalar_scorer(scorer):
+    surveys = random_surveys(200, seed=11)
+    answered, yes = zip(*(encode_masks(survey) for survey in surveys))
+
+    assert scorer.score_masks(list(answered), list(yes)) == [scalar_scores(scorer.weights, s) for s in surveys]
+
+
+def test_subcategory_scores_are_answered_share(scorer):
+    survey = {"1": "A", "2": "B", "3": "A", "6": "C", "16": "A"}
+    subcategories = scorer.subcategory_batch([survey])[0]
+
+    assert subcategories["standard_esg.basic_compliance"] == 66.67
+    assert subcategories["standard_esg.environmental_practices"] == 0.0
+    assert subcategories["european_esg.eu_taxonomy"] == 100.0
+    assert set(subcategories) == set(get_plan().metrics) - set(get_plan().categories) - {"total"}
+
+
+def test_out_of_range_and_padded_question_ids(scorer):
+    assert scorer.calculate_scores({"07": "A", "99": "A", "0": "A"}) == scorer.calculate_scores({"7": "A"})
+
+
+def test_empty_batches(scorer):
+    assert scorer.score_batch([]) == []
+    assert scorer.score_masks([], []) == []
+
+
+@pytest.mark.parametrize("survey", [
+    {},
+    {"1": "A"},
+    {"35": "B"},
+    {"1": "A", "2": "B", "3": "C", "34": "A", "35": "A"},
+    {str(q): "A" for q in range(1, NUM_QUESTIONS + 1)},
+])
+def test_mask_round_trip(survey):
+    normalized = {q: "A" if answer == "A" else "B" for q, answer in survey.items()}
+
+    assert decode_masks(*encode_masks(survey)) == normalized
+
+
+def test_mask_array_round_trip():
+    yes, answered = encode_responses(random_surveys(100, seed=3))
+    answered_masks, yes_masks = masks_from_arrays(yes, answered)
+
+    unpacked_yes, unpacked_answered = arrays_from_masks(answered_masks, yes_masks)
+    np.testing.assert_array_equal(unpacked_yes, yes)
+    np.testing.assert_array_equal(unpacked_answered, answered)
+    # Every question fits below bit 35, so masks are never negative
+    assert int(answered_masks.max()) < 1 << NUM_QUESTIONS
@@ -0,0 +1,66 @@
+# tests/test_stats.py
+import random
+
+import pytest
+from sqlalchemy import literal_column, select, text
+from sqlalchemy.dialects import postgresql, sqlite
+
+from app.crud import bucket_expression, bucket_of
+
+
+def project(name: str, project_type: str, answers: dict, location: str = "Austin, TX") -> dict:
+    return {"projectName": name, "location": location, "projectType": project_type, "surveyResponses": answers}
+
+
+def random_answers(rng: random.Random) -> dict:
+    return {str(q): rng.choice("AB") for q in range(1, 36) if rng.random() < 0.7}
+
+
+def test_rollup_stats_match_exact_stats(client):
+    rng = random.Random(9)
+    types = ["stats_a", "stats_b"]
+    client.post("/projects/bulk", json=[
+        project(f"stats {i}", rng.choice(types), random_answers(rng), location=f"Town {i % 7}") for i in range(300)
+    ])
+    # Revisions move projects between buckets; the rollups must follow
+    for i in range(0, 300, 10):
+        client.post("/projects/", json=project(f"stats {i}", rng.choice(types), random_answers(rng), location=f"Town {i % 7}"))
+
+    for group_by in ("all", "projectType", "location"):
+        rollup = client.get("/projects/stats", params={"group_by": group_by}).json()
+        exact = client.get("/projects/stats/exact", params={"group_by": group_by}).json()
+        assert rollup["approximate"] and not exact["approximate"]
+
+        exact_groups = {group["group"]: group["categories"] for group in exact["groups"]}
+        for group in rollup["groups"]:
+            for category, approximate in group["categories"].items():
+                expected = exact_groups[group["group"]][category]
+                assert approximate["count"] == expected["count"]
+                assert approximate["histogram"] == expected["histogram"]
+                assert approximate["mean"] == pytest.approx(expected["mean"], abs=0.01)
+                assert approximate["std"] == pytest.approx(expected["std"], abs=0.01)
+                for name, value in approximate["percentiles"].items():
+                    # Interpolated within the 10-point bucket holding the exact value
+                    assert abs(value - expected["percentiles"][name]) <= 10
+        assert set(exact_groups) == {group["group"] for group in rollup["groups"]}
+
+
+SCORES = [-3.0, 0.0, 9.99, 10.0, 47.0, 47.5, 49.99, 99.99, 100.0, 105.0]
+
+
+def test_sql_buckets_match_bucket_of(sync_engine):
+    values = " UNION ALL ".join(f"SELECT {score} AS score" for score in SCORES)
+    scores = select(literal_column("score")).select_from(text(f"({values})")).subquery()
+    with sync_engine.connect() as connection:
+        buckets = connection.execute(
+            select(scores.c.score, bucket_expression(scores.c.score, connection.dialect.name))
+        ).all()
+
+    assert buckets == [(score, bucket_of(score)) for score in SCORES]
+
+
+@pytest.mark.parametrize("dialect, uses_floor", [(sqlite.dialect(), False), (postgresql.dialect(), True)])
+def test_bucket_expression_floors_except_on_sqlite(dialect, uses_floor):
+    sql = str(bucket_expression(literal_column("score"), dialect.name).compile(dialect=dialect))
+
+    assert ("floor(" in sql) is uses_floor
@@ -0,0 +1,106 @@
+# tests/test_streaming.py
+import asyncio
+import json
+
+import pytest
+
+from app import streaming
+from app.streaming import JSONDocumentError, iter_json_documents
+
+
+def parse(body: str, chunk_size: int = 1000) -> list:
+    """Documents from iter_json_documents, with errors replaced by their class"""
+    async def chunks():
+        data = body.encode()
+        for start in range(0, len(data), chunk_size):
+            yield data[start:start + chunk_size]
+
+    async def collect():
+        return [
+            (index, JSONDocumentError if isinstance(document, JSONDocumentError) else document)
+            async for index, document in iter_json_documents(chunks())
+        ]
+
+    return asyncio.run(collect())
+
+
+CHUNK_SIZES = [1, 2, 3, 7, 1000]
+
+
+@pytest.mark.parametrize("chunk_size", CHUNK_SIZES)
+def test_ndjson(chunk_size):
+    body = '{"a": 1}\n\n  {"b": [1, 2]}\r\n{"c": "x\\ny"}'
+
+    assert parse(body, chunk_size) == [(0, {"a": 1}), (1, {"b": [1, 2]}), (2, {"c": "x\ny"})]
+
+
+@pytest.mark.parametrize("chunk_size", CHUNK_SIZES)
+def test_ndjson_bad_line_is_reported_and_skipped(chunk_size):
+    body = '{"a": 1}\n{bad\n{"c": 3}\n'
+
+    assert parse(body, chunk_size) == [(0, {"a": 1}), (1, JSONDocumentError), (2, {"c": 3})]
+
+
+@pytest.mark.parametrize("chunk_size", CHUNK_SIZES)
+def test_array(chunk_size):
+    documents = [{"a": 1}, {"s": ",]}\\\"{["}, [1, [2, {"x": []}]], "text", 4.5, None]
+    body = "  [ " + " ,\n".join(json.dumps(d) for d in documents) + " ] trailing"
+
+    assert parse(body, chunk_size) == list(enumerate(documents))
+
+
+@pytest.mark.parametrize("chunk_size", CHUNK_SIZES)
+def test_array_bad_element_resyncs_at_next_element(chunk_size):
+    body = '[{"a": 1}, {"b": 2}, {bad, "x": [1, "]"]}, {"c": 3}]'
+
+    assert parse(body, chunk_size) == [(0, {"a": 1}), (1, {"b": 2}), (2, JSONDocumentError), (3, {"c": 3})]
+
+
+@pytest.mark.parametrize("body, expected", [
+    ('[{"a": 1}, {"b": 2}', [(0, {"a": 1}), (1, {"b": 2}), (2, JSONDocumentError)]),
+    ('[{"a": 1}, ', [(0, {"a": 1}), (1, JSONDocumentError)]),
+])
+def test_unterminated_array(body, expected):
+    assert parse(body) == expected
+
+
+def test_empty_body():
+    assert parse("") == []
+    assert parse("[]") == []
+
+
+@pytest.mark.parametrize("chunk_size", [5, 1000])
+def test_oversized_documents_are_skipped(monkeypatch, chunk_size):
+    monkeypatch.setattr(streaming, "MAX_DOCUMENT_SIZE", 50)
+    big = json.dumps({"x": "y" * 200})
+
+    assert parse(f'[{{"a": 1}}, {big}, {{"c": 3}}]', chunk_size) == [
+        (0, {"a": 1}), (1, JSONDocumentError), (2, {"c": 3})
+    ]
+    assert parse(f'{{"a": 1}}\n{big}\n{{"c": 3}}\n', chunk_size) == [
+        (0, {"a": 1}), (1, JSONDocumentError), (2, {"c": 3})
+    ]
+
+
+def test_bulk_analysis_reports_bad_projects_without_logging_each(client, monkeypatch):
+    from app import main, schemas, scoring
+
+    warnings = []
+    monkeypatch.setattr(scoring.logger, "warning", lambda *args, **kwargs: warnings.append(args))
+    good = {"projectName": "bulk good", "location": "Bulk, NV", "projectType": "bulk", "surveyResponses": {"1": "A"}}
+    lines = [good, {**good, "projectName": "bulk bad", "surveyResponses": {"99": "A"}}, {**good, "surveyResponses": {"1": "C"}}]
+    body = "\n".join(json.dumps(line) for line in lines * 50)
+
+    response = client.post("/projects/analyze/bulk", content=body)
+    # Invalid lines are reported at once, scored ones when their chunk is done
+    records = sorted((json.loads(line) for line in response.text.splitlines()), key=lambda record: record["index"])
+    assert [record["index"] for record in records] == list(range(150))
+    assert all(("error" in record) == (record["index"] % 3 != 0) for record in records)
+    assert warnings == []
+
+    # Projects that reach the scorer unvalidated are isolated quietly as well
+    unvalidated = schemas.ProjectCreate.model_construct(**{**good, "surveyResponses": {"x1": "A"}})
+    chunk = [(0, schemas.ProjectCreate.model_validate(good)), (1, unvalidated)]
+    results = [json.loads(line) for line in main._analyze_chunk(chunk).splitlines()]
+    assert "result" in results[0] and "error" in results[1]
+    assert warnings == []
@@ -0,0 +1,88 @@
+# tests/test_whatif.py
+import itertools
+
+import numpy as np
+import pytest
+
+from app import whatif
+from app.scoring import ESGScorer, NUM_QUESTIONS, encode_responses
+
+
+@pytest.fixture(scope="module")
+def scorer():
+    return ESGScorer()
+
+
+def arrays(survey: dict):
+    yes, answered = encode_responses([survey])
+    return yes[0], answered[0]
+
+
+def flipped(survey: dict, questions) -> dict:
+    return {**survey, **{str(q): "A" for q in questions}}
+
+
+def brute_force_totals(scorer, survey: dict, answers: int) -> dict:
+    # Every set of ``answers`` questions not yet answered 'A', scored one survey at a time
+    open_questions = [q for q in range(1, NUM_QUESTIONS + 1) if survey.get(str(q)) != "A"]
+    return {
+        combo: scorer.calculate_scores(flipped(survey, combo))["total"]
+        for combo in itertools.combinations(open_questions, answers)
+    }
+
+
+SURVEYS = [
+    {},
+    {"1": "A", "2": "B", "9": "B", "16": "A", "30": "B"},
+    {str(q): "B" for q in range(1, NUM_QUESTIONS + 1)},
+]
+
+
+@pytest.mark.parametrize("survey", SURVEYS)
+def test_single_flips_match_rescoring(scorer, survey):
+    base = scorer.calculate_scores(survey)
+    for action in whatif.single_flips(scorer, *arrays(survey)):
+        expected = scorer.calculate_scores(flipped(survey, [action["question"]]))
+        assert action["delta"]["total"] == pytest.approx(expected["total"] - base["total"], abs=0.011)
+
+
+@pytest.mark.parametrize("survey", SURVEYS)
+def test_exhaustive_plans_match_brute_force(scorer, survey):
+    totals = brute_force_totals(scorer, survey, 2)
+    plans = whatif.best_plans(scorer, *arrays(survey), answers=2, top=5)
+
+    assert all(plan["exhaustive"] for plan in plans)
+    best = sorted(totals.values(), reverse=True)[:5]
+    assert [plan["scores"]["total"] for plan in plans] == pytest.approx(best, abs=0.011)
+    for plan in plans:
+        assert totals[tuple(plan["questions"])] == pytest.approx(plan["scores"]["total"], abs=0.011)
+
+
+@pytest.mark.parametrize("survey", SURVEYS)
+def test_beam_search_agrees_with_exhaustive(scorer, survey, monkeypatch):
+    yes, answered = arrays(survey)
+    exhaustive = whatif.best_plans(scorer, yes, answered, answers=3, top=5)
+    monkeypatch.setattr(whatif, "MAX_EXHAUSTIVE_PLANS", 0)
+    beam = whatif.best_plans(scorer, yes, answered, answers=3, top=5)
+
+    assert not any(plan["exhaustive"] for plan in beam)
+    for plan in beam:
+        assert len(set(plan["questions"])) == 3
+        expected = scorer.calculate_scores(flipped(survey, plan["questions"]))
+        assert plan["scores"]["total"] == pytest.approx(expected["total"], abs=0.011)
+    # For these surveys the beam finds the exhaustive optimum
+    assert beam[0]["scores"]["total"] == pytest.approx(exhaustive[0]["scores"]["total"], abs=0.011)
+    assert np.all(np.diff([plan["scores"]["total"] for plan in beam]) <= 0)
+
+
+def test_whatif_endpoint(client, scorer):
+    survey = SURVEYS[1]
+    project = {"projectName": "whatif check", "location": "Whatif, NV", "projectType": "whatif", "surveyResponses": survey}
+    project_id = client.post("/projects/", json=project).json()["id"]
+
+    response = client.post(f"/projects/{project_id}/whatif", params={"answers": 2, "top": 3})
+    assert response.status_code == 200
+    body = response.json()
+    assert body["plans"] == whatif.best_plans(scorer, *arrays(survey), answers=2, top=3)
+    assert client.post(f"/projects/{project_id}/whatif", params={"target": "nope"}).status_code == 400
+    assert client.post("/projects/0/whatif").status_code == 404